@@ -11,8 +11,9 @@ from argparse import Namespace
 from collections import Counter, deque
 from collections.abc import Collection, MutableSequence
 from enum import IntEnum, IntFlag
-from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, TypedDict, Union, \
-    Type, ClassVar
+from types import MemberDescriptorType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, SupportsIndex, Tuple, \
+    TypedDict, Union, Type, ClassVar
 
 import NetUtils
 import Options
@@ -57,7 +58,7 @@ class MultiWorld():
     worlds: Dict[int, "AutoWorld.World"]
     groups: Dict[int, Group]
     regions: RegionManager
-    itempool: List[Item]
+    _itempool: ItemPool
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
@@ -80,6 +81,8 @@ class MultiWorld():
 
     game: Dict[int, str]
 
+    _all_state_cache: Optional[AllStateCache]
+
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
@@ -95,11 +98,21 @@ class MultiWorld():
         region_cache: Dict[int, Dict[str, Region]]
         entrance_cache: Dict[int, Dict[str, Entrance]]
         location_cache: Dict[int, Dict[str, Location]]
+        # index of the locations in location_cache, kept current by Region.locations and Location.item
+        location_order: Dict[Location, int]  # to return locations in the order of location_cache
+        filled_locations: Dict[int, Dict[Location, Tuple[int, str]]]  # location -> its key in item_locations
+        unfilled_locations: Dict[int, Dict[Location, None]]
+        item_locations: Dict[Tuple[int, str], Dict[Location, None]]  # (item player, item name) -> locations
 
         def __init__(self, players: int):
             self.region_cache = {player: {} for player in range(1, players+1)}
             self.entrance_cache = {player: {} for player in range(1, players+1)}
             self.location_cache = {player: {} for player in range(1, players+1)}
+            self.location_order = {}
+            self.filled_locations = {player: {} for player in range(1, players+1)}
+            self.unfilled_locations = {player: {} for player in range(1, players+1)}
+            self.item_locations = {}
+            self._location_counter = itertools.count()
 
         def __iadd__(self, other: Iterable[Region]):
             self.extend(other)
@@ -120,6 +133,48 @@ class MultiWorld():
             self.region_cache[new_id] = {}
             self.entrance_cache[new_id] = {}
             self.location_cache[new_id] = {}
+            self.filled_locations[new_id] = {}
+            self.unfilled_locations[new_id] = {}
+
+        def add_location(self, location: Location) -> None:
+            self.location_order[location] = next(self._location_counter)
+            location._region_manager = self
+            self._add_item(location, location.item)
+
+        def remove_location(self, location: Location) -> None:
+            self._remove_item(location, location.item)
+            location._region_manager = None
+            del self.location_order[location]
+
+        def update_item(self, location: Location, old_item: Optional[Item], new_item: Optional[Item]) -> None:
+            if location not in self.location_order:
+                return  # a copy of an indexed location
+            self._remove_item(location, old_item)
+            self._add_item(location, new_item)
+
+        def _add_item(self, location: Location, item: Optional[Item]) -> None:
+            if item is None:
+                self.unfilled_locations[location.player][location] = None
+            else:
+                key = (item.player, item.name)
+                self.filled_locations[location.player][location] = key
+                self.item_locations.setdefault(key, {})[location] = None
+
+        def _remove_item(self, location: Location, item: Optional[Item]) -> None:
+            if item is None:
+                del self.unfilled_locations[location.player][location]
+            else:
+                # go by the key it was indexed with, as a renamed item is only indexed again after the rename
+                key = self.filled_locations[location.player].pop(location)
+                locations = self.item_locations[key]
+                del locations[location]
+                if not locations:
+                    del self.item_locations[key]
+
+        def sort_locations(self, locations: Iterable[Location]) -> List[Location]:
+            """Sorts indexed locations into the order of location_cache."""
+            location_order = self.location_order
+            return sorted(locations, key=lambda location: (location.player, location_order[location]))
 
         def __iter__(self) -> Iterator[Region]:
             for regions in self.region_cache.values():
@@ -128,6 +183,193 @@ class MultiWorld():
         def __len__(self):
             return sum(len(regions) for regions in self.region_cache.values())
 
+    class ItemPool(List["Item"]):
+        """The item pool, as a list that also counts its items by (player, name) and by identity. This makes count,
+        in and has_identical independent of the pool size, and remove_counts removes many items in one pass."""
+        _counts: Counter[Tuple[int, str]]
+        _ids: Counter[int]
+        _keys: Dict[int, Tuple[int, str]]  # id -> (player, name) of the item when it was added
+
+        def __init__(self, items: Iterable[Item] = ()):
+            super().__init__()
+            self._counts = Counter()
+            self._ids = Counter()
+            self._keys = {}
+            self.extend(items)
+
+        def __reduce__(self):
+            return self.__class__, (list(self),)
+
+        def _add(self, item: Item) -> None:
+            item_id = id(item)
+            key = self._keys.setdefault(item_id, (item.player, item.name))
+            self._ids[item_id] += 1
+            self._counts[key] += 1
+
+        def _discard(self, item: Item) -> None:
+            item_id = id(item)
+            key = self._keys[item_id]
+            self._ids[item_id] -= 1
+            if not self._ids[item_id]:
+                del self._ids[item_id]
+                del self._keys[item_id]
+            self._counts[key] -= 1
+            if not self._counts[key]:
+                del self._counts[key]
+
+        def append(self, item: Item) -> None:
+            super().append(item)
+            self._add(item)
+
+        def extend(self, items: Iterable[Item]) -> None:
+            items = list(items)
+            super().extend(items)
+            for item in items:
+                self._add(item)
+
+        def insert(self, index: SupportsIndex, item: Item) -> None:
+            super().insert(index, item)
+            self._add(item)
+
+        def remove(self, item: Item) -> None:
+            del self[self.index(item)]
+
+        def pop(self, index: SupportsIndex = -1) -> Item:
+            item = super().pop(index)
+            self._discard(item)
+            return item
+
+        def clear(self) -> None:
+            super().clear()
+            self._counts.clear()
+            self._ids.clear()
+            self._keys.clear()
+
+        def __setitem__(self, index, value) -> None:
+            if isinstance(index, slice):
+                old_items = self[index]
+                value = list(value)
+                super().__setitem__(index, value)
+                for item in old_items:
+                    self._discard(item)
+                for item in value:
+                    self._add(item)
+            else:
+                old_item = self[index]
+                super().__setitem__(index, value)
+                self._discard(old_item)
+                self._add(value)
+
+        def __delitem__(self, index) -> None:
+            old_items = self[index] if isinstance(index, slice) else [self[index]]
+            super().__delitem__(index)
+            for item in old_items:
+                self._discard(item)
+
+        def __iadd__(self, items: Iterable[Item]) -> MultiWorld.ItemPool:
+            self.extend(items)
+            return self
+
+        def __imul__(self, times: SupportsIndex) -> MultiWorld.ItemPool:
+            items = list(self)
+            self.clear()
+            self.extend(items * times)
+            return self
+
+        def __contains__(self, item: object) -> bool:
+            if isinstance(item, Item):
+                return (item.player, item.name) in self._counts
+            return super().__contains__(item)
+
+        def count(self, item: Item) -> int:
+            """Items count as equal if they have the same name and player, see Item.__eq__."""
+            if isinstance(item, Item):
+                return self._counts[item.player, item.name]
+            return super().count(item)
+
+        def count_name(self, name: str, player: int) -> int:
+            return self._counts[player, name]
+
+        def has_identical(self, item: Item) -> bool:
+            """Whether this exact item object is in the pool, not just an equal one."""
+            return id(item) in self._ids
+
+        def remove_counts(self, counts: Dict[Tuple[int, str], int]) -> Dict[Tuple[int, str], int]:
+            """Removes the first count items of each (player, name) in one pass over the pool, like calling remove
+            that many times. Returns the counts that could not be removed, as the pool had too few of them."""
+            remaining = {key: count for key, count in counts.items() if count > 0}
+            if not remaining:
+                return {}
+            kept: List[Item] = []
+            removed: List[Item] = []
+            for item in self:
+                key = (item.player, item.name)
+                if remaining.get(key, 0):
+                    remaining[key] -= 1
+                    removed.append(item)
+                else:
+                    kept.append(item)
+            super().__setitem__(slice(None), kept)
+            for item in removed:
+                self._discard(item)
+            return {key: count for key, count in remaining.items() if count}
+
+    class AllStateCache:
+        """Keeps the items collected for get_all_state up to date, by collecting or removing only the items that
+        changed since the last call. Events are swept from scratch every time, as rules may depend on anything.
+        Items are collected depending on their classification, so changing that for a known item starts over."""
+        multiworld: MultiWorld
+        base: CollectionState  # all items collected, not swept
+        item_counts: Counter[int]  # id -> times collected into base
+        # id -> item and whether it was collected as advancement, keeps the items alive so their ids can't be reused
+        items: Dict[int, Tuple[Item, bool]]
+        precollected: List[Tuple[Item, bool]]
+        all_ids: Tuple[int, ...]
+
+        def __init__(self, multiworld: MultiWorld):
+            self.multiworld = multiworld
+            self.base = CollectionState(multiworld)
+            self.item_counts = Counter()
+            self.items = {}
+            self.precollected = self.get_precollected()
+            self.all_ids = multiworld.get_all_ids()
+
+        def get_precollected(self) -> List[Tuple[Item, bool]]:
+            return [(item, item.advancement) for items in self.multiworld.precollected_items.values() for item in items]
+
+        def is_valid(self) -> bool:
+            """Changes to the precollected items, the players or the classification of collected items need a new
+            cache."""
+            precollected = self.get_precollected()
+            return self.all_ids == self.multiworld.get_all_ids() and len(self.precollected) == len(precollected) and \
+                all(old is new and old_advancement == new_advancement
+                    for (old, old_advancement), (new, new_advancement) in zip(self.precollected, precollected)) and \
+                all(item.advancement == advancement for item, advancement in self.items.values())
+
+        def get(self) -> CollectionState:
+            multiworld = self.multiworld
+            items = multiworld.itempool + [item for player in multiworld.player_ids
+                                           for item in multiworld.worlds[player].get_pre_fill_items()]
+            item_counts = Counter(id(item) for item in items)
+            added = item_counts - self.item_counts
+            removed = self.item_counts - item_counts
+            old_items = self.items
+            self.items = {id(item): (item, item.advancement) for item in items}
+            self.item_counts = item_counts
+
+            for item_id, count in removed.items():
+                item, _ = old_items[item_id]
+                for _ in range(count):
+                    multiworld.worlds[item.player].remove(self.base, item)
+            for item_id, count in added.items():
+                item, _ = self.items[item_id]
+                for _ in range(count):
+                    multiworld.worlds[item.player].collect(self.base, item)
+
+            state = self.base.copy()
+            state.sweep_for_events()
+            return state
+
     def __init__(self, players: int):
         # world-local random state is saved for multiple generations running concurrently
         self.random = ThreadBarrierProxy(random.Random())
@@ -137,7 +379,7 @@ class MultiWorld():
         self.groups = {}
         self.regions = self.RegionManager(players)
         self.shops = []
-        self.itempool = []
+        self.itempool = self.ItemPool()
         self.seed = None
         self.seed_name: str = "Unavailable"
         self.precollected_items = {player: [] for player in self.player_ids}
@@ -168,6 +410,7 @@ class MultiWorld():
         self.per_slot_randoms = Utils.DeprecateDict("Using per_slot_randoms is now deprecated. Please use the "
                                                       "world's random object instead (usually self.random)")
         self.plando_options = PlandoOptions.none
+        self._all_state_cache = None
 
     def get_all_ids(self) -> Tuple[int, ...]:
         return self.player_ids + tuple(self.groups)
@@ -343,15 +586,10 @@ class MultiWorld():
         if use_cache and cached:
             return cached.copy()
 
-        ret = CollectionState(self)
-
-        for item in self.itempool:
-            self.worlds[item.player].collect(ret, item)
-        for player in self.player_ids:
-            subworld = self.worlds[player]
-            for item in subworld.get_pre_fill_items():
-                subworld.collect(ret, item)
-        ret.sweep_for_events()
+        all_state_cache = self._all_state_cache
+        if not all_state_cache or not all_state_cache.is_valid():
+            all_state_cache = self._all_state_cache = self.AllStateCache(self)
+        ret = all_state_cache.get()
 
         if use_cache:
             self._all_state = ret
@@ -360,31 +598,40 @@ class MultiWorld():
     def get_items(self) -> List[Item]:
         return [loc.item for loc in self.get_filled_locations()] + self.itempool
 
+    def _find_indexed_items(self, items: Iterable[str], players: Iterable[int]) -> List[Location]:
+        item_locations = self.regions.item_locations
+        found = [location for player in players for item in items
+                 for location in item_locations.get((player, item), ())]
+        return self.regions.sort_locations(found)
+
     def find_item_locations(self, item, player: int, resolve_group_locations: bool = False) -> List[Location]:
         if resolve_group_locations:
             player_groups = self.get_player_groups(player)
-            return [location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.player not in player_groups and
-                    (location.item.player == player or location.item.player in player_groups)]
-        return [location for location in self.get_locations() if
-                location.item and location.item.name == item and location.item.player == player]
+            return [location for location in self._find_indexed_items((item,), {player, *player_groups})
+                    if location.player not in player_groups]
+        return self._find_indexed_items((item,), (player,))
 
     def find_item(self, item, player: int) -> Location:
-        return next(location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.item.player == player)
+        return next(iter(self._find_indexed_items((item,), (player,))))
 
     def find_items_in_locations(self, items: Set[str], player: int, resolve_group_locations: bool = False) -> List[Location]:
         if resolve_group_locations:
             player_groups = self.get_player_groups(player)
-            return [location for location in self.get_locations() if
-                    location.item and location.item.name in items and location.player not in player_groups and
-                    (location.item.player == player or location.item.player in player_groups)]
-        return [location for location in self.get_locations() if
-                location.item and location.item.name in items and location.item.player == player]
+            return [location for location in self._find_indexed_items(set(items), {player, *player_groups})
+                    if location.player not in player_groups]
+        return self._find_indexed_items(set(items), (player,))
 
     def create_item(self, item_name: str, player: int) -> Item:
         return self.worlds[player].create_item(item_name)
 
+    def get_itempool(self) -> MultiWorld.ItemPool:
+        return self._itempool
+
+    def set_itempool(self, items: Iterable[Item]) -> None:
+        self._itempool = items if isinstance(items, MultiWorld.ItemPool) else self.ItemPool(items)
+
+    itempool = property(get_itempool, set_itempool)
+
     def push_precollected(self, item: Item):
         self.precollected_items[item.player].append(item)
         self.state.collect(item, True)
@@ -415,10 +662,14 @@ class MultiWorld():
                                            for player in self.regions.location_cache))
 
     def get_unfilled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is None]
+        if player is not None:
+            return self.regions.sort_locations(self.regions.unfilled_locations[player])
+        return self.regions.sort_locations(itertools.chain.from_iterable(self.regions.unfilled_locations.values()))
 
     def get_filled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is not None]
+        if player is not None:
+            return self.regions.sort_locations(self.regions.filled_locations[player])
+        return self.regions.sort_locations(itertools.chain.from_iterable(self.regions.filled_locations.values()))
 
     def get_reachable_locations(self, state: Optional[CollectionState] = None, player: Optional[int] = None) -> List[Location]:
         state: CollectionState = state if state else self.state
@@ -758,18 +1009,55 @@ class CollectionState():
             self.stale[item.player] = True
 
 
-class Entrance:
-    access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
-    hide_path: bool = False
+class SlotDefaults:
+    """Base for the classes that exist many times per world, which use __slots__ instead of a __dict__ per instance.
+    Defaults can't be class attributes for slots, so they are listed in slot_defaults and assigned on creation,
+    unless a subclass overrides them on class level, for example access_rule as a method.
+    Subclasses without __slots__ of their own get a __dict__ for additional attributes, declaring __slots__ = ()
+    in a subclass keeps its instances compact."""
+    __slots__ = ()
+    slot_defaults: ClassVar[Dict[str, Any]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.slot_defaults = {name: value for name, value in cls.slot_defaults.items()
+                             if isinstance(getattr(cls, name, None), MemberDescriptorType)}
+
+    def set_slot_defaults(self) -> None:
+        for name, value in self.slot_defaults.items():
+            setattr(self, name, value)
+
+
+def _always_true(*args: Any) -> bool:
+    return True
+
+
+def _always_false(*args: Any) -> bool:
+    return False
+
+
+class Entrance(SlotDefaults):
+    __slots__ = ("access_rule", "hide_path", "player", "name", "parent_region", "connected_region", "addresses",
+                 "target")
+    slot_defaults = {
+        "access_rule": _always_true,
+        "hide_path": False,
+        "connected_region": None,
+        # LttP specific, TODO: should make a LttPEntrance
+        "addresses": None,
+        "target": None,
+    }
+    access_rule: Callable[[CollectionState], bool]
+    hide_path: bool
     player: int
     name: str
     parent_region: Optional[Region]
-    connected_region: Optional[Region] = None
-    # LttP specific, TODO: should make a LttPEntrance
-    addresses = None
-    target = None
+    connected_region: Optional[Region]
+    addresses: Any
+    target: Any
 
     def __init__(self, player: int, name: str = '', parent: Region = None):
+        self.set_slot_defaults()
         self.name = name
         self.parent_region = parent
         self.player = player
@@ -796,7 +1084,8 @@ class Entrance:
         return multiworld.get_name_string_for_object(self) if multiworld else f'{self.name} (Player {self.player})'
 
 
-class Region:
+class Region(SlotDefaults):
+    __slots__ = ("name", "_hint_text", "player", "multiworld", "entrances", "_exits", "_locations")
     name: str
     _hint_text: str
     player: int
@@ -834,12 +1123,14 @@ class Region:
             location: Location = self._list.__getitem__(index)
             self._list.__delitem__(index)
             del(self.region_manager.location_cache[location.player][location.name])
+            self.region_manager.remove_location(location)
 
         def insert(self, index: int, value: Location) -> None:
             assert value.name not in self.region_manager.location_cache[value.player], \
                 f"{value.name} already exists in the location cache."
             self._list.insert(index, value)
             self.region_manager.location_cache[value.player][value.name] = value
+            self.region_manager.add_location(value)
 
     class EntranceRegister(Register):
         def __delitem__(self, index: int) -> None:
@@ -969,26 +1260,51 @@ class LocationProgressType(IntEnum):
     EXCLUDED = 3
 
 
-class Location:
+class Location(SlotDefaults):
+    __slots__ = ("player", "name", "address", "parent_region", "locked", "show_in_spoiler", "progress_type",
+                 "always_allow", "access_rule", "item_rule", "_item", "_region_manager")
+    slot_defaults = {
+        "locked": False,
+        "show_in_spoiler": True,
+        "progress_type": LocationProgressType.DEFAULT,
+        "always_allow": _always_false,
+        "access_rule": _always_true,
+        "item_rule": _always_true,
+        "_item": None,
+        "_region_manager": None,
+    }
     game: str = "Generic"
     player: int
     name: str
     address: Optional[int]
     parent_region: Optional[Region]
-    locked: bool = False
-    show_in_spoiler: bool = True
-    progress_type: LocationProgressType = LocationProgressType.DEFAULT
-    always_allow = staticmethod(lambda state, item: False)
-    access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
-    item_rule = staticmethod(lambda item: True)
-    item: Optional[Item] = None
+    locked: bool
+    show_in_spoiler: bool
+    progress_type: LocationProgressType
+    always_allow: Callable[[CollectionState, Item], bool]
+    access_rule: Callable[[CollectionState], bool]
+    item_rule: Callable[[Item], bool]
+    _item: Optional[Item]
+    _region_manager: Optional[MultiWorld.RegionManager]
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
+        self.set_slot_defaults()
         self.player = player
         self.name = name
         self.address = address
         self.parent_region = parent
 
+    def get_item(self) -> Optional[Item]:
+        return self._item
+
+    def set_item(self, item: Optional[Item]) -> None:
+        old_item = self._item
+        self._item = item
+        if self._region_manager is not None:
+            self._region_manager.update_item(self, old_item, item)
+
+    item = property(get_item, set_item)
+
     def can_fill(self, state: CollectionState, item: Item, check_access=True) -> bool:
         return ((self.always_allow(state, item) and item.name not in state.multiworld.non_local_items[item.player])
                 or ((self.progress_type != LocationProgressType.EXCLUDED or not (item.advancement or item.useful))
@@ -1056,8 +1372,8 @@ class ItemClassification(IntFlag):
 
 class Item:
     game: str = "Generic"
-    __slots__ = ("name", "classification", "code", "player", "location")
-    name: str
+    __slots__ = ("_name", "classification", "code", "player", "location")
+    _name: str
     classification: ItemClassification
     code: Optional[int]
     """an item with code None is called an Event, and does not get written to multidata"""
@@ -1065,12 +1381,24 @@ class Item:
     location: Optional[Location]
 
     def __init__(self, name: str, classification: ItemClassification, code: Optional[int], player: int):
-        self.name = name
+        self._name = name
         self.classification = classification
         self.player = player
         self.code = code
         self.location = None
 
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
+        location = getattr(self, "location", None)  # not set yet if renamed before Item.__init__
+        if location is not None and location.item is self and location._region_manager is not None:
+            # placed items are indexed by name, see MultiWorld.find_item_locations
+            location._region_manager.update_item(location, self, self)
+
     @property
     def hint_text(self) -> str:
         return getattr(self, "_hint_text", self.name.replace("_", " ").replace("-", " "))
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 import copy
 import logging
 import asyncio
@@ -8,6 +9,7 @@ import sys
 import typing
 import time
 import functools
+import itertools
 
 import ModuleUpdate
 ModuleUpdate.update()
@@ -21,7 +23,8 @@ if __name__ == "__main__":
 
 from MultiServer import CommandProcessor
 from NetUtils import (Endpoint, decode, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
-                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes)
+                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, hint_key,
+                      items_digest, locations_digest)
 from Utils import Version, stream_input, async_start
 from worlds import network_data_package, AutoWorldRegister
 import os
@@ -166,17 +169,96 @@ class ClientCommandProcessor(CommandProcessor):
             async_start(self.ctx.send_msgs([{"cmd": "Say", "text": raw}]), name="send Say")
 
 
+class _ReversedNames(typing.Mapping[int, str]):
+    """id to name view of a name to id dict, built on first use"""
+
+    def __init__(self, name_to_id: typing.Dict[str, int]) -> None:
+        self.name_to_id = name_to_id
+
+    @functools.cached_property
+    def id_to_name(self) -> typing.Dict[int, str]:
+        return {code: name for name, code in self.name_to_id.items()}
+
+    def __getitem__(self, code: int) -> str:
+        return self.id_to_name[code]
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self.id_to_name)
+
+    def __len__(self) -> int:
+        return len(self.name_to_id)
+
+
+class DataPackageNames(typing.Mapping[int, str]):
+    """
+    Looks up names by id in the data packages of all games, without copying them into one dict.
+    Each game's names come from the latest package given for it. Unknown ids get a placeholder name.
+    The game of an id is remembered once found, so repeated lookups don't search all games.
+    """
+    placeholder: typing.Callable[[int], str]
+    _games: typing.Dict[str, typing.Mapping[int, str]]
+    _code_games: typing.Dict[int, str]
+
+    def __init__(self, placeholder: typing.Callable[[int], str]) -> None:
+        self.placeholder = placeholder
+        self._games = {}
+        self._code_games = {}
+
+    def set_game(self, game: str, names: typing.Mapping[int, str]) -> None:
+        self._games.pop(game, None)
+        self._games[game] = names
+        self._code_games.clear()  # ids may have moved between games
+
+    def get(self, code: int, default: typing.Optional[str] = None) -> typing.Optional[str]:
+        game = self._code_games.get(code)
+        if game is not None:
+            return self._games[game][code]
+        for game, names in reversed(self._games.items()):
+            name = names.get(code)
+            if name is not None:
+                self._code_games[code] = game
+                return name
+        return default
+
+    def __getitem__(self, code: int) -> str:
+        name = self.get(code)
+        return self.placeholder(code) if name is None else name
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, int) and self.get(code) is not None
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter({code: None for names in self._games.values() for code in names})
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class ResumeState(typing.NamedTuple):
+    """What a client knew about its slot when it lost the connection, so reconnecting only needs what changed since."""
+    seed_name: str
+    name: str
+    items_handling: typing.Optional[int]
+    items_received: typing.List[NetworkItem]
+    checked_locations: typing.Set[int]
+    server_locations: typing.Set[int]
+
+
 class CommonContext:
     # Should be adjusted as needed in subclasses
     tags: typing.Set[str] = {"AP"}
     game: typing.Optional[str] = None
     items_handling: typing.Optional[int] = None
     want_slot_data: bool = True  # should slot_data be retrieved via Connect
+    # should hint changes arrive as deltas without "value" in SetReply, only for clients handling "delta" themselves
+    want_hint_deltas: bool = False
 
     # data package
     # Contents in flux until connection to server is made, to download correct data for this multiworld.
-    item_names: typing.Dict[int, str] = Utils.KeyedDefaultDict(lambda code: f'Unknown item (ID:{code})')
-    location_names: typing.Dict[int, str] = Utils.KeyedDefaultDict(lambda code: f'Unknown location (ID:{code})')
+    item_names: DataPackageNames = DataPackageNames(lambda code: f'Unknown item (ID:{code})')
+    location_names: DataPackageNames = DataPackageNames(lambda code: f'Unknown location (ID:{code})')
+    # memory mapped tables the names above come from, by game
+    data_package_tables: typing.Dict[str, Utils.DataPackageTable] = {}
 
     # defaults
     starting_reconnect_delay: int = 5
@@ -218,6 +300,7 @@ class CommonContext:
     checked_locations: typing.Set[int]  # server state
     server_locations: typing.Set[int]  # all locations the server knows of, missing_location | checked_locations
     locations_info: typing.Dict[int, NetworkItem]
+    resume_state: typing.Optional[ResumeState]
 
     # data storage
     stored_data: typing.Dict[str, typing.Any]
@@ -257,6 +340,7 @@ class CommonContext:
         self.checked_locations = set()  # server state
         self.server_locations = set()  # all locations the server knows of, missing_location | checked_locations
         self.locations_info = {}
+        self.resume_state = None
 
         self.stored_data = {}
         self.stored_data_notification_keys = set()
@@ -298,6 +382,9 @@ class CommonContext:
         self.reset_server_state()
 
     def reset_server_state(self):
+        if self.slot is not None and self.seed_name and self.auth:
+            self.resume_state = ResumeState(self.seed_name, self.auth, self.items_handling, self.items_received,
+                                            self.checked_locations, self.server_locations)
         self.auth = None
         self.slot = None
         self.team = None
@@ -361,6 +448,13 @@ class CommonContext:
             'tags': self.tags, 'items_handling': self.items_handling,
             'uuid': Utils.get_unique_identifier(), 'game': self.game, "slot_data": self.want_slot_data,
         }
+        resume = self.resume_state
+        if resume and (resume.seed_name, resume.name, resume.items_handling) == \
+                (self.seed_name, self.auth, self.items_handling):
+            # reconnecting to the same slot, the server only sends the items and checked locations that are new
+            payload["items_index"] = len(resume.items_received)
+            payload["items_digest"] = items_digest(resume.items_received)
+            payload["locations_digest"] = locations_digest(resume.checked_locations)
         if kwargs:
             payload.update(kwargs)
         await self.send_msgs([payload])
@@ -476,36 +570,38 @@ class CommonContext:
             # no action required if local version is new enough
             if (not remote_checksum and (remote_version > local_version or remote_version == 0)) \
                     or remote_checksum != local_checksum:
+                # the store only knows data packages by checksum, download anything else
                 cached_game = Utils.load_data_package_for_checksum(game, remote_checksum)
-                cache_version: int = cached_game.get("version", 0)
-                cache_checksum: typing.Optional[str] = cached_game.get("checksum")
-                # download remote version if cache is not new enough
-                if (not remote_checksum and (remote_version > cache_version or remote_version == 0)) \
-                        or remote_checksum != cache_checksum:
+                if cached_game is None:
                     needed_updates.add(game)
                 else:
-                    self.update_game(cached_game)
+                    self.update_game(cached_game, game)
         if needed_updates:
             await self.send_msgs([{"cmd": "GetDataPackage", "games": [game_name]} for game_name in needed_updates])
 
-    def update_game(self, game_package: dict):
-        for item_name, item_id in game_package["item_name_to_id"].items():
-            self.item_names[item_id] = item_name
-        for location_name, location_id in game_package["location_name_to_id"].items():
-            self.location_names[location_id] = location_name
+    def update_game(self, game_package: typing.Union[dict, Utils.DataPackageTable], game: str):
+        old_table = self.data_package_tables.pop(game, None)
+        if isinstance(game_package, Utils.DataPackageTable):
+            self.item_names.set_game(game, game_package.item_names)
+            self.location_names.set_game(game, game_package.location_names)
+            self.data_package_tables[game] = game_package
+        else:
+            self.item_names.set_game(game, _ReversedNames(game_package["item_name_to_id"]))
+            self.location_names.set_game(game, _ReversedNames(game_package["location_name_to_id"]))
+        if old_table is not None and old_table is not game_package:
+            old_table.close()  # nothing looks names up in the replaced table anymore
 
     def update_data_package(self, data_package: dict):
         for game, game_data in data_package["games"].items():
-            self.update_game(game_data)
+            self.update_game(game_data, game)
 
     def consume_network_data_package(self, data_package: dict):
-        self.update_data_package(data_package)
-        current_cache = Utils.persistent_load().get("datapackage", {}).get("games", {})
-        current_cache.update(data_package["games"])
-        Utils.persistent_store("datapackage", "games", current_cache)
+        # replaced by the binary data package store
+        Utils.persistent_remove("datapackage")
         logger.info(f"Got new ID/Name DataPackage for {', '.join(data_package['games'])}")
         for game, game_data in data_package["games"].items():
             Utils.store_data_package_for_checksum(game, game_data)
+            self.update_game(Utils.load_data_package_for_checksum(game, game_data.get("checksum")) or game_data, game)
 
     # data storage
 
@@ -520,7 +616,16 @@ class CommonContext:
             async_start(self.send_msgs([{"cmd": "Get",
                                          "keys": list(new_keys)},
                                         {"cmd": "SetNotify",
-                                         "keys": list(new_keys)}]))
+                                         "keys": list(new_keys),
+                                         "deltas": self.want_hint_deltas}]))
+
+    def apply_hints_delta(self, key: str, delta: typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]) -> None:
+        """Apply the added and changed hints of a hint data storage key, sent instead of all hints after SetNotify with
+        deltas."""
+        hints = {hint_key(hint): hint for hint in self.stored_data.get(key) or ()}
+        for hint in itertools.chain(delta["added"], delta["changed"]):
+            hints[hint_key(hint)] = hint
+        self.stored_data[key] = list(hints.values())
 
     # DeathLink hooks
 
@@ -605,6 +710,78 @@ class CommonContext:
                 self.input_task = asyncio.create_task(console_loop(self), name="Input")
 
 
+class WatcherScheduler:
+    """
+    Paces the ticks of a game watcher loop.
+    Ticks run every `active_interval` seconds while a game is connected and being watched. While no game is connected,
+    meaning the loop waits again without running a tick, or the handler reports the game as paused, the wait doubles
+    with every iteration, up to `idle_interval`. Setting `ctx.watcher_event`, as the server does when it sends items,
+    wakes the loop early.
+    """
+    active_interval: float
+    idle_interval: float
+    interval: float
+    """Seconds until the next tick"""
+    ticks: int
+    tick_time: float
+    """Moving average of the seconds a tick takes"""
+    max_tick_time: float
+    _ticked: bool
+    _paused: bool
+
+    def __init__(self, active_interval: float, idle_interval: float) -> None:
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.interval = active_interval
+        self.ticks = 0
+        self.tick_time = 0
+        self.max_tick_time = 0
+        self._ticked = True
+        self._paused = False
+
+    def mark_paused(self) -> None:
+        """Backs off after the current tick. For handlers that see the game is paused or not in gameplay."""
+        self._paused = True
+
+    def _back_off(self) -> None:
+        self.interval = min(self.interval * 2, max(self.idle_interval, self.active_interval))
+
+    async def wait(self, ctx: CommonContext) -> None:
+        """Waits until the next tick is due or `ctx.watcher_event` is set."""
+        if not self._ticked:
+            # no game was connected to watch during the last iteration
+            self._back_off()
+        self._ticked = False
+        try:
+            await asyncio.wait_for(ctx.watcher_event.wait(), self.interval)
+        except asyncio.TimeoutError:
+            pass
+        ctx.watcher_event.clear()
+
+    @contextlib.contextmanager
+    def tick(self) -> typing.Iterator[None]:
+        """Measures the tick run inside and decides the interval to the next one."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            tick_time = time.perf_counter() - start
+            self.tick_time = tick_time if not self.ticks else self.tick_time * 0.9 + tick_time * 0.1
+            self.max_tick_time = max(self.max_tick_time, tick_time)
+            self.ticks += 1
+            self._ticked = True
+
+            if self._paused:
+                self._back_off()
+            else:
+                self.interval = self.active_interval
+            self._paused = False
+
+    def report(self) -> str:
+        return f"Game watcher: {self.ticks} ticks, {self.tick_time * 1000:.1f} ms average, " \
+               f"{self.max_tick_time * 1000:.1f} ms at most, next tick in {self.interval * 1000:.0f} ms"
+
+
 async def keep_alive(ctx: CommonContext, seconds_between_checks=100):
     """some ISPs/network configurations drop TCP connections if no payload is sent (ignore TCP-keep-alive)
      so we send a payload to prevent drop and if we were dropped anyway this will cause an auto-reconnect."""
@@ -789,6 +966,15 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
         ctx.hint_points = args.get("hint_points", 0)
         ctx.consume_players_package(args["players"])
         ctx.stored_data_notification_keys.add(f"_read_hints_{ctx.team}_{ctx.slot}")
+        resume, ctx.resume_state = ctx.resume_state, None
+        if resume:
+            # a resumed connection leaves out what did not change, fill it in for on_package of game clients
+            if "items_index" in args:
+                ctx.items_received = resume.items_received[:args["items_index"]]
+            if "checked_locations" not in args:
+                args["checked_locations"] = list(resume.checked_locations)
+            if "missing_locations" not in args:
+                args["missing_locations"] = list(resume.server_locations.difference(args["checked_locations"]))
         msgs = []
         if ctx.locations_checked:
             msgs.append({"cmd": "LocationChecks",
@@ -800,7 +986,8 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
             msgs.append({"cmd": "Get",
                          "keys": list(ctx.stored_data_notification_keys)})
             msgs.append({"cmd": "SetNotify",
-                         "keys": list(ctx.stored_data_notification_keys)})
+                         "keys": list(ctx.stored_data_notification_keys),
+                         "deltas": ctx.want_hint_deltas})
         if msgs:
             await ctx.send_msgs(msgs)
         if ctx.finished_game:
@@ -871,9 +1058,12 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
             ctx.ui.update_hints()
 
     elif cmd == "SetReply":
-        ctx.stored_data[args["key"]] = args["value"]
+        if "delta" in args:
+            ctx.apply_hints_delta(args["key"], args["delta"])
+        else:
+            ctx.stored_data[args["key"]] = args["value"]
         if ctx.ui and f"_read_hints_{ctx.team}_{ctx.slot}" == args["key"]:
-            ctx.ui.update_hints()
+            ctx.ui.update_hints(args.get("delta"))
         elif args["key"].startswith("EnergyLink"):
             ctx.current_energy_link_value = args["value"]
             if ctx.ui:
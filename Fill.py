@@ -964,12 +964,15 @@ def distribute_planned(multiworld: MultiWorld) -> None:
                 multiworld.push_item(location, item, collect=False)
                 location.locked = True
                 logging.debug(f"Plando placed {item} at {location}")
-                if from_pool:
-                    try:
-                        multiworld.itempool.remove(item)
-                    except ValueError:
+            if from_pool:
+                # remove all placed items in one pass over the pool
+                placed_items = {(item.player, item.name): item for item, _ in successful_pairs}
+                missing = multiworld.itempool.remove_counts(
+                    Counter((item.player, item.name) for item, _ in successful_pairs))
+                for key, missing_count in missing.items():
+                    for _ in range(missing_count):
                         warn(
-                            f"Could not remove {item} from pool for {multiworld.player_name[player]} as it's already missing from it.",
+                            f"Could not remove {placed_items[key]} from pool for {multiworld.player_name[player]} as it's already missing from it.",
                             placement['force'])
 
         except Exception as e:
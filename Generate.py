@@ -8,7 +8,8 @@ import string
 import urllib.parse
 import urllib.request
 from collections import Counter
-from typing import Any, Dict, Tuple, Union
+import typing
+from typing import Any, Dict, List, Tuple, Union
 
 import ModuleUpdate
 
@@ -56,13 +57,30 @@ def mystery_argparse():
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
+    parser.add_argument("--output_processes", default=defaults.output_processes,
+                        type=lambda value: max(int(value), 0),
+                        help="Amount of processes to generate output files on, for worlds that support it.")
+    parser.add_argument("--zip_level", default=defaults.zip_level, type=lambda value: min(max(int(value), 0), 9),
+                        help="Compression level of the output archive, from 0 to 9.")
+    parser.add_argument("--batch", help="Generate a seed for each folder of player files in this folder, "
+                                        "or for the player files in it, importing the worlds only once.")
+    parser.add_argument("--batch_count", default=1, type=lambda value: max(int(value), 1),
+                        help="Amount of seeds to generate per folder of player files in batch mode.")
+    parser.add_argument("--batch_workers", default=os.cpu_count() or 1, type=lambda value: max(int(value), 1),
+                        help="Amount of seeds to generate at the same time in batch mode.")
     args = parser.parse_args()
+    if not args.batch:  # batch mode resolves these per folder
+        resolve_weights_paths(args)
+    args.plando: PlandoOptions = PlandoOptions.from_option_string(args.plando)
+    return args, options
+
+
+def resolve_weights_paths(args: argparse.Namespace) -> None:
+    """Make the weights and meta file paths relative to the player files path."""
     if not os.path.isabs(args.weights_file_path):
         args.weights_file_path = os.path.join(args.player_files_path, args.weights_file_path)
     if not os.path.isabs(args.meta_file_path):
         args.meta_file_path = os.path.join(args.player_files_path, args.meta_file_path)
-    args.plando: PlandoOptions = PlandoOptions.from_option_string(args.plando)
-    return args, options
 
 
 def get_seed_name(random_source) -> str:
@@ -153,6 +171,8 @@ def main(args=None, callback=ERmain):
     erargs.outputpath = args.outputpath
     erargs.skip_prog_balancing = args.skip_prog_balancing
     erargs.skip_output = args.skip_output
+    erargs.output_processes = args.output_processes
+    erargs.zip_level = args.zip_level
 
     settings_cache: Dict[str, Tuple[argparse.Namespace, ...]] = \
         {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
@@ -238,7 +258,118 @@ def main(args=None, callback=ERmain):
     return callback(erargs, seed)
 
 
+class BatchJob(typing.NamedTuple):
+    name: str
+    args: argparse.Namespace
+
+
+def get_batch_jobs(args: argparse.Namespace) -> List[BatchJob]:
+    """One job per seed, for each folder of player files in args.batch, or for args.batch itself if it has none."""
+    folders = sorted(entry.path for entry in os.scandir(args.batch)
+                     if entry.is_dir() and not entry.name.startswith("."))
+    if not folders:
+        folders = [args.batch]
+    seed_source = random.Random(args.seed)
+    jobs: List[BatchJob] = []
+    for folder in folders:
+        for index in range(args.batch_count):
+            job_args = copy.copy(args)
+            job_args.batch = None
+            job_args.player_files_path = folder
+            job_args.seed = get_seed(None) if args.seed is None else seed_source.randint(0, pow(10, seeddigits) - 1)
+            resolve_weights_paths(job_args)
+            name = os.path.relpath(folder, args.batch)
+            jobs.append(BatchJob(name if args.batch_count == 1 else f"{name}#{index + 1}", job_args))
+    return jobs
+
+
+def preload_batch(jobs: List[BatchJob]) -> None:
+    """Parse all player files and import the worlds of their games once, so the seed workers inherit them."""
+    import worlds
+    for job in jobs:
+        for entry in os.scandir(job.args.player_files_path):
+            if entry.is_file() and not entry.name.startswith(".") and entry.path not in _weights_yamls_cache:
+                try:
+                    _weights_yamls_cache[entry.path] = read_weights_yamls(entry.path)
+                except Exception as e:
+                    logging.warning(f"Could not preload {entry.path}, it will be read per seed: {e}")
+    for yamls in _weights_yamls_cache.values():
+        for yaml in yamls:
+            games = yaml.get("game", ()) if isinstance(yaml, dict) else ()
+            for game in [games] if isinstance(games, str) else games:
+                if game in AutoWorldRegister.world_types:
+                    worlds.network_data_package["games"].get(game)
+
+
+def generate_batch_seed(job: BatchJob) -> Dict[str, Any]:
+    import time
+    import traceback
+
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"name": job.name, "seed": job.args.seed}
+    try:
+        multiworld = main(job.args)
+        result["seed_name"] = multiworld.seed_name
+    except Exception as e:
+        result["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+        result["traceback"] = traceback.format_exc()
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def batch_main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Generate many seeds, each in a worker process forked from this one after it imported the required worlds.
+    Where processes can't be forked, the workers have to import the worlds themselves.
+    Writes a summary of timings and failures to the output path and returns it."""
+    import json
+    import multiprocessing
+    import time
+
+    Utils.init_logging("GenerateBatch", loglevel=args.log_level)
+    jobs = get_batch_jobs(args)
+    start = time.perf_counter()
+    preload_batch(jobs)
+    logging.info(f"Preloaded player files and worlds in {time.perf_counter() - start:.2f} seconds, "
+                 f"generating {len(jobs)} seeds with {args.batch_workers} workers.")
+
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    results: List[Dict[str, Any]] = []
+    # a new worker per seed, so no state of one generation leaks into the next
+    with context.Pool(min(args.batch_workers, len(jobs)), maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(generate_batch_seed, jobs):
+            results.append(result)
+            if "error" in result:
+                logging.error(f"{result['name']} with seed {result['seed']} failed: {result['error']}")
+            else:
+                logging.info(f"{result['name']} generated {result['seed_name']} in {result['time']:.2f} seconds.")
+
+    order = {job.name: index for index, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[result["name"]])
+    failed = sum("error" in result for result in results)
+    summary = {
+        "version": __version__,
+        "time": time.perf_counter() - start,
+        "generated": len(results) - failed,
+        "failed": failed,
+        "seeds": results,
+    }
+    os.makedirs(args.outputpath, exist_ok=True)
+    summary_path = os.path.join(args.outputpath, f"Batch_{time.strftime('%Y_%m_%d_%H_%M_%S')}.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=1)
+    logging.info(f"Generated {len(results) - failed} of {len(results)} seeds in {summary['time']:.2f} seconds, "
+                 f"summary written to {summary_path}.")
+    return results
+
+
+# path -> parsed player file, filled in batch mode so each seed does not have to parse them again
+_weights_yamls_cache: Dict[str, Tuple[Any, ...]] = {}
+
+
 def read_weights_yamls(path) -> Tuple[Any, ...]:
+    if path in _weights_yamls_cache:
+        # rolling modifies the weights, e.g. through meta files
+        return copy.deepcopy(_weights_yamls_cache[path])
     try:
         if urllib.parse.urlparse(path).scheme in ('https', 'file'):
             yaml = str(urllib.request.urlopen(path).read(), "utf-8-sig")
@@ -537,8 +668,12 @@ def roll_alttp_settings(ret: argparse.Namespace, weights, plando_options):
 if __name__ == '__main__':
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
-    multiworld = main()
-    if __debug__:
+    args, _ = mystery_argparse()
+    if args.batch:
+        batch_main(args)
+    else:
+        multiworld = main(args)
+    if __debug__ and not args.batch:
         import gc
         import sys
         import weakref
@@ -23,8 +23,11 @@ from typing import Sequence, Union, Optional
 
 import Utils
 import settings
+from worlds import load_all_worlds
 from worlds.LauncherComponents import Component, components, Type, SuffixIdentifier, icon_paths
 
+load_all_worlds()  # worlds add their components when imported
+
 if __name__ == "__main__":
     import ModuleUpdate
     ModuleUpdate.update()
@@ -13,9 +13,7 @@ import colorama
 import io
 import os
 import re
-import select
 import shlex
-import socket
 import struct
 import sys
 import subprocess
@@ -32,6 +30,7 @@ from worlds.ladx.ItemTracker import ItemTracker
 from worlds.ladx.LADXR.checkMetadata import checkMetadataTable
 from worlds.ladx.Locations import get_locations_to_id, meta_to_name
 from worlds.ladx.Tracker import LocationTracker, MagpieBridge
+from worlds._retroarch import RetroArchBridge, RetroArchError
 
 
 class GameboyException(Exception):
@@ -110,18 +109,20 @@ class RAGameboy():
     cache_start = 0
     cache_size = 0
     last_cache_read = None
-    socket = None
 
     def __init__(self, address, port) -> None:
         self.address = address
         self.port = port
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        assert (self.socket)
-        self.socket.setblocking(False)
+        self.bridge = RetroArchBridge(address, port)
+
+    async def connect(self):
+        await self.bridge.connect()
+
+    def close(self):
+        self.bridge.close()
 
-    async def send_command(self, command, timeout=1.0):
-        self.send(f'{command}\n')
-        response_str = await self.async_recv()
+    async def send_command(self, command):
+        response_str = await self.bridge.send_command(command)
         self.check_command_response(command, response_str)
         return response_str.rstrip()
 
@@ -136,18 +137,9 @@ class RAGameboy():
         self.cache_size = cache_size
 
     def send(self, b):
-        if type(b) is str:
-            b = b.encode('ascii')
-        self.socket.sendto(b, (self.address, self.port))
-
-    def recv(self):
-        select.select([self.socket], [], [])
-        response, _ = self.socket.recvfrom(4096)
-        return response
-
-    async def async_recv(self, timeout=1.0):
-        response = await asyncio.wait_for(asyncio.get_event_loop().sock_recv(self.socket, 4096), timeout)
-        return response
+        if type(b) is bytes:
+            b = b.decode('ascii')
+        self.bridge.send_message(b.rstrip("\n"))
 
     async def check_safe_gameplay(self, throw=True):
         async def check_wram():
@@ -178,9 +170,8 @@ class RAGameboy():
             return False
         return True
 
-    # We're sadly unable to update the whole cache at once
-    # as RetroArch only gives back some number of bytes at a time
-    # So instead read as big as chunks at a time as we can manage
+    # RetroArch only gives back some number of bytes at a time, the bridge sends the
+    # reads for all of them at once instead of waiting for each
     async def update_cache(self):
         # First read the safety address - if it's invalid, bail
         self.cache = []
@@ -188,12 +179,7 @@ class RAGameboy():
         if not await self.check_safe_gameplay():
             return
 
-        cache = []
-        remaining_size = self.cache_size
-        while remaining_size:
-            block = await self.async_read_memory(self.cache_start + len(cache), remaining_size)
-            remaining_size -= len(block)
-            cache += block
+        cache = (await self.bridge.read([(self.cache_start, self.cache_size)]))[0]
 
         if not await self.check_safe_gameplay():
             return
@@ -202,7 +188,7 @@ class RAGameboy():
         self.last_cache_read = time.time()
 
     async def read_memory_cache(self, addresses):
-        # TODO: can we just update once per frame?
+        # main_tick updates the cache once per tick, this only refreshes it for reads outside of a tick
         if not self.last_cache_read or self.last_cache_read + 0.1 < time.time():
             await self.update_cache()
         if not self.cache:
@@ -242,57 +228,12 @@ class RAGameboy():
             logger.warning(f"Bad response to command {command} - {response}")
             raise BadRetroArchResponse()
 
-    def read_memory(self, address, size=1):
-        command = "READ_CORE_MEMORY"
-
-        self.send(f'{command} {hex(address)} {size}\n')
-        response = self.recv()
-
-        self.check_command_response(command, response)
-
-        splits = response.decode().split(" ", 2)
-        # Ignore the address for now
-        if splits[2][:2] == "-1":
-            raise BadRetroArchResponse()
-
-        # TODO: check response address, check hex behavior between RA and BH
-
-        return bytearray.fromhex(splits[2])
-
     async def async_read_memory(self, address, size=1):
-        command = "READ_CORE_MEMORY"
-
-        self.send(f'{command} {hex(address)} {size}\n')
-        response = await self.async_recv()
-        self.check_command_response(command, response)
-        response = response[:-1]
-        splits = response.decode().split(" ", 2)
-        try:
-            response_addr = int(splits[1], 16)
-        except ValueError:
-            raise BadRetroArchResponse()
-
-        if response_addr != address:
-            raise BadRetroArchResponse()
-
-        ret = bytearray.fromhex(splits[2])
-        if len(ret) > size:
-            raise BadRetroArchResponse()
-        return ret
-
-    def write_memory(self, address, bytes):
-        command = "WRITE_CORE_MEMORY"
-
-        self.send(f'{command} {hex(address)} {" ".join(hex(b) for b in bytes)}')
-        select.select([self.socket], [], [])
-        response, _ = self.socket.recvfrom(4096)
-        self.check_command_response(command, response)
-        splits = response.decode().split(" ", 3)
-
-        assert (splits[0] == command)
+        return (await self.bridge.read([(address, size)]))[0]
 
-        if splits[2] == "-1":
-            logger.info(splits[3])
+    async def write_memory(self, *writes):
+        """Writes (address, bytes) pairs in one batch"""
+        await self.bridge.write(writes)
 
 
 class LinksAwakeningClient():
@@ -323,10 +264,13 @@ class LinksAwakeningClient():
         if not self.stop_bizhawk_spam:
             logger.info("Waiting on connection to Retroarch...")
             self.stop_bizhawk_spam = True
+        if self.gameboy:
+            self.gameboy.close()
         self.gameboy = RAGameboy(self.retroarch_address, self.retroarch_port)
 
         while True:
             try:
+                await self.gameboy.connect()
                 version = await self.gameboy.get_retroarch_version()
                 NO_CONTENT = b"GET_STATUS CONTENTLESS"
                 status = NO_CONTENT
@@ -351,7 +295,7 @@ class LinksAwakeningClient():
                 logger.info(f"Connected to Retroarch {version.decode('ascii', errors='replace')} "
                             f"running {rom_name.decode('ascii', errors='replace')}")
                 return
-            except (BlockingIOError, TimeoutError, ConnectionResetError):
+            except (BlockingIOError, TimeoutError, ConnectionResetError, RetroArchError):
                 await asyncio.sleep(1.0)
                 pass
 
@@ -386,11 +330,10 @@ class LinksAwakeningClient():
             from_player = 100
 
         next_index += 1
-        self.gameboy.write_memory(LAClientConstants.wLinkGiveItem, [
-                                  item_id, from_player])
         status |= 1
-        status = self.gameboy.write_memory(LAClientConstants.wLinkStatusBits, [status])
-        self.gameboy.write_memory(LAClientConstants.wRecvIndex, struct.pack(">H", next_index))
+        await self.gameboy.write_memory((LAClientConstants.wLinkGiveItem, [item_id, from_player]),
+                                        (LAClientConstants.wLinkStatusBits, [status]),
+                                        (LAClientConstants.wRecvIndex, struct.pack(">H", next_index)))
 
     should_reset_auth = False
     async def wait_for_game_ready(self):
@@ -405,6 +348,7 @@ class LinksAwakeningClient():
         return (await self.gameboy.read_memory_cache([LAClientConstants.wGameplayType]))[LAClientConstants.wGameplayType] == 1
 
     async def main_tick(self, item_get_cb, win_cb, deathlink_cb):
+        await self.gameboy.update_cache()
         await self.tracker.readChecks(item_get_cb)
         await self.item_tracker.readItems()
         await self.gps_tracker.read_location()
@@ -419,7 +363,7 @@ class LinksAwakeningClient():
 
         if self.pending_deathlink:
             logger.info("Got a deathlink")
-            self.gameboy.write_memory(LAClientConstants.wLinkHealth, [0])
+            await self.gameboy.write_memory((LAClientConstants.wLinkHealth, [0]))
             self.pending_deathlink = False
             self.deathlink_debounce = True
 
@@ -634,7 +578,7 @@ class LinksAwakeningContext(CommonContext):
                     if self.client.should_reset_auth:
                         self.client.should_reset_auth = False
                         raise GameboyException("Resetting due to wrong archipelago server")
-            except (GameboyException, asyncio.TimeoutError, TimeoutError, ConnectionResetError):
+            except (GameboyException, RetroArchError, asyncio.TimeoutError, TimeoutError, ConnectionResetError):
                 await asyncio.sleep(1.0)
 
 def run_game(romfile: str) -> None:
@@ -1,13 +1,15 @@
 import collections
 import concurrent.futures
+import contextlib
 import logging
+import multiprocessing
 import os
 import pickle
 import tempfile
 import time
 import zipfile
 import zlib
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, Region
@@ -21,6 +23,71 @@ from worlds.generic.Rules import exclusion_rules, locality_rules
 __all__ = ["main"]
 
 
+class OutputArchive:
+    """The final zip of a generation. Each output task writes into its own folder of the temporary directory, which
+    gets added to the archive on a separate thread as soon as that task finished."""
+    path: str
+    temp_dir: str
+    compresslevel: int
+
+    def __init__(self, path: str, temp_dir: str, compresslevel: int = 9) -> None:
+        self.path = path
+        self.temp_dir = temp_dir
+        self.compresslevel = compresslevel
+        self._folder_count = 0
+        self._zipfile: Optional[zipfile.ZipFile] = None
+        self._writer: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._writes: List[concurrent.futures.Future] = []
+
+    def new_folder(self) -> str:
+        folder = os.path.join(self.temp_dir, str(self._folder_count))
+        self._folder_count += 1
+        os.mkdir(folder)
+        return folder
+
+    def add_folder(self, folder: str) -> None:
+        assert self._writer, "OutputArchive has to be opened with a with statement first."
+        self._writes.append(self._writer.submit(self._write_folder, folder))
+
+    def _write_folder(self, folder: str) -> None:
+        for file in sorted(os.scandir(folder), key=lambda entry: entry.name):
+            self._zipfile.write(file.path, arcname=file.name)
+
+    def __enter__(self) -> "OutputArchive":
+        self._zipfile = zipfile.ZipFile(self.path, mode="w", compression=zipfile.ZIP_DEFLATED,
+                                        compresslevel=self.compresslevel)
+        # a single thread, as members can't be written to a zip concurrently
+        self._writer = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="OutputArchive")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._writer.shutdown()
+        self._zipfile.close()
+        if exc_type or any(write.exception() for write in self._writes):
+            os.remove(self.path)  # don't leave an incomplete archive behind
+        for write in self._writes:
+            write.result()
+
+
+# the multiworld in processes forked for World.process_output
+_output_multiworld: Optional[MultiWorld] = None
+
+
+def _set_output_multiworld(multiworld: MultiWorld) -> None:
+    global _output_multiworld
+    _output_multiworld = multiworld
+
+
+def _generate_output_in_process(player: int, output_directory: str) -> Any:
+    AutoWorld.call_single(_output_multiworld, "generate_output", player, output_directory)
+    return _output_multiworld.worlds[player].get_output_state()
+
+
+def _can_fork_output_processes() -> bool:
+    # processes of a multiprocessing.Pool, like in batch generation or on the WebHost, can't start processes
+    return "fork" in multiprocessing.get_all_start_methods() and not multiprocessing.current_process().daemon
+
+
 def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None):
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
@@ -49,23 +116,25 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # only look at the worlds in use, so the others don't have to be imported
+    world_types = {game: AutoWorld.AutoWorldRegister.world_types[game] for game in sorted(set(multiworld.game.values()))}
+    logger.info(f"Using {len(world_types)} World Types:")
+    longest_name = max(len(text) for text in world_types)
 
     max_item = 0
     max_location = 0
-    for cls in AutoWorld.AutoWorldRegister.world_types.values():
+    for cls in world_types.values():
         if cls.item_id_to_name:
             max_item = max(max_item, max(cls.item_id_to_name))
             max_location = max(max_location, max(cls.location_id_to_name))
 
     item_digits = len(str(max_item))
     location_digits = len(str(max_location))
-    item_count = len(str(max(len(cls.item_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
-    location_count = len(str(max(len(cls.location_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
+    item_count = len(str(max(len(cls.item_names) for cls in world_types.values())))
+    location_count = len(str(max(len(cls.location_names) for cls in world_types.values())))
     del max_item, max_location
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: {len(cls.item_names):{item_count}} "
                         f"Items (IDs: {min(cls.item_id_to_name):{item_digits}} - "
@@ -157,39 +226,25 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
             for count in items.values():
                 for _ in range(count):
                     new_items.append(player_world.create_filler())
-        target: int = sum(sum(items.values()) for items in depletion_pool.values())
-        for i, item in enumerate(multiworld.itempool):
-            if depletion_pool[item.player].get(item.name, 0):
-                target -= 1
-                depletion_pool[item.player][item.name] -= 1
-                # quick abort if we have found all items
-                if not target:
-                    new_items.extend(multiworld.itempool[i+1:])
-                    break
-            else:
-                new_items.append(item)
-
         # leftovers?
-        if target:
-            for player, remaining_items in depletion_pool.items():
-                remaining_items = {name: count for name, count in remaining_items.items() if count}
-                if remaining_items:
-                    raise Exception(f"{multiworld.get_player_name(player)}"
-                                    f" is trying to remove items from their pool that don't exist: {remaining_items}")
-        assert len(multiworld.itempool) == len(new_items), "Item Pool amounts should not change."
-        multiworld.itempool[:] = new_items
+        for player, items in depletion_pool.items():
+            remaining_items = {name: count - multiworld.itempool.count_name(name, player)
+                               for name, count in items.items()
+                               if count > multiworld.itempool.count_name(name, player)}
+            if remaining_items:
+                raise Exception(f"{multiworld.get_player_name(player)}"
+                                f" is trying to remove items from their pool that don't exist: {remaining_items}")
+        item_count = len(multiworld.itempool)
+        multiworld.itempool.remove_counts({(player, name): count for player, items in depletion_pool.items()
+                                           for name, count in items.items()})
+        multiworld.itempool[:0] = new_items
+        assert len(multiworld.itempool) == item_count, "Item Pool amounts should not change."
 
     # temporary home for item links, should be moved out of Main
     for group_id, group in multiworld.groups.items():
-        def find_common_pool(players: Set[int], shared_pool: Set[str]) -> Tuple[
-            Optional[Dict[int, Dict[str, int]]], Optional[Dict[str, int]]
-        ]:
-            classifications: Dict[str, int] = collections.defaultdict(int)
-            counters = {player: {name: 0 for name in shared_pool} for player in players}
-            for item in multiworld.itempool:
-                if item.player in counters and item.name in shared_pool:
-                    counters[item.player][item.name] += 1
-                    classifications[item.name] |= item.classification
+        def find_common_pool(players: Set[int], shared_pool: Set[str]) -> Optional[Dict[int, Dict[str, int]]]:
+            counters = {player: {name: multiworld.itempool.count_name(name, player) for name in shared_pool}
+                        for player in players}
 
             for player in players.copy():
                 if all([counters[player][item] == 0 for item in shared_pool]):
@@ -197,7 +252,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                     del (counters[player])
 
             if not players:
-                return None, None
+                return None
 
             for item in shared_pool:
                 count = min(counters[player][item] for player in players)
@@ -207,24 +262,21 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 else:
                     for player in players:
                         del (counters[player][item])
-            return counters, classifications
+            return counters
 
-        common_item_count, classifications = find_common_pool(group["players"], group["item_pool"])
+        common_item_count = find_common_pool(group["players"], group["item_pool"])
         if not common_item_count:
             continue
 
-        new_itempool: List[Item] = []
-        for item_name, item_count in next(iter(common_item_count.values())).items():
-            for _ in range(item_count):
-                new_item = group["world"].create_item(item_name)
-                # mangle together all original classification bits
-                new_item.classification |= classifications[item_name]
-                new_itempool.append(new_item)
-
+        linked_items = next(iter(common_item_count.values())).copy()
+        classifications: Dict[str, int] = collections.defaultdict(int)
+        kept_items: List[Item] = []
         region = Region("Menu", group_id, multiworld, "ItemLink")
         multiworld.regions.append(region)
         locations = region.locations
         for item in multiworld.itempool:
+            if item.player in common_item_count and item.name in group["item_pool"]:
+                classifications[item.name] |= item.classification
             count = common_item_count.get(item.player, {}).get(item.name, 0)
             if count:
                 loc = Location(group_id, f"Item Link: {item.name} -> {multiworld.player_name[item.player]} {count}",
@@ -236,7 +288,16 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 loc.place_locked_item(item)
                 common_item_count[item.player][item.name] -= 1
             else:
-                new_itempool.append(item)
+                kept_items.append(item)
+
+        new_itempool: List[Item] = []
+        for item_name, item_count in linked_items.items():
+            for _ in range(item_count):
+                new_item = group["world"].create_item(item_name)
+                # mangle together all original classification bits
+                new_item.classification |= classifications[item_name]
+                new_itempool.append(new_item)
+        new_itempool.extend(kept_items)
 
         itemcount = len(multiworld.itempool)
         multiworld.itempool = new_itempool
@@ -295,20 +356,69 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        archive = OutputArchive(output_path(f"AP_{multiworld.seed_name}.zip"), temp_dir, getattr(args, "zip_level", 9))
+
+        # worlds that support it can generate output in processes forked from this one, see World.process_output
+        output_processes: int = getattr(args, "output_processes", 0)
+        process_players = [player for player in output_players if multiworld.worlds[player].process_output]
+        if not output_processes or not process_players:
+            process_players = []
+        elif not _can_fork_output_processes():
+            logger.info("Can't fork processes for output, generating it on threads instead.")
+            process_players = []
+        thread_players = [player for player in output_players if player not in process_players]
+
+        process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        process_outputs: List[Tuple[int, concurrent.futures.Future, str]] = []
+        stage_folder = archive.new_folder()
+        if process_players:
+            # the processes get a copy of the multiworld, so it has to include what stage_generate_output changes
+            AutoWorld.call_stage(multiworld, "generate_output", stage_folder)
+            process_pool = concurrent.futures.ProcessPoolExecutor(
+                min(output_processes, len(process_players)), mp_context=multiprocessing.get_context("fork"),
+                initializer=_set_output_multiworld, initargs=(multiworld,))
+            # the workers get forked on the first submit, before this process starts any threads for the output
+            for player in process_players:
+                folder = archive.new_folder()
+                process_outputs.append((player, process_pool.submit(_generate_output_in_process, player, folder),
+                                        folder))
+
+        logger.info(f"Creating final archive at {archive.path}")
+        with archive, process_pool or contextlib.nullcontext(), \
+                concurrent.futures.ThreadPoolExecutor(len(thread_players) + len(process_players) + 3) as pool:
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
-            for player in output_players:
+            # output folder of each task that reads the multiworld
+            output_file_futures: Dict[concurrent.futures.Future, str] = {}
+            if process_players:
+                archive.add_folder(stage_folder)
+            else:
+                output_file_futures[pool.submit(AutoWorld.call_stage, multiworld, "generate_output",
+                                                stage_folder)] = stage_folder
+            for player in thread_players:
                 # skip starting a thread for methods that say "pass".
-                output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+                folder = archive.new_folder()
+                output_file_futures[pool.submit(AutoWorld.call_single, multiworld, "generate_output", player,
+                                                folder)] = folder
+
+            def finish_process_output(player: int, future: concurrent.futures.Future, folder: str) -> None:
+                world = multiworld.worlds[player]
+                try:
+                    state = future.result()
+                except BaseException:
+                    world.set_output_state(None)
+                    raise
+                world.set_output_state(state)
+                archive.add_folder(folder)
+
+            process_output_futures = [pool.submit(finish_process_output, *process_output)
+                                      for process_output in process_outputs]
 
             # collect ER hint info
             er_hint_data: Dict[int, Dict[int, str]] = {}
             AutoWorld.call_all(multiworld, 'extend_hint_information', er_hint_data)
 
-            def write_multidata():
+            def write_multidata(output_directory: str):
                 import NetUtils
                 slot_data = {}
                 client_versions = {}
@@ -392,11 +502,12 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
                 multidata = zlib.compress(pickle.dumps(multidata), 9)
 
-                with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
+                with open(os.path.join(output_directory, f'{outfilebase}.archipelago'), 'wb') as f:
                     f.write(bytes([3]))  # version of format
                     f.write(multidata)
 
-            output_file_futures.append(pool.submit(write_multidata))
+            multidata_folder = archive.new_folder()
+            output_file_futures[pool.submit(write_multidata, multidata_folder)] = multidata_folder
             if not check_accessibility_task.result():
                 if not multiworld.can_beat_game():
                     raise Exception("Game appears as unbeatable. Aborting.")
@@ -404,24 +515,28 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                     logger.warning("Location Accessibility requirements not fulfilled.")
 
             # retrieve exceptions via .result() if they occurred.
+            output_count = len(output_file_futures) + len(process_output_futures)
             for i, future in enumerate(concurrent.futures.as_completed(output_file_futures), start=1):
-                if i % 10 == 0 or i == len(output_file_futures):
-                    logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
+                if i % 10 == 0 or i == output_count:
+                    logger.info(f'Generating output files ({i}/{output_count}).')
+                future.result()
+                archive.add_folder(output_file_futures[future])
+
+            # the playthrough temporarily changes the multiworld, so only processes may still generate output
+            if args.spoiler > 1:
+                logger.info('Calculating playthrough.')
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+
+            if args.spoiler:
+                spoiler_folder = archive.new_folder()
+                multiworld.spoiler.to_file(os.path.join(spoiler_folder, '%s_Spoiler.txt' % outfilebase))
+                archive.add_folder(spoiler_folder)
+
+            for i, future in enumerate(concurrent.futures.as_completed(process_output_futures),
+                                       start=len(output_file_futures) + 1):
+                if i % 10 == 0 or i == output_count:
+                    logger.info(f'Generating output files ({i}/{output_count}).')
                 future.result()
-
-        if args.spoiler > 1:
-            logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
-
-        if args.spoiler:
-            multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
-
-        zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
-        logger.info(f"Creating final archive at {zipfilename}")
-        with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
-                             compresslevel=9) as zf:
-            for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
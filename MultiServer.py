@@ -39,7 +39,7 @@ import NetUtils
 import Utils
 from Utils import version_tuple, restricted_loads, Version, async_start
 from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore
+    SlotType, LocationStore, items_digest, locations_digest
 
 min_client_version = Version(0, 1, 6)
 colorama.init()
@@ -165,6 +165,7 @@ class Context:
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    stored_data_delta_clients: typing.Dict[str, typing.Set[Client]]
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -235,6 +236,7 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_delta_clients = collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
 
         # init empty to satisfy linter, I suppose
@@ -661,7 +663,7 @@ class Context:
             hints = [hint for hint in hints if hint not in self.hints[team, hint.finding_player]]
         if not hints:
             return
-        new_hint_events: typing.Set[int] = set()
+        new_hint_events: typing.Dict[int, typing.List[NetUtils.Hint]] = collections.defaultdict(list)
         concerns = collections.defaultdict(list)
         for hint in sorted(hints, key=operator.attrgetter('found'), reverse=True):
             data = (hint, hint.as_network_message())
@@ -675,14 +677,15 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
-                    new_hint_events.add(hint.finding_player)
+                    new_hint_events[hint.finding_player].append(hint)
                     for player in self.slot_set(hint.receiving_player):
-                        self.hints[team, player].add(hint)
-                        new_hint_events.add(player)
+                        if hint not in self.hints[team, player]:
+                            self.hints[team, player].add(hint)
+                            new_hint_events[player].append(hint)
 
             logging.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
-        for slot in new_hint_events:
-            self.on_new_hint(team, slot)
+        for slot, new_hints in new_hint_events.items():
+            self.on_new_hint(team, slot, new_hints)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
                 clients = self.clients[team].get(slot)
@@ -704,18 +707,28 @@ class Context:
             release_player(self, client.team, client.slot)
         self.save()  # save goal completion flag
 
-    def on_new_hint(self, team: int, slot: int):
-        self.on_changed_hints(team, slot)
+    def on_new_hint(self, team: int, slot: int, hints: typing.Optional[typing.Sequence[NetUtils.Hint]] = None):
+        self.on_changed_hints(team, slot, added=hints)
         self.broadcast(self.clients[team][slot], [{
             "cmd": "RoomUpdate",
             "hint_points": get_slot_points(self, team, slot)
         }])
 
-    def on_changed_hints(self, team: int, slot: int):
+    def on_changed_hints(self, team: int, slot: int,
+                         added: typing.Optional[typing.Iterable[NetUtils.Hint]] = None,
+                         changed: typing.Optional[typing.Iterable[NetUtils.Hint]] = None):
+        """Notify about changed hints of a slot. If the added and changed hints are known, clients that asked for
+        deltas only receive those instead of all hints."""
         key: str = f"_read_hints_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
-        if targets:
-            self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
+        delta_targets: typing.Set[Client] = set()
+        if added is not None or changed is not None:
+            delta_targets = {client for client in self.stored_data_delta_clients[key] if client in targets}
+        if delta_targets:
+            self.broadcast(delta_targets, [{"cmd": "SetReply", "key": key,
+                                            "delta": {"added": list(added or ()), "changed": list(changed or ())}}])
+        if targets - delta_targets:
+            self.broadcast(targets - delta_targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
@@ -978,8 +991,10 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         }])
         old_hints = ctx.hints[team, slot].copy()
         ctx.recheck_hints(team, slot)
-        if old_hints != ctx.hints[team, slot]:
-            ctx.on_changed_hints(team, slot)
+        # hints compare equal only if their found state matches, so this is the rechecked version of each changed hint
+        changed_hints = ctx.hints[team, slot] - old_hints
+        if changed_hints:
+            ctx.on_changed_hints(team, slot, changed=changed_hints)
         ctx.save()
 
 
@@ -1666,17 +1681,35 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 "cmd": "Connected",
                 "team": client.team, "slot": client.slot,
                 "players": ctx.get_players_package(),
-                "missing_locations": get_missing_checks(ctx, team, slot),
-                "checked_locations": get_checked_checks(ctx, team, slot),
                 "slot_info": ctx.slot_info,
                 "hint_points": get_slot_points(ctx, team, slot),
             }
+            checked_locations = get_checked_checks(ctx, team, slot)
+            if type(args.get("locations_digest")) is not str:
+                connected_packet["missing_locations"] = get_missing_checks(ctx, team, slot)
+                connected_packet["checked_locations"] = checked_locations
+            elif args["locations_digest"] != locations_digest(checked_locations):
+                # a resuming client knows all locations of its slot, missing ones are the rest of them
+                connected_packet["checked_locations"] = checked_locations
             reply = [connected_packet]
             start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
             items = get_received_items(ctx, client.team, client.slot, client.remote_items)
-            if (start_inventory or items) and not client.no_items:
-                reply.append({"cmd": 'ReceivedItems', "index": 0, "items": start_inventory + items})
-                client.send_index = len(start_inventory) + len(items)
+            item_count = len(start_inventory) + len(items)
+            items_index = args.get("items_index", 0)
+            if type(items_index) is not int or not 0 <= items_index <= item_count or client.no_items:
+                items_index = 0
+            elif items_index and args.get("items_digest") != items_digest(
+                    itertools.islice(itertools.chain(start_inventory, items), items_index)):
+                # the client got other items than this slot has, like before the server restarted from an older save
+                items_index = 0
+            elif items_index:
+                connected_packet["items_index"] = items_index
+            if not client.no_items:
+                if item_count > items_index:
+                    first_new_item = max(0, items_index - len(start_inventory))
+                    reply.append({"cmd": 'ReceivedItems', "index": items_index,
+                                  "items": start_inventory[items_index:] + items[first_new_item:]})
+                client.send_index = item_count
             if not client.auth:  # if this was a Re-Connect, don't print to console
                 client.auth = True
                 await on_client_joined(ctx, client)
@@ -1840,6 +1873,11 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 return
             for key in args["keys"]:
                 ctx.stored_data_notification_clients[key].add(client)
+                if args.get("deltas", False) and key.startswith("_read_hints_"):
+                    ctx.stored_data_delta_clients[key].add(client)
+                elif key in ctx.stored_data_delta_clients:
+                    # the latest SetNotify of a key decides whether the client gets deltas for it
+                    ctx.stored_data_delta_clients[key].discard(client)
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
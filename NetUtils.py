@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import typing
 import enum
+import hashlib
 import warnings
 from json import JSONEncoder, JSONDecoder
 
@@ -346,6 +347,21 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+def hint_key(hint: typing.Mapping[str, typing.Any]) -> typing.Tuple[int, int, int, int, str]:
+    """Identifies a hint received over the network, like Hint.__hash__ does, so found hints replace their old state."""
+    return hint["receiving_player"], hint["finding_player"], hint["location"], hint["item"], hint["entrance"]
+
+
+def locations_digest(locations: typing.Iterable[int]) -> str:
+    """Digest of a set of location ids, for a resuming client and the server to compare their checked locations."""
+    return hashlib.sha1(",".join(map(str, sorted(locations))).encode()).hexdigest()
+
+
+def items_digest(items: typing.Iterable[NetworkItem]) -> str:
+    """Digest of received items in order, for a resuming client and the server to compare the items up to its index."""
+    return hashlib.sha1(",".join(f"{item.item}:{item.location}:{item.player}" for item in items).encode()).hexdigest()
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
@@ -15,10 +15,11 @@ import typing
 from json import loads, dumps
 
 # CommonClient import first to trigger ModuleUpdater
-from CommonClient import CommonContext, server_loop, ClientCommandProcessor, gui_enabled, get_base_parser
+from CommonClient import CommonContext, server_loop, ClientCommandProcessor, gui_enabled, get_base_parser, \
+    WatcherScheduler
 
 import Utils
-from Utils import async_start
+from Utils import async_start, find_read, merge_read_ranges
 from MultiServer import mark_raw
 if typing.TYPE_CHECKING:
     from worlds.AutoSNIClient import SNIClient
@@ -51,6 +52,10 @@ class SNIClientCommandProcessor(ClientCommandProcessor):
 
         self.output(f"Setting slow mode to {self.ctx.slow_mode}")
 
+    def _cmd_watcher(self) -> None:
+        """Show how often the game is checked and how long checking it takes."""
+        self.output(self.ctx.watcher_scheduler.report())
+
     @mark_raw
     def _cmd_snes(self, snes_options: str = "") -> bool:
         """Connect to a snes. Optionally include network address of a snes to connect to,
@@ -127,11 +132,13 @@ class SNIContext(CommonContext):
     snes_recv_queue: "asyncio.Queue[bytes]"
     snes_request_lock: asyncio.Lock
     snes_write_buffer: typing.List[typing.Tuple[int, bytes]]
+    snes_read_cache: typing.List[typing.Tuple[int, bytes]]  # (address, data) of the read plan of this tick
     snes_connector_lock: threading.Lock
     death_state: DeathState
     killing_player_task: "typing.Optional[asyncio.Task[None]]"
     allow_collect: bool
     slow_mode: bool
+    watcher_scheduler: WatcherScheduler
 
     client_handler: typing.Optional[SNIClient]
     awaiting_rom: bool
@@ -153,11 +160,13 @@ class SNIContext(CommonContext):
         self.snes_recv_queue = asyncio.Queue()
         self.snes_request_lock = asyncio.Lock()
         self.snes_write_buffer = []
+        self.snes_read_cache = []
         self.snes_connector_lock = threading.Lock()
         self.death_state = DeathState.alive  # for death link flop behaviour
         self.killing_player_task = None
         self.allow_collect = False
         self.slow_mode = False
+        self.watcher_scheduler = WatcherScheduler(0.125, 1)
 
         self.client_handler = None
         self.awaiting_rom = False
@@ -510,47 +519,90 @@ async def snes_recv_loop(ctx: SNIContext) -> None:
             ctx.snes_autoreconnect_task = asyncio.create_task(snes_autoreconnect(ctx), name="snes auto-reconnect")
 
 
-async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
-    try:
-        await ctx.snes_request_lock.acquire()
+SNES_READ_MERGE_GAP = 0x40
+"""Ranges of a batched read at most this many bytes apart are read as one, a round trip costs more than the bytes."""
+SNES_READ_MAX_OPERANDS = 8
+"""Address and size pairs per GetAddress request, longer batches are sent as several requests back to back."""
 
-        if (
-            ctx.snes_state != SNESState.SNES_ATTACHED or
-            ctx.snes_socket is None or
-            not ctx.snes_socket.open or
-            ctx.snes_socket.closed
-        ):
-            return None
 
-        GetAddress_Request: SNESRequest = {
-            "Opcode": "GetAddress",
-            "Space": "SNES",
-            "Operands": [hex(address)[2:], hex(size)[2:]]
-        }
-        try:
+async def _snes_get_address(ctx: SNIContext,
+                            ranges: typing.List[typing.Tuple[int, int]]) -> typing.Optional[bytes]:
+    """Sends all GetAddress requests for ranges before waiting for the data. The caller holds snes_request_lock."""
+    if (
+        ctx.snes_state != SNESState.SNES_ATTACHED or
+        ctx.snes_socket is None or
+        not ctx.snes_socket.open or
+        ctx.snes_socket.closed
+    ):
+        return None
+
+    try:
+        for i in range(0, len(ranges), SNES_READ_MAX_OPERANDS):
+            GetAddress_Request: SNESRequest = {
+                "Opcode": "GetAddress",
+                "Space": "SNES",
+                "Operands": [hex(value)[2:] for read in ranges[i:i + SNES_READ_MAX_OPERANDS] for value in read]
+            }
             await ctx.snes_socket.send(dumps(GetAddress_Request))
-        except ConnectionClosed:
-            return None
+    except ConnectionClosed:
+        return None
 
-        data: bytes = bytes()
-        while len(data) < size:
-            try:
-                data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
-            except asyncio.TimeoutError:
-                break
-
-        if len(data) != size:
-            snes_logger.error('Error reading %s, requested %d bytes, received %d' % (hex(address), size, len(data)))
-            if len(data):
-                snes_logger.error(str(data))
-                snes_logger.warning('Communication Failure with SNI')
-            if ctx.snes_socket is not None and not ctx.snes_socket.closed:
-                await ctx.snes_socket.close()
-            return None
+    size = sum(size for _, size in ranges)
+    data: bytes = bytes()
+    while len(data) < size:
+        try:
+            data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
+        except asyncio.TimeoutError:
+            break
 
-        return data
-    finally:
-        ctx.snes_request_lock.release()
+    if len(data) != size:
+        snes_logger.error('Error reading %s, requested %d bytes, received %d' % (hex(ranges[0][0]), size, len(data)))
+        if len(data):
+            snes_logger.error(str(data))
+            snes_logger.warning('Communication Failure with SNI')
+        if ctx.snes_socket is not None and not ctx.snes_socket.closed:
+            await ctx.snes_socket.close()
+        return None
+
+    return data
+
+
+async def snes_read_blocks(ctx: SNIContext, reads: typing.Iterable[typing.Tuple[int, int]]) \
+        -> typing.Optional[typing.List[typing.Tuple[int, bytes]]]:
+    """Reads the merged ranges of reads in one burst and returns them as (address, data) blocks."""
+    ranges = merge_read_ranges(reads, SNES_READ_MERGE_GAP)
+    if not ranges:
+        return []
+    async with ctx.snes_request_lock:
+        data = await _snes_get_address(ctx, ranges)
+    if data is None:
+        return None
+
+    blocks: typing.List[typing.Tuple[int, bytes]] = []
+    offset = 0
+    for address, size in ranges:
+        blocks.append((address, data[offset:offset + size]))
+        offset += size
+    return blocks
+
+
+async def snes_read_batch(ctx: SNIContext,
+                          reads: typing.Sequence[typing.Tuple[int, int]]) -> typing.Optional[typing.List[bytes]]:
+    """Reads several (address, size) ranges in one burst, returning the data in the order of reads."""
+    blocks = await snes_read_blocks(ctx, reads)
+    if blocks is None:
+        return None
+    return [typing.cast(bytes, find_read(blocks, address, size)) for address, size in reads]
+
+
+async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
+    if ctx.snes_read_cache:
+        data = find_read(ctx.snes_read_cache, address, size)
+        if data is not None:
+            return data
+
+    async with ctx.snes_request_lock:
+        return await _snes_get_address(ctx, [(address, size)])
 
 
 async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int, bytes]]) -> bool:
@@ -561,6 +613,11 @@ async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int,
                 not ctx.snes_socket.open or ctx.snes_socket.closed:
             return False
 
+        if ctx.snes_read_cache:
+            ctx.snes_read_cache = [(start, cached) for start, cached in ctx.snes_read_cache
+                                   if not any(address < start + len(cached) and start < address + len(data)
+                                              for address, data in write_list)]
+
         PutAddress_Request: SNESRequest = {"Opcode": "PutAddress", "Operands": [], 'Space': 'SNES'}
         try:
             for address, data in write_list:
@@ -598,11 +655,7 @@ async def snes_flush_writes(ctx: SNIContext) -> None:
 async def game_watcher(ctx: SNIContext) -> None:
     perf_counter = time.perf_counter()
     while not ctx.exit_event.is_set():
-        try:
-            await asyncio.wait_for(ctx.watcher_event.wait(), 0.125)
-        except asyncio.TimeoutError:
-            pass
-        ctx.watcher_event.clear()
+        await ctx.watcher_scheduler.wait(ctx)
 
         if not ctx.rom or not ctx.client_handler:
             ctx.finished_game = False
@@ -648,7 +701,18 @@ async def game_watcher(ctx: SNIContext) -> None:
 
         perf_counter = time.perf_counter()
 
-        await ctx.client_handler.game_watcher(ctx)
+        with ctx.watcher_scheduler.tick():
+            read_plan = ctx.client_handler.get_read_plan(ctx)
+            if read_plan:
+                blocks = await snes_read_blocks(ctx, read_plan)
+                if blocks:
+                    # only answer for the planned ranges, the gaps read along with them are not part of the plan
+                    ctx.snes_read_cache = [(address, typing.cast(bytes, find_read(blocks, address, size)))
+                                           for address, size in merge_read_ranges(read_plan, 0)]
+            try:
+                await ctx.client_handler.game_watcher(ctx)
+            finally:
+                ctx.snes_read_cache = []
 
 
 async def run_game(romfile: str) -> None:
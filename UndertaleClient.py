@@ -264,7 +264,7 @@ async def process_undertale_cmd(ctx: UndertaleContext, cmd: str, args: dict):
             if args["keys"][str(ctx.slot) + " RoutesDone pacifist"] is not None:
                 ctx.completed_routes["pacifist"] = args["keys"][str(ctx.slot)+" RoutesDone pacifist"]
     elif cmd == "SetReply":
-        if args["value"] is not None:
+        if args.get("value") is not None:
             if str(ctx.slot)+" RoutesDone pacifist" == args["key"]:
                 ctx.completed_routes["pacifist"] = args["value"]
             elif str(ctx.slot)+" RoutesDone genocide" == args["key"]:
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import json
+import struct
 import typing
 import builtins
 import os
@@ -28,6 +30,7 @@ except ImportError:
     from yaml import Loader as UnsafeLoader, SafeLoader, Dumper
 
 if typing.TYPE_CHECKING:
+    import mmap
     import tkinter
     import pathlib
     from BaseClasses import Region
@@ -309,6 +312,14 @@ def persistent_store(category: str, key: typing.Any, value: typing.Any):
         f.write(dump(storage, Dumper=Dumper))
 
 
+def persistent_remove(category: str) -> None:
+    storage: dict = persistent_load()
+    if category in storage:
+        del storage[category]
+        with open(user_path("_persistent_storage.yaml"), "wt") as f:
+            f.write(dump(storage, Dumper=Dumper))
+
+
 def persistent_load() -> typing.Dict[str, dict]:
     storage = getattr(persistent_load, "storage", None)
     if storage:
@@ -331,37 +342,162 @@ def get_file_safe_name(name: str) -> str:
     return "".join(c for c in name if c not in '<>:"/\\|?*')
 
 
-def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Dict[str, Any]:
-    if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        path = cache_path("datapackage", get_file_safe_name(game), f"{checksum}.json")
-        if os.path.exists(path):
-            try:
-                with open(path, "r", encoding="utf-8-sig") as f:
-                    return json.load(f)
-            except Exception as e:
-                logging.debug(f"Could not load data package: {e}")
+class IdNameTable(typing.Mapping[int, str]):
+    """Read-only id to name mapping over a sorted array of ids and their names in a string table."""
+
+    def __init__(self, ids: memoryview, offsets: memoryview, strings: memoryview) -> None:
+        self._ids = ids
+        self._offsets = offsets
+        self._strings = strings
+
+    def __getitem__(self, key: int) -> str:
+        if not isinstance(key, int):
+            raise KeyError(key)
+        index = bisect.bisect_left(self._ids, key)
+        if index == len(self._ids) or self._ids[index] != key:
+            raise KeyError(key)
+        return str(self._strings[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def release(self) -> None:
+        """Releases the buffers of the table, after which names can't be looked up anymore."""
+        for view in (self._ids, self._offsets, self._strings):
+            view.release()
+
 
-    # fall back to old cache
-    cache = persistent_load().get("datapackage", {}).get("games", {}).get(game, {})
-    if cache.get("checksum") == checksum:
-        return cache
+class DataPackageTable:
+    """
+    The item and location names of one game's data package in the binary data package store. The file is memory mapped
+    and names are only decoded when looked up.
 
-    # cache does not match
-    return {}
+    Layout, little endian: a header of magic, format version, metadata size, item count and location count, then the
+    metadata as JSON padded to 8 bytes, the sorted item ids and location ids as int64, the string table offsets of
+    their names as uint32 with one extra end offset each, and the utf-8 string table.
+    """
+    magic: typing.ClassVar[bytes] = b"APDP"
+    format_version: typing.ClassVar[int] = 1
+    header: typing.ClassVar[struct.Struct] = struct.Struct("<4sIIII")
+
+    game: str
+    version: int
+    checksum: str
+    item_names: IdNameTable
+    location_names: IdNameTable
+
+    def __init__(self, data: typing.Union[bytes, memoryview, mmap.mmap]) -> None:
+        self._data = data
+        view = memoryview(data)
+        magic, format_version, meta_size, item_count, location_count = self.header.unpack_from(view)
+        if magic != self.magic or format_version != self.format_version:
+            raise ValueError("Not a data package table of a supported format")
+        meta = json.loads(bytes(view[self.header.size:self.header.size + meta_size]))
+        self.game, self.version, self.checksum = meta["game"], meta["version"], meta["checksum"]
+
+        offset = self._padded(self.header.size + meta_size)
+        item_ids = view[offset:offset + 8 * item_count].cast("q")
+        offset += 8 * item_count
+        location_ids = view[offset:offset + 8 * location_count].cast("q")
+        offset += 8 * location_count
+        item_offsets = view[offset:offset + 4 * (item_count + 1)].cast("I")
+        offset += 4 * (item_count + 1)
+        location_offsets = view[offset:offset + 4 * (location_count + 1)].cast("I")
+        strings = view[offset + 4 * (location_count + 1):]
+        self.item_names = IdNameTable(item_ids, item_offsets, strings)
+        self.location_names = IdNameTable(location_ids, location_offsets, strings)
+        view.release()
+
+    def close(self) -> None:
+        """Releases the names and closes the memory map of a table from open."""
+        import mmap
+        self.item_names.release()
+        self.location_names.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    @staticmethod
+    def _padded(size: int) -> int:
+        return (size + 7) & ~7
+
+    @classmethod
+    def encode(cls, game: str, data: typing.Dict[str, Any]) -> bytes:
+        """Encodes a game's data package, as sent by the server, in the binary layout."""
+        meta = json.dumps({"game": game, "version": data.get("version", 0), "checksum": data.get("checksum")},
+                          ensure_ascii=False).encode("utf-8")
+        items = sorted((item_id, name) for name, item_id in data["item_name_to_id"].items())
+        locations = sorted((location_id, name) for name, location_id in data["location_name_to_id"].items())
+
+        strings = bytearray()
+        offsets: typing.List[int] = []
+        for table in (items, locations):
+            for _, name in table:
+                offsets.append(len(strings))
+                strings += name.encode("utf-8")
+            offsets.append(len(strings))
+
+        header = cls.header.pack(cls.magic, cls.format_version, len(meta), len(items), len(locations))
+        padding = bytes(cls._padded(len(header) + len(meta)) - len(header) - len(meta))
+        return b"".join((
+            header, meta, padding,
+            struct.pack(f"<{len(items)}q", *(item_id for item_id, _ in items)),
+            struct.pack(f"<{len(locations)}q", *(location_id for location_id, _ in locations)),
+            struct.pack(f"<{len(offsets)}I", *offsets),
+            strings,
+        ))
+
+    @classmethod
+    def open(cls, path: str) -> DataPackageTable:
+        import mmap
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _data_package_store_path(game: str, checksum: str, extension: str) -> str:
+    if checksum != get_file_safe_name(checksum):
+        raise ValueError(f"Bad symbols in checksum: {checksum}")
+    return cache_path("datapackage", get_file_safe_name(game), f"{checksum}.{extension}")
+
+
+def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Optional[DataPackageTable]:
+    """Returns the stored names of the data package of game with checksum, or None if it is not stored."""
+    if not checksum or not game:
+        return None
+    path = _data_package_store_path(game, checksum, "bin")
+    if not os.path.exists(path):
+        # convert data packages stored as json by older versions
+        json_path = _data_package_store_path(game, checksum, "json")
+        if not os.path.exists(json_path):
+            return None
+        try:
+            with open(json_path, "r", encoding="utf-8-sig") as f:
+                store_data_package_for_checksum(game, json.load(f))
+        except Exception as e:
+            logging.debug(f"Could not load data package: {e}")
+            return None
+    try:
+        return DataPackageTable.open(path)
+    except Exception as e:
+        logging.debug(f"Could not load data package: {e}")
+        return None
 
 
 def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> None:
     checksum = data.get("checksum")
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        game_folder = cache_path("datapackage", get_file_safe_name(game))
-        os.makedirs(game_folder, exist_ok=True)
+        path = _data_package_store_path(game, checksum, "bin")
+        if os.path.exists(path):
+            # contents are identified by the checksum, and the file may be mapped
+            return
         try:
-            with open(os.path.join(game_folder, f"{checksum}.json"), "w", encoding="utf-8-sig") as f:
-                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(DataPackageTable.encode(game, data))
+            os.replace(temp_path, path)
         except Exception as e:
             logging.debug(f"Could not store data package: {e}")
 
@@ -460,6 +596,80 @@ class KeyedDefaultDict(collections.defaultdict):
         return value
 
 
+class LazyDict(dict):
+    """dict that gets filled on demand. A missing key is requested through load_key, which should add it and return
+    whether it did. Anything that looks at all keys calls load_all first, so the dict always appears complete."""
+
+    def __init__(self, load_key: typing.Callable[[typing.Any], bool] = lambda key: False,
+                 load_all: typing.Callable[[], None] = lambda: None):
+        super().__init__()
+        self.load_key = load_key
+        self.load_all = load_all
+        self.complete = False
+
+    def ensure_complete(self) -> None:
+        if not self.complete:
+            self.complete = True
+            self.load_all()
+
+    def _try_load(self, key) -> bool:
+        return not self.complete and self.load_key(key) and dict.__contains__(self, key)
+
+    def __missing__(self, key):
+        if self._try_load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or self._try_load(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        self.ensure_complete()
+        return super().__iter__()
+
+    def __reversed__(self):
+        self.ensure_complete()
+        return super().__reversed__()
+
+    def __len__(self) -> int:
+        self.ensure_complete()
+        return super().__len__()
+
+    def __eq__(self, other) -> bool:
+        self.ensure_complete()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def keys(self):
+        self.ensure_complete()
+        return super().keys()
+
+    def values(self):
+        self.ensure_complete()
+        return super().values()
+
+    def items(self):
+        self.ensure_complete()
+        return super().items()
+
+    def copy(self) -> dict:
+        self.ensure_complete()
+        return dict(super().items())
+
+    def __repr__(self) -> str:
+        self.ensure_complete()
+        return super().__repr__()
+
+    def __reduce__(self):
+        # unpickles as plain dict, the loaders are specific to this process
+        self.ensure_complete()
+        return dict, (dict(super().items()),)
+
+
 def get_text_between(text: str, start: str, end: str) -> str:
     return text[text.index(start) + len(start): text.rindex(end)]
 
@@ -468,6 +678,27 @@ def get_text_after(text: str, start: str) -> str:
     return text[text.index(start) + len(start):]
 
 
+def merge_read_ranges(reads: typing.Iterable[typing.Tuple[int, int]],
+                      gap: int = 0) -> typing.List[typing.Tuple[int, int]]:
+    """Sorts (address, size) ranges and merges the overlapping ones and those at most gap bytes apart."""
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for address, size in sorted(reads):
+        if merged and address <= merged[-1][0] + merged[-1][1] + gap:
+            start, length = merged[-1]
+            merged[-1] = (start, max(length, address + size - start))
+        else:
+            merged.append((address, size))
+    return merged
+
+
+def find_read(blocks: typing.Iterable[typing.Tuple[int, bytes]], address: int, size: int) -> typing.Optional[bytes]:
+    """Returns size bytes at address from the first (start, data) block containing all of them, if any does."""
+    for start, data in blocks:
+        if start <= address and address + size <= start + len(data):
+            return data[address - start:address - start + size]
+    return None
+
+
 loglevel_mapping = {'error': logging.ERROR, 'info': logging.INFO, 'warning': logging.WARNING, 'debug': logging.DEBUG}
 
 
@@ -754,6 +985,28 @@ def read_snes_rom(stream: BinaryIO, strip_header: bool = True) -> bytearray:
     return buffer
 
 
+def get_file_md5(path: str, offset: int = 0) -> str:
+    """Returns the hex MD5 of a file from offset on. Digests are stored with the file's modification time and size,
+    so unchanged files, like base roms validated on every launch, are not read again."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "offset": offset}
+    cached = persistent_load().get("file_digests", {}).get(path)
+    if cached and all(cached.get(name) == value for name, value in key.items()):
+        return cached["md5"]
+
+    import hashlib
+    file_md5 = hashlib.md5()
+    block = bytearray(64*1024)
+    view = memoryview(block)
+    with open(path, "rb", buffering=0) as f:
+        f.seek(offset)
+        while n := f.readinto(view):
+            file_md5.update(view[:n])
+    persistent_store("file_digests", path, {**key, "md5": file_md5.hexdigest()})
+    return file_md5.hexdigest()
+
+
 _faf_tasks: "Set[asyncio.Task[typing.Any]]" = set()
 
 
@@ -21,6 +21,8 @@ if not os.path.exists(configpath):  # fall back to config.yaml in home
 
 def get_app():
     from WebHostLib import register, cache, app as raw_app
+    from WebHostLib.blobstore import blob_store
+    from WebHostLib.migrations import upgrade_data, upgrade_schema
     from WebHostLib.models import db
 
     register()
@@ -35,8 +37,11 @@ def get_app():
         logging.info(f"HOST_ADDRESS was set to {app.config['HOST_ADDRESS']}")
 
     cache.init_app(app)
+    blob_store.folder = app.config["BLOB_FOLDER"]
     db.bind(**app.config["PONY"])
+    new_tables = upgrade_schema(db)
     db.generate_mapping(create_tables=True)
+    upgrade_data(new_tables)
     return app
 
 
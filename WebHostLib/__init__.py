@@ -10,6 +10,7 @@ from pony.flask import Pony
 from werkzeug.routing import BaseConverter
 
 from Utils import title_sorted
+from .blobstore import BLOB_FOLDER
 
 UPLOAD_FOLDER = os.path.relpath('uploads')
 LOGS_FOLDER = os.path.relpath('logs')
@@ -30,6 +31,8 @@ app.config["SELFGEN"] = True  # application process is in charge of scheduling G
 app.config["DEBUG"] = False
 app.config["PORT"] = 80
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# content-addressed storage of multidata, patch files and multisaves; the database only holds references
+app.config["BLOB_FOLDER"] = BLOB_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 64 * 1024 * 1024  # 64 megabyte limit
 # if you want to deploy, make sure you have a non-guessable secret key
 app.config["SECRET_KEY"] = bytes(socket.gethostname(), encoding="utf-8")
@@ -49,6 +52,9 @@ app.config["PONY"] = {
     'create_db': True
 }
 app.config["MAX_ROLL"] = 20
+# processes used to roll uploaded options files in parallel, each importing all worlds;
+# below 2 rolls them in the request thread
+app.config["ROLL_WORKERS"] = 0
 app.config["CACHE_TYPE"] = "SimpleCache"
 app.config["HOST_ADDRESS"] = ""
 
@@ -77,6 +83,7 @@ def register():
     # has automatic patch integration
     import worlds.AutoWorld
     import worlds.Files
+    worlds.load_all_worlds()
     app.jinja_env.filters['supports_apdeltapatch'] = lambda game_name: \
         game_name in worlds.Files.AutoPatchRegister.patch_types
 
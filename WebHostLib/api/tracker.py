@@ -0,0 +1,114 @@
+import base64
+import hashlib
+from typing import Any, Dict, Iterable, List
+from uuid import UUID
+
+from flask import Response, abort, jsonify, request
+
+from WebHostLib import cache
+from WebHostLib.models import Room
+from WebHostLib.tracker import TrackerData
+from . import api_endpoints
+
+# bump when the layout of the returned data changes in an incompatible way
+TRACKER_API_VERSION = 1
+
+
+def get_save_version(room: Room) -> str:
+    """Identifies the current state of a room's multisave, without loading it if it is in the blob store."""
+    if room.multisave_ref:
+        return room.multisave_ref
+    if room.multisave:
+        return hashlib.sha256(room.multisave).hexdigest()
+    return "0"
+
+
+def encode_bitset(ids: List[int], checked: Iterable[int]) -> str:
+    """Encodes which of the sorted ids are in checked as a base64 little-endian bitset."""
+    checked = set(checked)
+    bits = bytearray((len(ids) + 7) // 8)
+    for index, location_id in enumerate(ids):
+        if location_id in checked:
+            bits[index // 8] |= 1 << (index % 8)
+    return base64.b64encode(bits).decode("ascii")
+
+
+def get_tracker_state(tracker_data: TrackerData) -> List[Dict[str, Any]]:
+    activity = tracker_data.get_room_activity_timestamps()
+    slots = []
+    for team, players in tracker_data.get_all_players().items():
+        for player in players:
+            slots.append({
+                "team": team,
+                "player": player,
+                "status": tracker_data.get_player_client_status(team, player),
+                "last_activity": activity.get((team, player), None),
+                "checked": encode_bitset(sorted(tracker_data.get_player_locations(team, player)),
+                                         tracker_data.get_player_checked_locations(team, player)),
+                "received": [item.item for item in tracker_data.get_player_received_items(team, player)],
+            })
+    return slots
+
+
+def get_tracker_locations(tracker_data: TrackerData) -> List[Dict[str, Any]]:
+    return [
+        {
+            "team": team,
+            "player": player,
+            "game": tracker_data.get_player_game(team, player),
+            "locations": sorted(tracker_data.get_player_locations(team, player)),
+        }
+        for team, players in tracker_data.get_all_players().items() for player in players
+    ]
+
+
+def conditional_response(etag: str, create_data) -> Response:
+    """Answers with 304 if the client already has the data identified by etag, otherwise calls create_data."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(create_data())
+    response.set_etag(etag)
+    # clients may store the response, but have to revalidate it, which is cheap due to the etag
+    response.cache_control.no_cache = True
+    return response
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>')
+def tracker_state(tracker: UUID):
+    """Compact state of all slots of a room. Checked locations are a bitset over the ids of /tracker/<id>/locations.
+    Responses are identified by the room's save version, so polling with If-None-Match is cheap."""
+    room = Room.get(tracker=tracker)
+    if not room:
+        return abort(404)
+    etag = f"{TRACKER_API_VERSION}-{get_save_version(room)}"
+
+    def create_data() -> Dict[str, Any]:
+        cache_key = f"api_tracker_{tracker}_{etag}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = {
+                "version": TRACKER_API_VERSION,
+                "slots": get_tracker_state(TrackerData(room)),
+            }
+            cache.set(cache_key, data, 60 * 60)
+        return data
+
+    return conditional_response(etag, create_data)
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>/locations')
+def tracker_locations(tracker: UUID):
+    """Sorted location ids per slot, which do not change for the lifetime of a room."""
+    room = Room.get(tracker=tracker)
+    if not room:
+        return abort(404)
+    etag = f"{TRACKER_API_VERSION}-{room.seed.id}"
+
+    def create_data() -> Dict[str, Any]:
+        return {
+            "version": TRACKER_API_VERSION,
+            "slots": get_tracker_locations(TrackerData(room)),
+        }
+
+    return conditional_response(etag, create_data)
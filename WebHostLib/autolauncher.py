@@ -39,13 +39,19 @@ def handle_generation_failure(result: BaseException):
 def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation):
     try:
         meta = json.loads(generation.meta)
-        options = restricted_loads(generation.options)
-        logging.info(f"Generating {generation.id} for {len(options)} players")
-        pool.apply_async(gen_game, (options,),
-                         {"meta": meta,
-                          "sid": generation.id,
-                          "owner": generation.owner},
-                         handle_generation_success, handle_generation_failure)
+        if "upload" in meta:
+            # an uploaded multidata or zip, waiting to be turned into a seed
+            logging.info(f"Processing upload {generation.id}")
+            pool.apply_async(ingest_upload, (meta["upload"], generation.owner, generation.id), {},
+                             handle_generation_success, handle_generation_failure)
+        else:
+            options = restricted_loads(generation.options)
+            logging.info(f"Generating {generation.id} for {len(options)} players")
+            pool.apply_async(gen_game, (options,),
+                             {"meta": meta,
+                              "sid": generation.id,
+                              "owner": generation.owner},
+                             handle_generation_success, handle_generation_failure)
     except Exception as e:
         generation.state = STATE_ERROR
         commit()
@@ -54,11 +60,26 @@ def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation):
         generation.state = STATE_STARTED
 
 
-def init_db(pony_config: dict):
+def init_db(pony_config: dict, blob_folder: str):
+    blob_store.folder = blob_folder
     db.bind(**pony_config)
     db.generate_mapping()
 
 
+blob_sweep_interval = 60 * 60
+
+
+def sweep_blobs():
+    """Delete blobs no longer referenced by any content, such as replaced multisaves."""
+    with db_session:
+        referenced = set(select(slot.data_ref for slot in Slot if slot.data_ref))
+        referenced.update(select(seed.multidata_ref for seed in Seed if seed.multidata_ref))
+        referenced.update(select(room.multisave_ref for room in Room if room.multisave_ref))
+    blobs = blob_store.sweep(referenced)
+    if blobs:
+        logging.info(f"{blobs} unreferenced blobs have been deleted.")
+
+
 def autohost(config: dict):
     def keep_running():
         try:
@@ -73,9 +94,14 @@ def autohost(config: dict):
                     # Command gets deleted by ponyorm Cascade Delete, as Room is Required
                 if rooms or seeds or slots:
                     logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
+                sweep_blobs()
+                last_sweep = time.monotonic()
                 run_guardian()
                 while 1:
                     time.sleep(0.1)
+                    if time.monotonic() - last_sweep > blob_sweep_interval:
+                        sweep_blobs()
+                        last_sweep = time.monotonic()
                     with db_session:
                         rooms = select(
                             room for room in Room if
@@ -96,7 +122,8 @@ def autogen(config: dict):
             with Locker("autogen"):
 
                 with multiprocessing.Pool(config["GENERATORS"], initializer=init_db,
-                                          initargs=(config["PONY"],), maxtasksperchild=10) as generator_pool:
+                                          initargs=(config["PONY"], config["BLOB_FOLDER"]),
+                                          maxtasksperchild=10) as generator_pool:
                     with db_session:
                         to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
 
@@ -141,6 +168,7 @@ class MultiworldInstance():
         self.cert = config["SELFLAUNCHCERT"]
         self.key = config["SELFLAUNCHKEY"]
         self.host = config["HOST_ADDRESS"]
+        self.blob_folder = config["BLOB_FOLDER"]
 
     def start(self):
         if self.process and self.process.is_alive():
@@ -149,7 +177,7 @@ class MultiworldInstance():
         logging.info(f"Spinning up {self.room_id}")
         process = multiprocessing.Process(group=None, target=run_server_process,
                                           args=(self.room_id, self.ponyconfig, get_static_server_data(),
-                                                self.cert, self.key, self.host),
+                                                self.cert, self.key, self.host, self.blob_folder),
                                           name="MultiHost")
         process.start()
         # bind after start to prevent thread sync issues with guardian.
@@ -202,6 +230,8 @@ def run_guardian():
             guardian = threading.Thread(name="Guardian", target=guard)
 
 
+from .blobstore import blob_store
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
 from .customserver import run_server_process, get_static_server_data
 from .generate import gen_game
+from .upload import ingest_upload
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+import time
+import typing
+
+BLOB_FOLDER = os.path.relpath("blobs")
+
+
+class BlobStore:
+    """Content-addressed storage of large binary data on the local filesystem.
+    Blobs are addressed by the sha256 hexdigest of their content, which is what gets stored in the database."""
+    hash_name = "sha256"
+    chunk_size = 1024 * 1024
+
+    def __init__(self, folder: str = BLOB_FOLDER):
+        self.folder = folder
+
+    def path(self, ref: str) -> str:
+        if len(ref) != 64 or not all(c in "0123456789abcdef" for c in ref):
+            raise ValueError(f"Invalid blob reference {ref!r}")
+        return os.path.join(self.folder, ref[:2], ref)
+
+    def exists(self, ref: str) -> bool:
+        return os.path.isfile(self.path(ref))
+
+    def put(self, data: bytes) -> str:
+        ref = hashlib.new(self.hash_name, data).hexdigest()
+        path = self.path(ref)
+        if os.path.isfile(path):
+            os.utime(path)  # mark as recently used, see sweep
+        else:
+            self._write(path, (data,))
+        return ref
+
+    def put_stream(self, stream: typing.BinaryIO) -> str:
+        """Stores the remaining content of stream, without holding all of it in memory."""
+        os.makedirs(self.folder, exist_ok=True)
+        hasher = hashlib.new(self.hash_name)
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                    hasher.update(chunk)
+                    f.write(chunk)
+            ref = hasher.hexdigest()
+            path = self.path(ref)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return ref
+
+    def open(self, ref: str) -> typing.BinaryIO:
+        return open(self.path(ref), "rb")
+
+    def get(self, ref: str) -> bytes:
+        with self.open(ref) as f:
+            return f.read()
+
+    def delete(self, ref: str, written_before: typing.Optional[float] = None) -> None:
+        """Delete a blob. With written_before, only if it was not written to since then, which put does when it
+        stores the same content again."""
+        path = self.path(ref)
+        try:
+            if written_before is None or os.stat(path).st_mtime < written_before:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, referenced: typing.AbstractSet[str], min_age: float = 24 * 60 * 60) -> int:
+        """Delete blobs that are not in referenced and have not been written to in min_age seconds.
+        The age check protects blobs that were just stored, but whose database rows are not committed yet.
+        Returns the amount of deleted blobs."""
+        if not os.path.isdir(self.folder):
+            return 0
+        cutoff = time.time() - min_age
+        deleted = 0
+        for shard in os.scandir(self.folder):
+            if not shard.is_dir():
+                # leftover of an interrupted put_stream
+                if shard.name.endswith(".tmp") and shard.stat().st_mtime < cutoff:
+                    os.unlink(shard.path)
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name not in referenced and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    deleted += 1
+        return deleted
+
+    def _write(self, path: str, chunks: typing.Iterable[bytes]) -> None:
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        # write to a temporary file first, so concurrent readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+blob_store = BlobStore()
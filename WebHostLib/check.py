@@ -1,16 +1,22 @@
+import argparse
+import concurrent.futures
+import hashlib
+import logging
+import multiprocessing
 import os
+import threading
 import zipfile
 import base64
-from typing import Union, Dict, Set, Tuple
+from typing import Optional, Union, Dict, Set, Tuple
 
 from flask import request, flash, redirect, url_for, render_template
 from markupsafe import Markup
 
-from WebHostLib import app
+from WebHostLib import app, cache
 from WebHostLib.upload import allowed_options, allowed_options_extensions, banned_file
 
 from Generate import roll_settings, PlandoOptions
-from Utils import parse_yamls
+from Utils import parse_yamls, __version__
 
 
 @app.route('/check', methods=['GET', 'POST'])
@@ -25,7 +31,7 @@ def check():
             if isinstance(options, str):
                 flash(options)
             else:
-                results, _ = roll_options(options)
+                results = check_options(options)
                 if len(options) > 1:
                     # offer combined file back
                     combined_yaml = "\n---\n".join(f"# original filename: {file_name}\n{file_content.decode('utf-8-sig')}"
@@ -84,34 +90,98 @@ def get_yaml_data(files) -> Union[Dict[str, str], str, Markup]:
     return options
 
 
+RollResult = Tuple[Union[str, bool], Dict[str, argparse.Namespace]]
+
+_roll_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_roll_pool_lock = threading.Lock()
+
+
+def get_roll_pool() -> Optional[concurrent.futures.ProcessPoolExecutor]:
+    """Lazily created pool of processes to roll options in, None if disabled via ROLL_WORKERS.
+    Workers are spawned rather than forked, as forking the multithreaded web server can copy locks held by other
+    threads into the worker. Spawned workers also get their own random state."""
+    global _roll_pool
+    if app.config["ROLL_WORKERS"] < 2:
+        return None
+    with _roll_pool_lock:
+        if _roll_pool is None:
+            _roll_pool = concurrent.futures.ProcessPoolExecutor(app.config["ROLL_WORKERS"],
+                                                                mp_context=multiprocessing.get_context("spawn"))
+        return _roll_pool
+
+
+def roll_file(filename: str, text: Union[dict, bytes, str], plando_options: PlandoOptions) -> RollResult:
+    """Parses and rolls a single options file, returns True or an error message and the rolled options."""
+    rolled_results = {}
+    try:
+        if type(text) is dict:
+            yaml_datas = (text, )
+        else:
+            yaml_datas = tuple(parse_yamls(text))
+    except Exception as e:
+        return f"Failed to parse YAML data in {filename}: {e}", rolled_results
+    try:
+        if len(yaml_datas) == 1:
+            rolled_results[filename] = roll_settings(yaml_datas[0],
+                                                     plando_options=plando_options)
+        else:
+            for i, yaml_data in enumerate(yaml_datas):
+                rolled_results[f"{filename}/{i + 1}"] = roll_settings(yaml_data,
+                                                                      plando_options=plando_options)
+    except Exception as e:
+        if e.__cause__:
+            return f"Failed to generate options in {filename}: {e} - {e.__cause__}", {}
+        return f"Failed to generate options in {filename}: {e}", {}
+    return True, rolled_results
+
+
 def roll_options(options: Dict[str, Union[dict, str]],
                  plando_options: Set[str] = frozenset({"bosses", "items", "connections", "texts"})) -> \
         Tuple[Dict[str, Union[str, bool]], Dict[str, dict]]:
+    global _roll_pool
     plando_options = PlandoOptions.from_set(set(plando_options))
+    rolls: Dict[str, RollResult] = {}
+    pool = get_roll_pool() if len(options) > 1 else None
+    if pool:
+        try:
+            futures = {filename: pool.submit(roll_file, filename, text, plando_options)
+                       for filename, text in options.items()}
+            rolls = {filename: future.result() for filename, future in futures.items()}
+        except concurrent.futures.process.BrokenProcessPool:
+            logging.exception("Options roll pool broke, rolling in the request thread instead.")
+            rolls = {}
+            with _roll_pool_lock:
+                if _roll_pool is pool:
+                    _roll_pool = None  # gets recreated on next use
+    for filename, text in options.items():
+        if filename not in rolls:
+            rolls[filename] = roll_file(filename, text, plando_options)
+
     results = {}
     rolled_results = {}
+    for filename, (result, rolled) in rolls.items():
+        results[filename] = result
+        rolled_results.update(rolled)
+    return results, rolled_results
+
+
+def check_options(options: Dict[str, Union[bytes, str]]) -> Dict[str, Union[str, bool]]:
+    """Validation results of roll_options, cached by file name and content, so re-checking files is instant."""
+    results = {}
+    unchecked = {}
+    cache_keys = {}
     for filename, text in options.items():
-        try:
-            if type(text) is dict:
-                yaml_datas = (text, )
-            else:
-                yaml_datas = tuple(parse_yamls(text))
-        except Exception as e:
-            results[filename] = f"Failed to parse YAML data in {filename}: {e}"
+        content = text.encode("utf-8") if isinstance(text, str) else text
+        digest = hashlib.sha256(filename.encode("utf-8") + b"\0" + content).hexdigest()
+        cache_keys[filename] = f"check_{__version__}_{digest}"
+        result = cache.get(cache_keys[filename])
+        if result is None:
+            unchecked[filename] = text
         else:
-            try:
-                if len(yaml_datas) == 1:
-                    rolled_results[filename] = roll_settings(yaml_datas[0],
-                                                             plando_options=plando_options)
-                else:
-                    for i, yaml_data in enumerate(yaml_datas):
-                        rolled_results[f"{filename}/{i + 1}"] = roll_settings(yaml_data,
-                                                                              plando_options=plando_options)
-            except Exception as e:
-                if e.__cause__:
-                    results[filename] = f"Failed to generate options in {filename}: {e} - {e.__cause__}"
-                else:
-                    results[filename] = f"Failed to generate options in {filename}: {e}"
-            else:
-                results[filename] = True
-    return results, rolled_results
+            results[filename] = result
+    if unchecked:
+        new_results, _ = roll_options(unchecked)
+        for filename, result in new_results.items():
+            cache.set(cache_keys[filename], result, 24 * 60 * 60)
+        results.update(new_results)
+    return {filename: results[filename] for filename in options}
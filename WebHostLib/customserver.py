@@ -20,8 +20,9 @@ import Utils
 
 from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
 from Utils import restricted_loads, cache_argsless
+from .blobstore import blob_store
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, db, delete_replaced_multisave
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -96,7 +97,7 @@ class WebHostContext(Context):
         else:
             self.port = get_random_port()
 
-        multidata = self.decompress(room.seed.multidata)
+        multidata = self.decompress(room.seed.get_multidata())
         game_data_packages = {}
         for game in list(multidata.get("datapackage", {})):
             game_data = multidata["datapackage"][game]
@@ -116,19 +117,22 @@ class WebHostContext(Context):
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
-            savegame_data = Room.get(id=self.room_id).multisave
+            savegame_data = Room.get(id=self.room_id).get_multisave()
             if savegame_data:
-                self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
+                self.set_save(restricted_loads(savegame_data))
             self._start_async_saving()
         threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
-    @db_session
     def _save(self, exit_save: bool = False) -> bool:
-        room = Room.get(id=self.room_id)
-        room.multisave = pickle.dumps(self.get_save())
-        # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
-        if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
-            room.last_activity = datetime.datetime.utcnow()
+        saved_at = time.time()
+        with db_session:
+            room = Room.get(id=self.room_id)
+            replaced_ref = room.set_multisave(pickle.dumps(self.get_save()))
+            # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
+            if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
+                room.last_activity = datetime.datetime.utcnow()
+        if replaced_ref:
+            delete_replaced_multisave(replaced_ref, saved_at)
         return True
 
     def get_save(self) -> dict:
@@ -161,8 +165,9 @@ def get_static_server_data() -> dict:
 
 def run_server_process(room_id, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
-                       host: str):
+                       host: str, blob_folder: str):
     # establish DB connection for multidata and multisave
+    blob_store.folder = blob_folder
     db.bind(**ponyconfig)
     db.generate_mapping(check_tables=False)
 
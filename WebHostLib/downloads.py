@@ -1,6 +1,9 @@
+import io
 import json
+import struct
+import typing
 import zipfile
-from io import BytesIO
+import zlib
 
 from flask import send_file, Response, render_template
 from pony.orm import select
@@ -10,6 +13,122 @@ from . import app, cache
 from .models import Slot, Room, Seed
 
 
+class _IteratorReader(io.RawIOBase):
+    """Read-only file-like view of an iterator of bytes, so it can be handed to send_file."""
+
+    def __init__(self, iterator: typing.Iterator[bytes]):
+        self._iterator = iterator
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            self._buffer = next(self._iterator, b"")
+            if not self._buffer:
+                return 0
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        close = getattr(self._iterator, "close", None)
+        if close:
+            close()
+        super().close()
+
+
+def _dos_date_time(date_time: typing.Tuple[int, int, int, int, int, int]) -> typing.Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def _stream_zip_with_replacements(source: typing.BinaryIO, replacements: typing.Dict[str, bytes],
+                                  compresslevel: int = 9) -> typing.Tuple[int, typing.Iterator[bytes]]:
+    """Rewrites the zip archive in source, replacing the content of the members named in replacements.
+    All other members are copied through in their compressed form, without being decompressed or held in memory.
+    Returns the size of the resulting archive and an iterator over its bytes."""
+    with zipfile.ZipFile(source) as zf:
+        infos = zf.infolist()
+
+    # plan: (local header, source offset of the compressed data or None, compressed size or replacement data)
+    plan: typing.List[typing.Tuple[bytes, typing.Optional[int], typing.Union[int, bytes]]] = []
+    central_directory: typing.List[bytes] = []
+    offset = 0
+    for info in infos:
+        if max(info.file_size, info.compress_size) >= zipfile.ZIP64_LIMIT or info.header_offset >= zipfile.ZIP64_LIMIT:
+            raise ValueError(f"Can't stream zip64 member {info.filename}.")
+        new_info = zipfile.ZipInfo(info.filename, info.date_time)
+        new_info.external_attr = info.external_attr
+        new_info.create_system = info.create_system
+        new_info.extra = b""
+        new_info.header_offset = offset
+        if info.filename in replacements:
+            compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+            content = replacements[info.filename]
+            data = compressor.compress(content) + compressor.flush()
+            new_info.compress_type = zipfile.ZIP_DEFLATED
+            new_info.CRC = zlib.crc32(content)
+            new_info.file_size = len(content)
+            new_info.compress_size = len(data)
+            source_offset = None
+            payload: typing.Union[int, bytes] = data
+        else:
+            source.seek(info.header_offset)
+            # the local header's extra field may differ from the central directory's, so read its length from there
+            filename_length, extra_length = struct.unpack("<HH", source.read(zipfile.sizeFileHeader)[26:30])
+            source_offset = info.header_offset + zipfile.sizeFileHeader + filename_length + extra_length
+            new_info.compress_type = info.compress_type
+            new_info.CRC = info.CRC
+            new_info.file_size = info.file_size
+            new_info.compress_size = info.compress_size
+            payload = info.compress_size
+        # sizes and CRC are known upfront, so no data descriptor flag; same filename encoding rules as zipfile
+        try:
+            filename = new_info.filename.encode("ascii")
+            new_info.flag_bits = 0
+        except UnicodeEncodeError:
+            filename = new_info.filename.encode("utf-8")
+            new_info.flag_bits = 0x800
+        header = new_info.FileHeader()
+        plan.append((header, source_offset, payload))
+        offset += len(header) + (payload if isinstance(payload, int) else len(payload))
+
+        dos_date, dos_time = _dos_date_time(new_info.date_time)
+        central_directory.append(struct.pack(
+            zipfile.structCentralDir, zipfile.stringCentralDir, new_info.create_version, new_info.create_system,
+            new_info.extract_version, new_info.reserved, new_info.flag_bits, new_info.compress_type, dos_time,
+            dos_date, new_info.CRC, new_info.compress_size, new_info.file_size, len(filename), 0, 0, 0, 0,
+            new_info.external_attr, new_info.header_offset) + filename)
+
+    central_directory_size = sum(len(record) for record in central_directory)
+    end_record = struct.pack(zipfile.structEndArchive, zipfile.stringEndArchive, 0, 0, len(central_directory),
+                             len(central_directory), central_directory_size, offset, 0)
+    total_size = offset + central_directory_size + len(end_record)
+
+    def generate() -> typing.Iterator[bytes]:
+        with source:
+            for header, source_offset, payload in plan:
+                yield header
+                if source_offset is None:
+                    yield payload
+                else:
+                    source.seek(source_offset)
+                    remaining = payload
+                    while remaining:
+                        chunk = source.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            raise EOFError("Truncated zip member.")
+                        remaining -= len(chunk)
+                        yield chunk
+        yield from central_directory
+        yield end_record
+
+    return total_size, generate()
+
+
 @app.route("/dl_patch/<suuid:room_id>/<int:patch_id>")
 def download_patch(room_id, patch_id):
     patch = Slot.get(id=patch_id)
@@ -18,30 +137,30 @@ def download_patch(room_id, patch_id):
     else:
         room = Room.get(id=room_id)
         last_port = room.last_port
-        filelike = BytesIO(patch.data)
+        filelike = patch.open_data()
+        if filelike is None:
+            return "Patch not found"
         greater_than_version_3 = zipfile.is_zipfile(filelike)
         if greater_than_version_3:
-            # Python's zipfile module cannot overwrite/delete files in a zip, so we recreate the whole thing in ram
-            new_file = BytesIO()
-            with zipfile.ZipFile(filelike, "a") as zf:
+            with zipfile.ZipFile(filelike) as zf:
                 with zf.open("archipelago.json", "r") as f:
                     manifest = json.load(f)
-                manifest["server"] = f"{app.config['HOST_ADDRESS']}:{last_port}" if last_port else None
-                with zipfile.ZipFile(new_file, "w") as new_zip:
-                    for file in zf.infolist():
-                        if file.filename == "archipelago.json":
-                            new_zip.writestr("archipelago.json", json.dumps(manifest))
-                        else:
-                            new_zip.writestr(file.filename, zf.read(file), file.compress_type, 9)
+            manifest["server"] = f"{app.config['HOST_ADDRESS']}:{last_port}" if last_port else None
+            # only the manifest gets rewritten, all other members are streamed through unchanged
+            size, content = _stream_zip_with_replacements(
+                filelike, {"archipelago.json": json.dumps(manifest).encode("utf-8")})
             if "patch_file_ending" in manifest:
                 patch_file_ending = manifest["patch_file_ending"]
             else:
                 patch_file_ending = AutoPatchRegister.patch_types[patch.game].patch_file_ending
             fname = f"P{patch.player_id}_{patch.player_name}_{app.jinja_env.filters['suuid'](room_id)}" \
                     f"{patch_file_ending}"
-            new_file.seek(0)
-            return send_file(new_file, as_attachment=True, download_name=fname)
+            response = send_file(io.BufferedReader(_IteratorReader(content), 1024 * 1024),
+                                 as_attachment=True, download_name=fname)
+            response.content_length = size
+            return response
         else:
+            filelike.close()
             return "Old Patch file, no longer compatible."
 
 
@@ -59,26 +178,25 @@ def download_slot_file(room_id, player_id: int):
     if not slot_data:
         return "Slot Data not found"
     else:
-        import io
-
         if slot_data.game == "Minecraft":
             from worlds.minecraft import mc_update_output
             fname = f"AP_{app.jinja_env.filters['suuid'](room_id)}_P{slot_data.player_id}_{slot_data.player_name}.apmc"
-            data = mc_update_output(slot_data.data, server=app.config['HOST_ADDRESS'], port=room.last_port)
+            data = mc_update_output(slot_data.get_data(), server=app.config['HOST_ADDRESS'], port=room.last_port)
             return send_file(io.BytesIO(data), as_attachment=True, download_name=fname)
         elif slot_data.game == "Factorio":
-            with zipfile.ZipFile(io.BytesIO(slot_data.data)) as zf:
+            with slot_data.open_data() as stream, zipfile.ZipFile(stream) as zf:
                 for name in zf.namelist():
                     if name.endswith("info.json"):
                         fname = name.rsplit("/", 1)[0] + ".zip"
         elif slot_data.game == "Ocarina of Time":
-            stream = io.BytesIO(slot_data.data)
-            if zipfile.is_zipfile(stream):
-                with zipfile.ZipFile(stream) as zf:
-                    for name in zf.namelist():
-                        if name.endswith(".zpf"):
-                            fname = name.rsplit(".", 1)[0] + ".apz5"
-            else: # pre-ootr-7.0 support
+            with slot_data.open_data() as stream:
+                is_zip = zipfile.is_zipfile(stream)
+                if is_zip:
+                    with zipfile.ZipFile(stream) as zf:
+                        for name in zf.namelist():
+                            if name.endswith(".zpf"):
+                                fname = name.rsplit(".", 1)[0] + ".apz5"
+            if not is_zip:  # pre-ootr-7.0 support
                 fname = f"AP_{app.jinja_env.filters['suuid'](room_id)}_P{slot_data.player_id}_{slot_data.player_name}.apz5"
         elif slot_data.game == "VVVVVV":
             fname = f"AP_{app.jinja_env.filters['suuid'](room_id)}_SP.apv6"
@@ -94,7 +212,7 @@ def download_slot_file(room_id, player_id: int):
             fname = f"AP+{app.jinja_env.filters['suuid'](room_id)}_P{slot_data.player_id}_{slot_data.player_name}.apmq"
         else:
             return "Game download not supported."
-        return send_file(io.BytesIO(slot_data.data), as_attachment=True, download_name=fname)
+        return send_file(slot_data.open_data(), as_attachment=True, download_name=fname)
 
 
 @app.route("/templates")
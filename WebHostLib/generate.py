@@ -201,13 +201,9 @@ def upload_to_db(folder, sid, owner, race):
         if file.endswith(".zip"):
             with db_session:
                 with zipfile.ZipFile(file) as zfile:
-                    res = upload_zip_to_db(zfile, owner, {"race": race}, sid)
-                if type(res) == "str":
-                    raise Exception(res)
-                elif res:
-                    seed = res
-                    gen = Generation.get(id=seed.id)
-                    if gen is not None:
-                        gen.delete()
-                    return seed.id
+                    seed = upload_zip_to_db(zfile, owner, {"race": race}, sid)
+                gen = Generation.get(id=seed.id)
+                if gen is not None:
+                    gen.delete()
+                return seed.id
     raise Exception("Generation zipfile not found.")
@@ -0,0 +1,115 @@
+"""
+Upgrades the tables of existing WebHost databases to the current models.
+Pony's `generate_mapping(create_tables=True)` only creates missing tables, it never adds or changes columns of existing
+ones, so that is done here, after binding the database and before generating the mapping.
+Tables that get created by generate_mapping are filled from existing data afterwards, see upgrade_data.
+"""
+import logging
+import re
+import typing
+from collections import Counter
+from datetime import date, timedelta
+
+from pony.orm import Database, db_session, select
+
+# table -> columns added to it, with the SQL type they have, by provider
+ADDED_COLUMNS: typing.Dict[str, typing.List[typing.Tuple[str, typing.Dict[str, str]]]] = {
+    "Slot": [("data_ref", {"sqlite": "VARCHAR(64)", "postgres": "VARCHAR(64)", "mysql": "VARCHAR(64)"})],
+    "Room": [("multisave_ref", {"sqlite": "VARCHAR(64)", "postgres": "VARCHAR(64)", "mysql": "VARCHAR(64)"})],
+    "Seed": [("multidata_ref", {"sqlite": "VARCHAR(64)", "postgres": "VARCHAR(64)", "mysql": "VARCHAR(64)"})],
+}
+# table -> columns that changed from Required to Optional, with the SQL type they have, by provider
+NULLABLE_COLUMNS: typing.Dict[str, typing.List[typing.Tuple[str, typing.Dict[str, str]]]] = {
+    "Seed": [("multidata", {"sqlite": "BLOB", "postgres": "BYTEA", "mysql": "LONGBLOB"})],
+}
+
+
+def upgrade_schema(db: Database) -> typing.Set[str]:
+    """Adds missing columns and drops NOT NULL constraints of columns that became optional.
+    Tables that do not exist yet are left to generate_mapping, the names of their entities are returned."""
+    provider = db.provider_name
+    if provider not in ("sqlite", "postgres", "mysql"):
+        logging.warning(f"Can not upgrade the schema of {provider} databases, upgrade it manually if needed.")
+        return set()
+    new_tables: typing.Set[str] = set()
+    with db_session(ddl=True):
+        for entity_name in db.entities.keys() | ADDED_COLUMNS.keys() | NULLABLE_COLUMNS.keys():
+            table = db.provider.normalize_name(entity_name)
+            columns = _get_columns(db, table)
+            if not columns:
+                new_tables.add(entity_name)
+                continue
+            for column, types in ADDED_COLUMNS.get(entity_name, ()):
+                if column not in columns:
+                    logging.info(f"Adding column {column} to {table}.")
+                    db.execute(f"ALTER TABLE {_quote(db, table)} ADD COLUMN {_quote(db, column)} {types[provider]}")
+            for column, types in NULLABLE_COLUMNS.get(entity_name, ()):
+                if not columns[column]:
+                    logging.info(f"Making column {column} of {table} optional.")
+                    _drop_not_null(db, table, column, types[provider])
+    return new_tables
+
+
+def upgrade_data(new_tables: typing.AbstractSet[str]) -> None:
+    """Fills rollup tables that generate_mapping just created from the existing rows, which happens once per database.
+    On a new database there is nothing to fill them from."""
+    if "GamesPlayed" in new_tables:
+        _backfill_games_played()
+
+
+def _backfill_games_played() -> None:
+    from .models import GamesPlayed, Room, Seed
+
+    cutoff = date.today() - timedelta(days=30)  # older days are not shown on the stats page
+    played: typing.Counter[typing.Tuple[date, str]] = Counter()
+    with db_session:
+        room: Room
+        for room in select(room for room in Room if room.creation_time >= cutoff).prefetch(Room.seed, Seed.slots):
+            for slot in room.seed.slots:
+                played[room.creation_time.date(), slot.game] += 1
+        for (day, game), count in played.items():
+            GamesPlayed(day=day, game=game, played=count)
+    if played:
+        logging.info(f"Filled the games played statistics of {len(played)} days and games from existing rooms.")
+
+
+def _quote(db: Database, name: str) -> str:
+    return db.provider.quote_name(name)
+
+
+def _get_columns(db: Database, table: str) -> typing.Dict[str, bool]:
+    """Returns column name -> whether it is nullable, or nothing if the table does not exist."""
+    if db.provider_name == "sqlite":
+        # PRAGMA table_info rows: cid, name, type, notnull, dflt_value, pk
+        return {row[1]: not row[3] for row in db.execute(f"PRAGMA table_info({_quote(db, table)})").fetchall()}
+    schema = "current_schema()" if db.provider_name == "postgres" else "DATABASE()"
+    rows = db.execute(f"SELECT column_name, is_nullable FROM information_schema.columns "
+                      f"WHERE table_schema = {schema} AND table_name = $table", {}, {"table": table}).fetchall()
+    return {name: nullable == "YES" for name, nullable in rows}
+
+
+def _drop_not_null(db: Database, table: str, column: str, sql_type: str) -> None:
+    if db.provider_name == "postgres":
+        db.execute(f"ALTER TABLE {_quote(db, table)} ALTER COLUMN {_quote(db, column)} DROP NOT NULL")
+    elif db.provider_name == "mysql":
+        db.execute(f"ALTER TABLE {_quote(db, table)} MODIFY {_quote(db, column)} {sql_type} NULL")
+    else:
+        # SQLite can't alter columns, so the table is rebuilt without the constraint.
+        # Foreign keys are off during this, as db_session(ddl=True) turns them off for SQLite.
+        create_sql = db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = $table",
+                                {}, {"table": table}).fetchone()[0]
+        index_sqls = [sql for sql, in db.execute("SELECT sql FROM sqlite_master WHERE type = 'index' "
+                                                  "AND tbl_name = $table AND sql IS NOT NULL",
+                                                  {}, {"table": table}).fetchall()]
+        new_table = f"{table}_upgrade"
+        create_sql, replaced = re.subn(rf"^CREATE TABLE {re.escape(_quote(db, table))}",
+                                       f"CREATE TABLE {_quote(db, new_table)}", create_sql)
+        create_sql, dropped = re.subn(rf"({re.escape(_quote(db, column))} {sql_type}) NOT NULL", r"\1", create_sql)
+        if not replaced or not dropped:
+            raise RuntimeError(f"Unexpected schema of {table}: {create_sql}")
+        db.execute(create_sql)
+        db.execute(f"INSERT INTO {_quote(db, new_table)} SELECT * FROM {_quote(db, table)}")
+        db.execute(f"DROP TABLE {_quote(db, table)}")
+        db.execute(f"ALTER TABLE {_quote(db, new_table)} RENAME TO {_quote(db, table)}")
+        for index_sql in index_sqls:
+            db.execute(index_sql)
@@ -8,7 +8,7 @@ from pony.orm import count, commit, db_session
 
 from worlds.AutoWorld import AutoWorldRegister
 from . import app, cache
-from .models import Seed, Room, Command, UUID, uuid4
+from .models import Seed, Room, Command, GamesPlayed, UUID, uuid4
 
 
 def get_world_theme(game_name: str):
@@ -112,6 +112,7 @@ def new_room(seed: UUID):
     if not seed:
         abort(404)
     room = Room(seed=seed, owner=session["_id"], tracker=uuid4())
+    GamesPlayed.add_room(room)
     commit()
     return redirect(url_for("host_room", room=room.id))
 
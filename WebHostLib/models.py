@@ -1,6 +1,11 @@
-from datetime import datetime
+import typing
+from collections import Counter
+from datetime import date, datetime
+from io import BytesIO
 from uuid import UUID, uuid4
-from pony.orm import Database, PrimaryKey, Required, Set, Optional, buffer, LongStr
+from pony.orm import Database, PrimaryKey, Required, Set, Optional, buffer, LongStr, db_session
+
+from .blobstore import blob_store
 
 db = Database()
 
@@ -13,10 +18,28 @@ class Slot(db.Entity):
     id = PrimaryKey(int, auto=True)
     player_id = Required(int)
     player_name = Required(str)
-    data = Optional(bytes, lazy=True)
+    data = Optional(bytes, lazy=True)  # inline storage, only used by rows created before data_ref
+    data_ref = Optional(str, 64, nullable=True)  # blob_store reference
     seed = Optional('Seed')
     game = Required(str)
 
+    @property
+    def has_data(self) -> bool:
+        return bool(self.data_ref) or bool(self.data)
+
+    def open_data(self) -> typing.Optional[typing.BinaryIO]:
+        """Opens the slot's file for reading, without loading it into memory if it's in the blob store."""
+        if self.data_ref:
+            return blob_store.open(self.data_ref)
+        if self.data:
+            return BytesIO(self.data)
+        return None
+
+    def get_data(self) -> typing.Optional[bytes]:
+        if self.data_ref:
+            return blob_store.get(self.data_ref)
+        return self.data or None
+
 
 class Room(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
@@ -25,24 +48,53 @@ class Room(db.Entity):
     owner = Required(UUID, index=True)
     commands = Set('Command')
     seed = Required('Seed', index=True)
-    multisave = Optional(buffer, lazy=True)
+    multisave = Optional(buffer, lazy=True)  # inline storage, only used by rows created before multisave_ref
+    multisave_ref = Optional(str, 64, nullable=True)  # blob_store reference
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
     # Port special value -1 means the server errored out. Another attempt can be made with a page refresh
     last_port = Optional(int, default=lambda: 0)
 
+    def get_multisave(self) -> typing.Optional[bytes]:
+        if self.multisave_ref:
+            return blob_store.get(self.multisave_ref)
+        return self.multisave or None
+
+    def set_multisave(self, data: bytes) -> typing.Optional[str]:
+        """Returns the reference of the replaced multisave blob, if any. As this transaction may still roll back, it is
+        only deleted by delete_replaced_multisave after the commit, or else by the periodic sweep of the autohost."""
+        old_ref = self.multisave_ref
+        self.multisave_ref = blob_store.put(data)
+        self.multisave = None
+        return old_ref if old_ref != self.multisave_ref else None
+
+
+def delete_replaced_multisave(ref: str, replaced_at: float) -> None:
+    """Deletes the blob of a multisave that was replaced at replaced_at, a time.time(), in a committed transaction.
+    It is kept if a room still uses it, or if it was stored again since, possibly for a room that is not committed yet."""
+    with db_session:
+        if Room.exists(multisave_ref=ref):
+            return
+    blob_store.delete(ref, written_before=replaced_at)
+
 
 class Seed(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
     rooms = Set(Room)
-    multidata = Required(bytes, lazy=True)
+    multidata = Optional(bytes, lazy=True)  # inline storage, only used by rows created before multidata_ref
+    multidata_ref = Optional(str, 64, nullable=True)  # blob_store reference
     owner = Required(UUID, index=True)
     creation_time = Required(datetime, default=lambda: datetime.utcnow(), index=True)  # index used by landing page
     slots = Set(Slot)
     spoiler = Optional(LongStr, lazy=True)
     meta = Required(LongStr, default=lambda: "{\"race\": false}")  # additional meta information/tags
 
+    def get_multidata(self) -> bytes:
+        if self.multidata_ref:
+            return blob_store.get(self.multidata_ref)
+        return self.multidata
+
 
 class Command(db.Entity):
     id = PrimaryKey(int, auto=True)
@@ -61,3 +113,28 @@ class Generation(db.Entity):
 class GameDataPackage(db.Entity):
     checksum = PrimaryKey(str)
     data = Required(bytes)
+
+
+class GamesPlayed(db.Entity):
+    """Daily rollup of slots per game in newly created rooms, used by the stats page."""
+    day = Required(date)
+    game = Required(str)
+    played = Required(int, default=0)
+    PrimaryKey(day, game)
+
+    @classmethod
+    def add_room(cls, room: Room) -> None:
+        """Counts the slots of a newly created room.
+        Uses an upsert, as rooms of the same game get created concurrently and a read-then-write would conflict."""
+        day = room.creation_time.date()
+        quote = db.provider.quote_name
+        table, day_column, game_column, played_column = \
+            quote(cls._table_), quote("day"), quote("game"), quote("played")
+        if db.provider_name == "mysql":
+            update = f"ON DUPLICATE KEY UPDATE {played_column} = {played_column} + VALUES({played_column})"
+        else:  # sqlite and postgres
+            update = f"ON CONFLICT ({day_column}, {game_column}) " \
+                     f"DO UPDATE SET {played_column} = {table}.{played_column} + excluded.{played_column}"
+        for game, played in Counter(slot.game for slot in room.seed.slots).items():
+            db.execute(f"INSERT INTO {table} ({day_column}, {game_column}, {played_column}) "
+                       f"VALUES ($day, $game, $played) {update}", {}, {"day": day, "game": game, "played": played})
@@ -13,7 +13,7 @@ from flask import render_template
 from pony.orm import select
 
 from . import app, cache
-from .models import Room
+from .models import GamesPlayed
 
 PLOT_WIDTH = 600
 
@@ -23,12 +23,11 @@ def get_db_data(known_games: typing.Set[str]) -> typing.Tuple[typing.Counter[str
     games_played = defaultdict(Counter)
     total_games = Counter()
     cutoff = date.today() - timedelta(days=30)
-    room: Room
-    for room in select(room for room in Room if room.creation_time >= cutoff):
-        for slot in room.seed.slots:
-            if slot.game in known_games:
-                total_games[slot.game] += 1
-                games_played[room.creation_time.date()][slot.game] += 1
+    for day, game, played in select((entry.day, entry.game, entry.played) for entry in GamesPlayed
+                                    if entry.day >= cutoff):
+        if game in known_games:
+            total_games[game] += played
+            games_played[day][game] += played
     return total_games, games_played
 
 
@@ -73,8 +72,13 @@ def create_game_played_figure(all_games_data: typing.Dict[datetime.date, typing.
 
 
 @app.route('/stats')
-@cache.memoize(timeout=60 * 60)  # regen once per hour should be plenty
 def stats():
+    # the rollup only changes meaningfully per day, so charts get built once per day
+    return render_stats(date.today())
+
+
+@cache.memoize(timeout=24 * 60 * 60)
+def render_stats(day: date):
     from worlds import network_data_package
     known_games = set(network_data_package["games"])
     plot = figure(title="Games Played Per Day", x_axis_type='datetime', x_axis_label="Date",
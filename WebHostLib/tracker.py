@@ -55,8 +55,9 @@ class TrackerData:
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        self._multidata = Context.decompress(room.seed.get_multidata())
+        multisave = room.get_multisave()
+        self._multisave = restricted_loads(multisave) if multisave else {}
         self._tracker_cache = {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
@@ -274,11 +275,21 @@ class TrackerData:
         """
         last_activity: Dict[TeamPlayer, datetime.timedelta] = {}
         now = datetime.datetime.utcnow()
-        for (team, player), timestamp in self._multisave.get("client_activity_timers", []):
+        for (team, player), timestamp in self.get_room_activity_timestamps().items():
             last_activity[team, player] = now - datetime.datetime.utcfromtimestamp(timestamp)
 
         return last_activity
 
+    @_cache_results
+    def get_room_activity_timestamps(self) -> Dict[TeamPlayer, float]:
+        """Retrieves a dictionary of all players and the UTC timestamp of their last activity.
+        Does not include players who have no activity recorded.
+        """
+        return {
+            (team, player): timestamp
+            for (team, player), timestamp in self._multisave.get("client_activity_timers", [])
+        }
+
     @_cache_results
     def get_room_videos(self) -> Dict[TeamPlayer, Tuple[str, str]]:
         """Retrieves a dictionary of any players who have video streaming enabled and their feeds.
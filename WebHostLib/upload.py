@@ -1,15 +1,14 @@
 import base64
 import json
+import os
 import pickle
 import typing
 import uuid
 import zipfile
 import zlib
 
-from io import BytesIO
 from flask import request, flash, redirect, url_for, session, render_template, abort
-from markupsafe import Markup
-from pony.orm import commit, flush, select, rollback
+from pony.orm import commit, db_session, flush, select, rollback
 from pony.orm.core import TransactionIntegrityError
 import schema
 
@@ -20,7 +19,8 @@ from worlds import GamesPackage
 from worlds.Files import AutoPatchRegister
 from worlds.AutoWorld import data_package_checksum
 from . import app
-from .models import Seed, Room, Slot, GameDataPackage
+from .blobstore import blob_store
+from .models import Seed, Room, Slot, GameDataPackage, Generation, STATE_ERROR, STATE_QUEUED
 
 banned_extensions = (".sfc", ".z64", ".n64", ".nes", ".smc", ".sms", ".gb", ".gbc", ".gba")
 allowed_options_extensions = (".yaml", ".json", ".yml", ".txt", ".zip")
@@ -48,7 +48,13 @@ def banned_file(filename: str) -> bool:
     return filename.endswith(banned_extensions)
 
 
-def process_multidata(compressed_multidata, files={}):
+class UploadException(Exception):
+    """An uploaded file could not be turned into a seed, the message is meant for the uploader."""
+
+
+def process_multidata(compressed_multidata, slot_refs={}):
+    """Strips data packages from the multidata and creates the Slot rows for it.
+    slot_refs maps player ids to blob_store references of their files."""
     game_data: GamesPackage
 
     decompressed_multidata = MultiServer.Context.decompress(compressed_multidata)
@@ -60,6 +66,13 @@ def process_multidata(compressed_multidata, files={}):
         for game, game_data in decompressed_multidata["datapackage"].items():
             if game_data.get("checksum"):
                 original_checksum = game_data.pop("checksum")
+                if GameDataPackage.exists(checksum=original_checksum):
+                    # stored packages were validated on their first upload, no need to do so again
+                    decompressed_multidata["datapackage"][game] = {
+                        "version": game_data.get("version", 0),
+                        "checksum": original_checksum,
+                    }
+                    continue
                 game_data = games_package_schema.validate(game_data)
                 game_data = {key: value for key, value in sorted(game_data.items())}
                 game_data["checksum"] = data_package_checksum(game_data)
@@ -85,11 +98,10 @@ def process_multidata(compressed_multidata, files={}):
             # Ignore Player Groups (e.g. item links)
             if slot_info.type == SlotType.group:
                 continue
-            slots.add(Slot(data=files.get(slot, None),
+            slots.add(Slot(data_ref=slot_refs.get(slot, None),
                            player_name=slot_info.name,
                            player_id=slot,
                            game=slot_info.game))
-        flush()  # commit slots
 
     compressed_multidata = compressed_multidata[0:1] + zlib.compress(pickle.dumps(decompressed_multidata), 9)
     return slots, compressed_multidata
@@ -100,27 +112,26 @@ def upload_zip_to_db(zfile: zipfile.ZipFile, owner=None, meta={"race": False}, s
         owner = session["_id"]
     infolist = zfile.infolist()
     if all(allowed_options(file.filename) or file.is_dir() for file in infolist):
-        flash(Markup("Error: Your .zip file only contains options files. "
-                     'Did you mean to <a href="/generate">generate a game</a>?'))
-        return
+        raise UploadException("Your .zip file only contains options files. Did you mean to generate a game?")
 
     spoiler = ""
-    files = {}
+    slot_refs = {}
     multidata = None
 
-    # Load files.
+    # Load files. Patch files get streamed into the blob store one at a time instead of being held in memory.
     for file in infolist:
         handler = AutoPatchRegister.get_handler(file.filename)
         if banned_file(file.filename):
-            return "Uploaded data contained a rom file, which is likely to contain copyrighted material. " \
-                   "Your file was deleted."
+            raise UploadException("Uploaded data contained a rom file, which is likely to contain copyrighted "
+                                  "material. Your file was deleted.")
 
         # AP Container
         elif handler:
-            data = zfile.open(file, "r").read()
-            patch = handler(BytesIO(data))
+            with zfile.open(file, "r") as f:
+                ref = blob_store.put_stream(f)
+            patch = handler(blob_store.path(ref))
             patch.read()
-            files[patch.player] = data
+            slot_refs[patch.player] = ref
 
         # Spoiler
         elif file.filename.endswith(".txt"):
@@ -130,48 +141,86 @@ def upload_zip_to_db(zfile: zipfile.ZipFile, owner=None, meta={"race": False}, s
         elif file.filename.endswith(".archipelago"):
             try:
                 multidata = zfile.open(file).read()
-            except:
-                flash("Could not load multidata. File may be corrupted or incompatible.")
-                multidata = None
+            except Exception as e:
+                raise UploadException("Could not load multidata. File may be corrupted or incompatible.") from e
 
         # Minecraft
         elif file.filename.endswith(".apmc"):
             data = zfile.open(file, "r").read()
             metadata = json.loads(base64.b64decode(data).decode("utf-8"))
-            files[metadata["player_id"]] = data
+            slot_refs[metadata["player_id"]] = blob_store.put(data)
 
         # Factorio
         elif file.filename.endswith(".zip"):
             try:
                 _, _, slot_id, *_ = file.filename.split('_')[0].split('-', 3)
             except ValueError:
-                flash("Error: Unexpected file found in .zip: " + file.filename)
-                return
-            data = zfile.open(file, "r").read()
-            files[int(slot_id[1:])] = data
+                raise UploadException("Unexpected file found in .zip: " + file.filename)
+            with zfile.open(file, "r") as f:
+                slot_refs[int(slot_id[1:])] = blob_store.put_stream(f)
 
         # All other files using the standard MultiWorld.get_out_file_name_base method
         else:
             try:
                 _, _, slot_id, *_ = file.filename.split('.')[0].split('_', 3)
             except ValueError:
-                flash("Error: Unexpected file found in .zip: " + file.filename)
-                return
-            data = zfile.open(file, "r").read()
-            files[int(slot_id[1:])] = data
+                raise UploadException("Unexpected file found in .zip: " + file.filename)
+            with zfile.open(file, "r") as f:
+                slot_refs[int(slot_id[1:])] = blob_store.put_stream(f)
 
     # Load multi data.
     if multidata:
-        slots, multidata = process_multidata(multidata, files)
+        slots, multidata = process_multidata(multidata, slot_refs)
 
-        seed = Seed(multidata=multidata, spoiler=spoiler, slots=slots, owner=owner, meta=json.dumps(meta),
-                    id=sid if sid else uuid.uuid4())
+        # slots get inserted together with the seed, as they reference it
+        seed = Seed(multidata_ref=blob_store.put(multidata), spoiler=spoiler, slots=slots, owner=owner,
+                    meta=json.dumps(meta), id=sid if sid else uuid.uuid4())
         flush()  # create seed
-        for slot in slots:
-            slot.seed = seed
         return seed
     else:
-        flash("No multidata was found in the zip file, which is required.")
+        raise UploadException("No multidata was found in the zip file, which is required.")
+
+
+def get_upload_error(e: BaseException) -> str:
+    if isinstance(e, VersionException):
+        return "Could not load multidata. Wrong Version detected."
+    if isinstance(e, UploadException):
+        return str(e)
+    return e.__class__.__name__ + ": " + str(e)
+
+
+def ingest_upload(path: str, owner: uuid.UUID, sid: uuid.UUID) -> uuid.UUID:
+    """Turns a file stored by /uploads into a Seed with id sid.
+    Runs in a background worker like generation, or in the request if this process does not schedule generations."""
+    try:
+        with db_session:
+            with open(path, "rb") as stream:
+                if zipfile.is_zipfile(stream):
+                    with zipfile.ZipFile(stream) as zfile:
+                        seed = upload_zip_to_db(zfile, owner, sid=sid)
+                else:
+                    stream.seek(0)  # offset from is_zipfile check
+                    try:
+                        slots, multidata = process_multidata(stream.read())
+                    except Exception as e:
+                        raise UploadException(f"Could not load multidata. "
+                                              f"File may be corrupted or incompatible. ({e})") from e
+                    seed = Seed(multidata_ref=blob_store.put(multidata), slots=slots, owner=owner, id=sid)
+            gen = Generation.get(id=sid)
+            if gen is not None:
+                gen.delete()
+            return seed.id
+    except BaseException as e:
+        with db_session:
+            gen = Generation.get(id=sid)
+            if gen is not None:
+                gen.state = STATE_ERROR
+                # meta gets shown to the user, so the server side upload path is left out
+                gen.meta = json.dumps({"error": get_upload_error(e)})
+                commit()
+        raise
+    finally:
+        os.remove(path)
 
 
 @app.route("/uploads", methods=["GET", "POST"])
@@ -186,29 +235,26 @@ def uploads():
             if uploaded_file.filename == "":
                 flash("No selected file.")
             elif uploaded_file and allowed_generation(uploaded_file.filename):
-                if zipfile.is_zipfile(uploaded_file):
-                    with zipfile.ZipFile(uploaded_file, "r") as zfile:
-                        try:
-                            res = upload_zip_to_db(zfile)
-                        except VersionException:
-                            flash(f"Could not load multidata. Wrong Version detected.")
-                        else:
-                            if res is str:
-                                return res
-                            elif res:
-                                return redirect(url_for("view_seed", seed=res.id))
+                sid = uuid.uuid4()
+                os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+                path = os.path.abspath(os.path.join(app.config["UPLOAD_FOLDER"], f"{sid.hex}.upload"))
+                uploaded_file.save(path)
+                if app.config["SELFGEN"]:
+                    # processing happens in the background, the user waits for the seed like for a generation.
+                    # The upload is queued as a Generation without options, meta["upload"] marks it for the autogen
+                    # process and points it to the file, which has to be on this machine.
+                    Generation(id=sid, options=pickle.dumps({}), meta=json.dumps({"upload": path}),
+                               state=STATE_QUEUED, owner=session["_id"])
+                    commit()
+                    return redirect(url_for("wait_seed", seed=sid))
+                # no worker of this process would pick the upload up, so it is processed right away
+                try:
+                    ingest_upload(path, session["_id"], sid)
+                except Exception as e:
+                    rollback()  # drop anything the failed upload created
+                    flash(get_upload_error(e))
                 else:
-                    uploaded_file.seek(0)  # offset from is_zipfile check
-                    # noinspection PyBroadException
-                    try:
-                        multidata = uploaded_file.read()
-                        slots, multidata = process_multidata(multidata)
-                    except Exception as e:
-                        flash(f"Could not load multidata. File may be corrupted or incompatible. ({e})")
-                    else:
-                        seed = Seed(multidata=multidata, slots=slots, owner=session["_id"])
-                        flush()  # place into DB and generate ids
-                        return redirect(url_for("view_seed", seed=seed.id))
+                    return redirect(url_for("view_seed", seed=sid))
             else:
                 flash("Not recognized file format. Awaiting a .archipelago file or .zip containing one.")
     return render_template("hostGame.html", version=__version__)
@@ -20,7 +20,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 ]]
 
-local SCRIPT_VERSION = 1
+local SCRIPT_VERSION = 2
 
 -- Set to log incoming requests
 -- Will cause lag due to large console output
@@ -34,8 +34,17 @@ will have a corresponding response in the same order.
 Every individual request and response is a JSON object with at minimum one
 field `type`. The value of `type` determines what other fields may exist.
 
-To get the script version, instead of JSON, send "VERSION" to get the script
-version directly (e.g. "2").
+A message is a single line starting with a message id followed by a space and
+the JSON list (e.g. `7 [{"type": "PING"}]`). Every message received before a
+frame ends is answered on that frame, so a client can have several messages in
+flight at once. The answer to a message starts with the header line
+`<id> <frame> <json size> <data size>`, followed by that many bytes of the JSON
+list of responses and then that many bytes of binary data. The data holds the
+bytes of every `READ` of the message, in order. The JSON examples below leave
+out the framing.
+
+To get the script version, instead of a message, send "VERSION" to get the
+script version directly as a line (e.g. "2").
 
 #### Ex. 1
 
@@ -69,10 +78,12 @@ Response:
 ```json
 [
     {"type": "GUARD_RESPONSE", "address": 100, "value": true},
-    {"type": "READ_RESPONSE", "value": "dGVzdA=="}
+    {"type": "READ_RESPONSE", "size": 4}
 ]
 ```
 
+The data of the answer is the 4 bytes `test`.
+
 ---
 
 #### Ex. 4
@@ -235,7 +246,8 @@ Response:
     Contains the result of a `READ` request.
 
     Additional Fields:
-    - `value` (`string`): A base64 string representing the read data
+    - `size` (`int`): The number of bytes the read added to the data of the
+    answer
 
 - `WRITE_RESPONSE`  
     Acknowledges `WRITE`.
@@ -320,6 +332,11 @@ end
 
 local message_queue = new_queue()
 
+local unpack = table.unpack or unpack
+
+-- Bytes read by the message currently being processed, sent after its JSON
+local read_data = {}
+
 function lock ()
     locked = true
     client_socket:settimeout(2)
@@ -416,9 +433,15 @@ request_handlers = {
 
     ["READ"] = function (req)
         local res = {}
+        local bytes = memory.read_bytes_as_array(req["address"], req["size"], req["domain"])
+
+        -- string.char takes its bytes as arguments, so convert large reads in chunks
+        for i = 1, #bytes, 4096 do
+            read_data[#read_data + 1] = string.char(unpack(bytes, i, math.min(i + 4095, #bytes)))
+        end
 
         res["type"] = "READ_RESPONSE"
-        res["value"] = base64.encode(memory.read_bytes_as_array(req["address"], req["size"], req["domain"]))
+        res["size"] = #bytes
 
         return res
     end,
@@ -468,7 +491,8 @@ function process_request (req)
     end
 end
 
--- Receive data from AP client and send message back
+-- Receive a message from AP client and send the answer back
+-- Returns true if a message was answered
 function send_receive ()
     local message, err = client_socket:receive()
 
@@ -478,15 +502,15 @@ function send_receive ()
             print("Connection to client closed")
         end
         current_state = STATE_NOT_CONNECTED
-        return
+        return false
     elseif err == "timeout" then
         unlock()
-        return
+        return false
     elseif err ~= nil then
         print(err)
         current_state = STATE_NOT_CONNECTED
         unlock()
-        return
+        return false
     end
 
     -- Reset timeout timer
@@ -501,7 +525,9 @@ function send_receive ()
         client_socket:send(tostring(SCRIPT_VERSION).."\n")
     else
         local res = {}
-        local data = json.decode(message)
+        local message_id, body = message:match("^(%d+) (.*)$")
+        local data = json.decode(body)
+        read_data = {}
         local failed_guard_response = nil
         for i, req in ipairs(data) do
             if failed_guard_response ~= nil then
@@ -523,8 +549,13 @@ function send_receive ()
             end
         end
 
-        client_socket:send(json.encode(res).."\n")
+        local encoded = json.encode(res)
+        local binary = table.concat(read_data)
+        read_data = {}
+        client_socket:send(message_id.." "..emu.framecount().." "..#encoded.." "..#binary.."\n"..encoded..binary)
     end
+
+    return true
 end
 
 function initialize_server ()
@@ -590,9 +621,8 @@ function main ()
                 end
             end
         else
-            repeat
-                send_receive()
-            until not locked
+            -- Answer every message that arrived this frame, and keep going while locked
+            repeat until not send_receive()
 
             if timeout_timer <= 0 then
                 print("Client timed out")
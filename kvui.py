@@ -3,6 +3,7 @@ import logging
 import sys
 import typing
 import re
+import collections
 
 if sys.platform == "win32":
     import ctypes
@@ -63,7 +64,7 @@ from kivy.uix.popup import Popup
 
 fade_in_animation = Animation(opacity=0, duration=0) + Animation(opacity=1, duration=0.25)
 
-from NetUtils import JSONtoTextParser, JSONMessagePart, SlotType
+from NetUtils import JSONtoTextParser, JSONMessagePart, SlotType, hint_key
 from Utils import async_start
 
 if typing.TYPE_CHECKING:
@@ -270,6 +271,9 @@ class SelectableLabel(RecycleDataViewBehavior, TooltipLabel):
     def refresh_view_attrs(self, rv, index, data):
         """ Catch and handle the view changes """
         self.index = index
+        if "json" in data:
+            # markup is only created once a row becomes visible, then kept in the (possibly shared) entry
+            data["text"] = data.pop("parser")(data.pop("json"))
         return super(SelectableLabel, self).refresh_view_attrs(
             rv, index, data)
 
@@ -372,7 +376,7 @@ class HintLabel(RecycleDataViewBehavior, BoxLayout):
             else:
                 logging.warning("Did not find clicked header for sorting.")
 
-            App.get_running_app().update_hints()
+            parent.sort_hints()
 
     def apply_selection(self, rv, index, is_selected):
         """ Respond to the selection of items in the view. """
@@ -418,6 +422,7 @@ class GameManager(App):
     def __init__(self, ctx: context_type):
         self.title = self.base_title
         self.ctx = ctx
+        ctx.want_hint_deltas = True  # the hints tab only rebuilds the rows of changed hints
         self.commandprocessor = ctx.command_processor(ctx)
         self.icon = r"data/icon.png"
         self.json_to_kivy_parser = KivyJSONtoTextParser(ctx)
@@ -578,9 +583,9 @@ class GameManager(App):
             logging.getLogger("Client").exception(e)
 
     def print_json(self, data: typing.List[JSONMessagePart]):
-        text = self.json_to_kivy_parser(data)
-        self.log_panels["Archipelago"].on_message_markup(text)
-        self.log_panels["All"].on_message_markup(text)
+        entry = {"json": data, "parser": self.json_to_kivy_parser}
+        self.log_panels["Archipelago"].add_entry(entry)
+        self.log_panels["All"].add_entry(entry)
 
     def focus_textinput(self):
         if hasattr(self, "textinput"):
@@ -602,9 +607,12 @@ class GameManager(App):
         if hasattr(self, "energy_link_label"):
             self.energy_link_label.text = f"EL: {Utils.format_SI_prefix(self.ctx.current_energy_link_value)}J"
 
-    def update_hints(self):
-        hints = self.ctx.stored_data[f"_read_hints_{self.ctx.team}_{self.ctx.slot}"]
-        self.log_panels["Hints"].refresh_hints(hints)
+    def update_hints(self, delta: typing.Optional[typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]] = None):
+        if delta is None:
+            hints = self.ctx.stored_data[f"_read_hints_{self.ctx.team}_{self.ctx.slot}"]
+            self.log_panels["Hints"].refresh_hints(hints)
+        else:
+            self.log_panels["Hints"].update_hints(delta["added"] + delta["changed"])
 
     # default F1 keybind, opens a settings menu, that seems to break the layout engine once closed
     def open_settings(self, *largs):
@@ -632,25 +640,32 @@ class LogtoUI(logging.Handler):
 
 
 class UILog(RecycleView):
+    """Log panel. Entries are collected in a ring buffer of the last `messages` entries and handed to the view once per
+    frame, so bursts of messages only cause one refresh."""
     messages: typing.ClassVar[int]  # comes from kv file
 
     def __init__(self, *loggers_to_handle, **kwargs):
         super(UILog, self).__init__(**kwargs)
         self.data = []
+        self.entries: typing.Deque[typing.Dict[str, typing.Any]] = collections.deque(maxlen=self.messages)
+        self.flush_trigger = Clock.create_trigger(self.flush)
         for logger in loggers_to_handle:
             logger.addHandler(LogtoUI(self.on_log))
 
     def on_log(self, record: str) -> None:
-        self.data.append({"text": escape_markup(record)})
-        self.clean_old()
+        self.add_entry({"text": escape_markup(record)})
 
     def on_message_markup(self, text):
-        self.data.append({"text": text})
-        self.clean_old()
+        self.add_entry({"text": text})
+
+    def add_entry(self, entry: typing.Dict[str, typing.Any]) -> None:
+        """Queue a view entry, either {"text": markup} or {"json": parts, "parser": parser} to be converted to markup
+        once it is shown."""
+        self.entries.append(entry)
+        self.flush_trigger()
 
-    def clean_old(self):
-        if len(self.data) > self.messages:
-            self.data.pop(0)
+    def flush(self, dt=None) -> None:
+        self.data = list(self.entries)
 
     def fix_heights(self):
         """Workaround fix for divergent texture and layout heights"""
@@ -677,11 +692,16 @@ class HintLog(RecycleView):
         super(HintLog, self).__init__()
         self.data = [self.header]
         self.parser = parser
+        self.hint_rows: typing.Dict[typing.Tuple[int, int, int, int, str], typing.Dict[str, typing.Any]] = {}
 
     def refresh_hints(self, hints):
-        data = []
+        self.hint_rows = {}
+        self.update_hints(hints)
+
+    def update_hints(self, hints):
+        """Add the given hints or replace their previous rows, only creating the markup of those."""
         for hint in hints:
-            data.append({
+            self.hint_rows[hint_key(hint)] = {
                 "receiving": {"text": self.parser.handle_node({"type": "player_id", "text": hint["receiving_player"]})},
                 "item": {"text": self.parser.handle_node(
                     {"type": "item_id", "text": hint["item"], "flags": hint["item_flags"]})},
@@ -693,11 +713,13 @@ class HintLog(RecycleView):
                 "found": {
                     "text": self.parser.handle_node({"type": "color", "color": "green" if hint["found"] else "red",
                                                      "text": "Found" if hint["found"] else "Not Found"})},
-            })
+            }
+        self.sort_hints()
 
-        data.sort(key=self.hint_sorter, reverse=self.reversed)
-        for i in range(0, len(data), 2):
-            data[i]["striped"] = True
+    def sort_hints(self):
+        data = sorted(self.hint_rows.values(), key=self.hint_sorter, reverse=self.reversed)
+        for i, row in enumerate(data):
+            row["striped"] = not i % 2
         data.insert(0, self.header)
         self.data = data
 
@@ -28,18 +28,14 @@ _lock = Lock()
 
 
 def _update_cache() -> None:
-    """Load all worlds and update world_settings_name_cache"""
+    """Update world_settings_name_cache from the world manifest, loading all worlds if there is none"""
     global _world_settings_name_cache_updated
     if _world_settings_name_cache_updated:
         return
 
     try:
-        from worlds.AutoWorld import AutoWorldRegister
-        for world in AutoWorldRegister.world_types.values():
-            annotation = world.__annotations__.get("settings", None)
-            if annotation is None or annotation == "ClassVar[Optional['Group']]":
-                continue
-            _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
+        from worlds import get_world_settings_names
+        _world_settings_name_cache.update(get_world_settings_names())
     finally:
         _world_settings_name_cache_updated = True
 
@@ -403,26 +399,37 @@ class FilePath(Path):
             view = memoryview(block)
             while n := f.readinto(view):  # type: ignore
                 file_md5.update(view[:n])
-            file_md5_hex = file_md5.hexdigest()
-            for valid_md5 in cls.md5s:
-                if isinstance(valid_md5, str):
-                    if valid_md5.lower() == file_md5_hex:
-                        break
-                elif valid_md5 == file_md5.digest():
-                    break
-            else:
-                raise ValueError(f"Hashes do not match for {cls.__name__}")
+            cls._validate_md5(file_md5.hexdigest())
         finally:
             f.seek(pos)
 
+    @classmethod
+    def _validate_file_hashes(cls, path: str, offset: int = 0) -> None:
+        """Helper to validate a file from offset on against hashes, using the digest cached for unchanged files"""
+        if not cls.md5s:
+            return  # no hashes to validate against
+
+        from Utils import get_file_md5
+        cls._validate_md5(get_file_md5(path, offset))
+
+    @classmethod
+    def _validate_md5(cls, file_md5_hex: str) -> None:
+        for valid_md5 in cls.md5s:
+            if isinstance(valid_md5, str):
+                if valid_md5.lower() == file_md5_hex:
+                    break
+            elif valid_md5 == bytes.fromhex(file_md5_hex):
+                break
+        else:
+            raise ValueError(f"Hashes do not match for {cls.__name__}")
+
     @classmethod
     def validate(cls, path: str) -> None:
         """Try to open and validate file against hashes"""
-        with open(path, "rb", buffering=0) as f:
-            try:
-                cls._validate_stream_hashes(f)
-            except ValueError:
-                raise ValueError(f"File hash does not match for {path}")
+        try:
+            cls._validate_file_hashes(path)
+        except ValueError:
+            raise ValueError(f"File hash does not match for {path}")
 
 
 class FolderPath(Path):
@@ -480,20 +487,18 @@ class SNESRomPath(UserFilePath):
     @classmethod
     def validate(cls, path: str) -> None:
         """Try to open and validate file against hashes"""
-        with open(path, "rb", buffering=0) as f:
-            f.seek(0, os.SEEK_END)
-            size = f.tell()
-            if size % 1024 == 512:
-                f.seek(512)  # skip header
-            elif size % 1024 == 0:
-                f.seek(0)  # header-less
-            else:
-                raise ValueError(f"Unexpected file size for {path}")
+        size = os.path.getsize(path)
+        if size % 1024 == 512:
+            offset = 512  # skip header
+        elif size % 1024 == 0:
+            offset = 0  # header-less
+        else:
+            raise ValueError(f"Unexpected file size for {path}")
 
-            try:
-                cls._validate_stream_hashes(f)
-            except ValueError:
-                raise ValueError(f"File hash does not match for {path}")
+        try:
+            cls._validate_file_hashes(path, offset)
+        except ValueError:
+            raise ValueError(f"File hash does not match for {path}")
 
 
 # World-independent setting groups
@@ -665,6 +670,13 @@ class GeneratorOptions(Group):
         OFF = 0
         ON = 1
 
+    class OutputProcesses(int):
+        """Amount of processes to generate output files on, for worlds that support it.
+        Requires forking processes, so it is not available on Windows. 0 generates all output on threads."""
+
+    class ZipLevel(int):
+        """Compression level of the output archive, from 0 for no compression to 9 for the smallest archive."""
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -673,6 +685,8 @@ class GeneratorOptions(Group):
     spoiler: Spoiler = Spoiler(3)
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
+    output_processes: OutputProcesses = OutputProcesses(0)
+    zip_level: ZipLevel = ZipLevel(9)
 
 
 class SNIOptions(Group):
@@ -722,6 +736,7 @@ class Settings(Group):
     bizhawkclient_options: BizHawkClientOptions = BizHawkClientOptions()
 
     _filename: Optional[str] = None
+    _exiting: bool = False
 
     def __getattribute__(self, key: str) -> Any:
         if key.startswith("_") or key in self.__class__.__dict__:
@@ -741,6 +756,12 @@ class Settings(Group):
                 return super().__getattribute__(key)
             # directly import world and grab settings class
             world_mod, world_cls_name = _world_settings_name_cache[key].rsplit(".", 1)
+            if world_mod not in sys.modules:
+                if self._exiting:
+                    # worlds may not be importable during interpreter shutdown, keep the section as it was read
+                    return super().__getattribute__(key)
+                from worlds import load_world_module
+                load_world_module(world_mod)
             world = cast(type, getattr(__import__(world_mod, fromlist=[world_cls_name]), world_cls_name))
             assert getattr(world, "settings_key") == key
             try:
@@ -793,6 +814,7 @@ class Settings(Group):
                 assert "pytest" not in main_file and "unittest" not in main_file, \
                        f"Auto-saving {self._filename} during unittests"
             if self._filename and self.changed and not skip_autosave:
+                self._exiting = True
                 self.save()
 
         if not skip_autosave:
@@ -818,7 +840,9 @@ class Settings(Group):
     def dump(self, f: TextIO, level: int = 0) -> None:
         # load all world setting classes
         _update_cache()
-        for key in _world_settings_name_cache:
+        for key, world_name in _world_settings_name_cache.items():
+            if self._exiting and world_name.rsplit(".", 1)[0] not in sys.modules:
+                continue  # see __getattribute__
             self.__getattribute__(key)  # load all worlds
         super().dump(f, level)
 
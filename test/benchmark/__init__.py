@@ -5,3 +5,7 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import startup
+    startup.run_startup_benchmark()
+    import item_pool
+    item_pool.run_item_pool_benchmark()
@@ -0,0 +1,72 @@
+def run_item_pool_benchmark():
+    """Compares the item pool bookkeeping of generation on a plain list with the MultiWorld.ItemPool, at growing pool
+    sizes. The quadratic list versions are only run up to max_list_size items."""
+    import logging
+    import random
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import Item, ItemClassification, MultiWorld
+    from worlds.AutoWorld import _check_duplicate_items
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    sizes = (1_000, 10_000, 100_000)
+    max_list_size = 10_000
+    players = 10
+    names = 1_000
+
+    def create_pool(size: int) -> typing.List[Item]:
+        return [Item(f"Item {i % names}", ItemClassification.filler, i, i % players + 1) for i in range(size)]
+
+    def list_duplicate_check(new_items: typing.List[Item]) -> None:
+        for i, item in enumerate(new_items):
+            for other in new_items[i + 1:]:
+                assert item is not other
+
+    def list_remove(pool: typing.List[Item], removed: typing.List[Item]) -> None:
+        for item in removed:
+            pool.remove(item)
+
+    def list_count(pool: typing.List[Item], shared: typing.Set[str]) -> typing.Dict[int, typing.Dict[str, int]]:
+        counters = {player: {name: 0 for name in shared} for player in range(1, players + 1)}
+        for item in pool:
+            if item.name in shared:
+                counters[item.player][item.name] += 1
+        return counters
+
+    multiworld = MultiWorld(players)
+    for size in sizes:
+        items = create_pool(size)
+        removed = random.Random(size).sample(items, size // 10)
+        removed_counts = typing.Counter((item.player, item.name) for item in removed)
+        shared = {f"Item {i}" for i in range(0, names, 10)}
+
+        with TimeIt(f"{size} items into ItemPool", logger):
+            multiworld.itempool = items
+        with TimeIt(f"{size} items duplicate check", logger):
+            _check_duplicate_items(multiworld, items)
+        with TimeIt(f"{size} items counting item link candidates with ItemPool", logger):
+            {player: {name: multiworld.itempool.count_name(name, player) for name in shared}
+             for player in range(1, players + 1)}
+        with TimeIt(f"{size} items removing {len(removed)} with ItemPool", logger):
+            multiworld.itempool.remove_counts(removed_counts)
+
+        with TimeIt(f"{size} items counting item link candidates in a list", logger):
+            list_count(items, shared)
+        if size > max_list_size:
+            logger.info(f"Skipping the quadratic list versions for {size} items.")
+            continue
+        with TimeIt(f"{size} items duplicate check in a list", logger):
+            list_duplicate_check(items)
+        with TimeIt(f"{size} items removing {len(removed)} from a list", logger):
+            list_remove(items.copy(), removed)
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_item_pool_benchmark()
@@ -0,0 +1,257 @@
+"""Load tests MultiServer with a simulated client, built on CommonContext, for each slot of a multidata file.
+The clients replay LocationChecks, Say, Bounce, Get, Set and LocationScouts at configurable rates per slot, and the time
+from each request to the packet answering it is reported as percentiles, next to the achieved throughput.
+A local MultiServer.py is started for the multidata, unless --connect points to one that is already running."""
+import asyncio
+import collections
+import random
+import time
+import typing
+
+
+OPERATIONS: typing.Dict[str, float] = {
+    "checks": 0.5,
+    "say": 0.05,
+    "bounce": 0.2,
+    "get": 0.2,
+    "set": 0.2,
+    "scouts": 0.1,
+}
+"""Operation -> default requests per second and slot"""
+
+
+class LoadStats:
+    sent: typing.Counter[str]
+    latencies: typing.Dict[str, typing.List[float]]
+
+    def __init__(self) -> None:
+        self.sent = collections.Counter()
+        self.latencies = collections.defaultdict(list)
+
+    def report(self, duration: float) -> typing.List[str]:
+        lines = [f"{'operation':<10}{'sent':>9}{'answered':>10}{'per s':>9}"
+                 f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+        for operation in ("connect", *OPERATIONS):
+            latencies = sorted(self.latencies[operation])
+            if not latencies:
+                continue
+            throughput = f"{len(latencies) / duration:.1f}" if operation != "connect" else ""
+            lines.append(f"{operation:<10}{self.sent[operation]:>9}{len(latencies):>10}{throughput:>9}" +
+                         "".join(f"{percentile(latencies, fraction) * 1000:>9.1f}" for fraction in (0.5, 0.9, 0.99)) +
+                         f"{latencies[-1] * 1000:>9.1f}")
+        return lines
+
+
+def percentile(sorted_values: typing.Sequence[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def load_slots(multidata_path: str) -> typing.List[typing.Tuple[str, str]]:
+    """Returns the name and game of every player slot in a .archipelago file or a zip containing one."""
+    import zipfile
+
+    from MultiServer import Context
+    from NetUtils import SlotType
+
+    if zipfile.is_zipfile(multidata_path):
+        with zipfile.ZipFile(multidata_path) as zf:
+            name = next(name for name in zf.namelist() if name.endswith(".archipelago"))
+            data = zf.read(name)
+    else:
+        with open(multidata_path, "rb") as f:
+            data = f.read()
+    decoded = Context.decompress(data)
+    slot_info = decoded["slot_info"]
+    return [(name, slot_info[slot].game) for name, (team, slot) in decoded["connect_names"].items()
+            if slot_info[slot].type == SlotType.player]
+
+
+async def wait_for_server(host: str, port: int, timeout: float) -> None:
+    end = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > end:
+                raise
+            await asyncio.sleep(0.2)
+        else:
+            writer.close()
+            return
+
+
+def run_server_load_benchmark(args: typing.Optional[typing.List[str]] = None) -> LoadStats:
+    import argparse
+    import logging
+    import subprocess
+    import sys
+
+    from CommonClient import CommonContext, server_loop
+    from Utils import init_logging, local_path
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("multidata", help="Path to the .archipelago or zip file to take the slots from.")
+    parser.add_argument("--connect", help="Address of a running server for the multidata, "
+                                          "by default a local MultiServer.py is started.")
+    parser.add_argument("--port", type=int, default=38290, help="Port for the local server.")
+    parser.add_argument("--password", help="Server password of the room.")
+    parser.add_argument("--slots", type=int, help="Only simulate this many slots, all by default.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to replay traffic for.")
+    parser.add_argument("--connect-rate", type=float, default=100, help="New connections per second.")
+    parser.add_argument("--connect-timeout", type=float, default=60,
+                        help="Seconds to wait for all slots to be connected.")
+    for operation, rate in OPERATIONS.items():
+        parser.add_argument(f"--{operation}", type=float, default=rate,
+                            help=f"{operation} requests per second and slot (default: %(default)s)")
+    options = parser.parse_args(args)
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+    logging.getLogger("Client").setLevel(logging.ERROR)
+
+    class LoadTestContext(CommonContext):
+        tags = {"AP"}
+        items_handling = 0b111
+
+        def __init__(self, server_address: str, password: typing.Optional[str], name: str, game: str,
+                     stats: LoadStats) -> None:
+            super().__init__(server_address, password)
+            self.auth = name
+            self.game = game
+            self.stats = stats
+            self.connected_event = asyncio.Event()
+            self.pending: typing.Dict[typing.Tuple[str, typing.Any], float] = {}
+            self.sequence = 0
+
+        async def prepare_data_package(self, relevant_games: typing.Set[str],
+                                       remote_date_package_versions: typing.Dict[str, int],
+                                       remote_data_package_checksums: typing.Dict[str, str]) -> None:
+            pass  # names are not needed, and thousands of clients downloading them at once is not what is tested
+
+        async def server_auth(self, password_requested: bool = False) -> None:
+            await self.send_connect()
+
+        def on_print_json(self, args: dict) -> None:
+            if args.get("type") == "Chat" and args.get("slot") == self.slot:
+                self.answered("say", args["message"])
+
+        def on_package(self, cmd: str, args: dict) -> None:
+            if cmd == "Connected":
+                self.connected_event.set()
+            elif cmd == "RoomUpdate":
+                for location in args.get("checked_locations", ()):
+                    self.answered("checks", location)
+            elif cmd == "LocationInfo":
+                for item in args["locations"]:
+                    self.answered("scouts", item.location)
+            elif cmd == "Bounced":
+                self.answered("bounce", args.get("data", {}).get("load_test_id"))
+            elif cmd in ("Retrieved", "SetReply"):
+                self.answered("get" if cmd == "Retrieved" else "set", args.get("load_test_id"))
+
+        def answered(self, operation: str, key: typing.Any) -> None:
+            start = self.pending.pop((operation, key), None)
+            if start is not None:
+                self.stats.latencies[operation].append(time.perf_counter() - start)
+
+        async def request(self, operation: str, key: typing.Any, msg: typing.Dict[str, typing.Any]) -> None:
+            self.pending[operation, key] = time.perf_counter()
+            self.stats.sent[operation] += 1
+            await self.send_msgs([msg])
+
+        async def send_operation(self, operation: str) -> None:
+            self.sequence += 1
+            data_key = f"load_test_{self.team}_{self.slot}"
+            if operation == "checks":
+                if self.missing_locations:
+                    location = self.missing_locations.pop()
+                    self.locations_checked.add(location)
+                    await self.request(operation, location, {"cmd": "LocationChecks", "locations": [location]})
+            elif operation == "say":
+                text = f"load test {self.slot} {self.sequence}"
+                await self.request(operation, text, {"cmd": "Say", "text": text})
+            elif operation == "bounce":
+                await self.request(operation, self.sequence, {"cmd": "Bounce", "slots": [self.slot],
+                                                              "data": {"load_test_id": self.sequence}})
+            elif operation == "get":
+                await self.request(operation, self.sequence, {"cmd": "Get", "keys": [data_key],
+                                                              "load_test_id": self.sequence})
+            elif operation == "set":
+                await self.request(operation, self.sequence, {"cmd": "Set", "key": data_key, "default": 0,
+                                                              "want_reply": True, "load_test_id": self.sequence,
+                                                              "operations": [{"operation": "add", "value": 1}]})
+            elif operation == "scouts":
+                if self.server_locations:
+                    location = random.choice(tuple(self.server_locations))
+                    if ("scouts", location) not in self.pending:
+                        await self.request(operation, location, {"cmd": "LocationScouts", "locations": [location]})
+
+        async def replay(self, rates: typing.Dict[str, float], duration: float) -> None:
+            """Sends random operations with exponentially distributed pauses, so each happens at its rate on average."""
+            operations, weights = zip(*((operation, rate) for operation, rate in rates.items() if rate > 0))
+            total_rate = sum(weights)
+            end = time.perf_counter() + duration
+            while True:
+                await asyncio.sleep(random.expovariate(total_rate))
+                if time.perf_counter() >= end or not self.server or self.server.socket.closed:
+                    break
+                await self.send_operation(random.choices(operations, weights)[0])
+
+    async def run_load_test(address: str) -> LoadStats:
+        stats = LoadStats()
+        contexts: typing.List[LoadTestContext] = []
+        connect_times: typing.List[float] = []
+
+        async def connect(ctx: LoadTestContext) -> None:
+            start = time.perf_counter()
+            ctx.server_task = asyncio.create_task(server_loop(ctx), name=f"load test {ctx.auth}")
+            await ctx.connected_event.wait()
+            connect_times.append(time.perf_counter() - start)
+
+        connecting: typing.List["asyncio.Task[None]"] = []
+        for name, game in slots:
+            ctx = LoadTestContext(address, options.password, name, game, stats)
+            contexts.append(ctx)
+            connecting.append(asyncio.create_task(connect(ctx)))
+            await asyncio.sleep(1 / options.connect_rate)
+        stats.sent["connect"] = len(contexts)
+        _, not_connected = await asyncio.wait(connecting, timeout=options.connect_timeout)
+        for task in not_connected:
+            task.cancel()
+        stats.latencies["connect"] = connect_times
+        logger.info(f"Connected {len(connect_times)} of {len(contexts)} slots, "
+                    f"replaying traffic for {options.duration} seconds.")
+
+        connected = [ctx for ctx in contexts if ctx.connected_event.is_set()]
+        await asyncio.gather(*(ctx.replay(rates, options.duration) for ctx in connected))
+        await asyncio.sleep(min(5.0, options.duration))  # let late answers arrive
+        await asyncio.gather(*(ctx.shutdown() for ctx in contexts), return_exceptions=True)
+        return stats
+
+    slots = load_slots(options.multidata)[:options.slots]
+    rates = {operation: getattr(options, operation) for operation in OPERATIONS}
+    server: typing.Optional[subprocess.Popen] = None
+    address = options.connect
+    if not address:
+        server = subprocess.Popen([sys.executable, local_path("MultiServer.py"), options.multidata,
+                                   "--host", "127.0.0.1", "--port", str(options.port), "--disable_save",
+                                   "--loglevel", "warning"],
+                                  cwd=local_path(), stdin=subprocess.PIPE)
+        address = f"127.0.0.1:{options.port}"
+    try:
+        if server:
+            asyncio.run(wait_for_server("127.0.0.1", options.port, 60))
+        logger.info(f"Simulating {len(slots)} slots against {address}.")
+        stats = asyncio.run(run_load_test(address))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    logger.info("\n".join(stats.report(options.duration)))
+    return stats
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_server_load_benchmark()
@@ -0,0 +1,200 @@
+"""Measures start-up of the entry points, each in a fresh interpreter, and writes the results to a JSON report.
+Reports of different versions can be compared with --compare."""
+import typing
+
+# marks the line the child interpreter reports its measurements on
+RESULT_PREFIX = "STARTUP_BENCHMARK_RESULT "
+
+# name -> (import, first useful action), both run in a fresh interpreter in the Archipelago folder
+ENTRY_POINTS: typing.Dict[str, typing.Tuple[str, str]] = {
+    "Generate": (
+        "import Generate",
+        "Generate.roll_settings({'game': 'Clique', 'name': 'Player', 'Clique': {}})",
+    ),
+    "MultiServer": (
+        "import MultiServer",
+        "MultiServer.Context('localhost', 38281, None, None, 1, 10, False)",
+    ),
+    "Launcher": (
+        "import Launcher",
+        "Launcher.identify('Text Client')",
+    ),
+    "CommonClient": (
+        "import CommonClient",
+        "import asyncio\n"
+        "async def create_context(): return CommonClient.CommonContext(None, None)\n"
+        "asyncio.run(create_context())",
+    ),
+    "WebHost": (
+        "import WebHost\n"
+        "from WebHostLib import app as raw_app\n"
+        "raw_app.config['PONY'] = {'provider': 'sqlite', 'filename': ':memory:', 'create_db': True}\n"
+        "raw_app.config.update({'TESTING': True, 'HOST_ADDRESS': 'localhost', 'BLOB_FOLDER': blob_folder})\n"
+        "app = WebHost.get_app()",
+        "assert app.test_client().get('/').status_code == 200",
+    ),
+}
+
+CHILD_TEMPLATE = """
+import time
+start = time.perf_counter()
+import json, os, sys, tempfile
+if {skip_update!r}:
+    import ModuleUpdate
+    ModuleUpdate._skip_update = ModuleUpdate.update_ran = True
+
+
+def get_rss():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+blob_dir = tempfile.TemporaryDirectory()  # removed when the child exits
+blob_folder = blob_dir.name
+{import_code}
+imported = time.perf_counter()
+rss_imported = get_rss()
+{action_code}
+done = time.perf_counter()
+print({result_prefix!r} + json.dumps({{
+    "import_time": imported - start,
+    "action_time": done - imported,
+    "rss_imported": rss_imported,
+    "rss_done": get_rss(),
+}}))
+"""
+
+
+class ImportNode(typing.TypedDict):
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: typing.List["ImportNode"]
+
+
+def parse_import_time(stderr: str, min_us: int = 0) -> typing.List[ImportNode]:
+    """Turns the output of -X importtime into a tree, dropping imports that took less than min_us cumulatively."""
+    # importtime lists children before their parent, so collect nodes per depth until their parent shows up
+    pending: typing.Dict[int, typing.List[ImportNode]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node: ImportNode = {
+            "name": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+
+    def prune(nodes: typing.List[ImportNode]) -> typing.List[ImportNode]:
+        kept = [node for node in nodes if node["cumulative_us"] >= min_us]
+        for node in kept:
+            node["children"] = prune(node["children"])
+        return kept
+
+    return prune(pending.get(0, []))
+
+
+def run_entry_point(name: str, skip_update: bool, min_us: int) -> typing.Dict[str, typing.Any]:
+    import json
+    import subprocess
+    import sys
+    import time
+
+    from Utils import local_path
+
+    import_code, action_code = ENTRY_POINTS[name]
+    code = CHILD_TEMPLATE.format(skip_update=skip_update, import_code=import_code, action_code=action_code,
+                                 result_prefix=RESULT_PREFIX)
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=local_path(),
+                             stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    wall_time = time.perf_counter() - start
+    result: typing.Dict[str, typing.Any] = {"wall_time": wall_time, "returncode": process.returncode}
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result.update(json.loads(line[len(RESULT_PREFIX):]))
+            break
+    else:
+        result["error"] = [line for line in process.stderr.splitlines() if not line.startswith("import time:")][-5:]
+    result["imports"] = parse_import_time(process.stderr, min_us)
+    return result
+
+
+def compare_reports(old: typing.Dict[str, typing.Any], new: typing.Dict[str, typing.Any]) -> typing.List[str]:
+    lines = [f"{old['version']} -> {new['version']}"]
+    for name, result in new["entry_points"].items():
+        old_result = old["entry_points"].get(name)
+        if not old_result:
+            continue
+        for key in ("wall_time", "import_time", "action_time"):
+            if key in result and key in old_result:
+                lines.append(f"  {name} {key}: {old_result[key]:.3f}s -> {result[key]:.3f}s "
+                             f"({result[key] - old_result[key]:+.3f}s)")
+        if result.get("rss_done") and old_result.get("rss_done"):
+            lines.append(f"  {name} rss: {old_result['rss_done'] / 2 ** 20:.1f}MiB -> "
+                         f"{result['rss_done'] / 2 ** 20:.1f}MiB")
+    return lines
+
+
+def run_startup_benchmark(args: typing.Optional[typing.List[str]] = None) -> typing.Dict[str, typing.Any]:
+    import argparse
+    import json
+    import logging
+    import platform
+    import sys
+
+    from Utils import init_logging, __version__
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("entry_points", nargs="*",
+                        help=f"Entry points to measure, out of {', '.join(ENTRY_POINTS)}. All by default.")
+    parser.add_argument("--output", default="startup_benchmark.json", help="Path to write the JSON report to.")
+    parser.add_argument("--compare", help="Path of an earlier report to compare the results with.")
+    parser.add_argument("--min-import-us", type=int, default=1000,
+                        help="Leave imports that took less microseconds than this out of the import trees.")
+    parser.add_argument("--skip-update", action="store_true",
+                        help="Do not check the installed requirements in the measured interpreters.")
+    options = parser.parse_args(args)
+    unknown = set(options.entry_points) - set(ENTRY_POINTS)
+    if unknown:
+        parser.error(f"Unknown entry points {', '.join(sorted(unknown))}")
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    report: typing.Dict[str, typing.Any] = {
+        "version": __version__,
+        "python": sys.version,
+        "platform": platform.platform(),
+        "entry_points": {},
+    }
+    for name in options.entry_points or ENTRY_POINTS:
+        result = run_entry_point(name, options.skip_update, options.min_import_us)
+        report["entry_points"][name] = result
+        if "error" in result:
+            logger.error(f"{name} failed: {result['error']}")
+        else:
+            logger.info(f"{name} took {result['wall_time']:.3f} seconds, {result['import_time']:.3f} of them "
+                        f"importing and {result['action_time']:.3f} for its first action.")
+
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    logger.info(f"Wrote report to {options.output}.")
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            logger.info("\n".join(compare_reports(json.load(f), report)))
+    return report
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_startup_benchmark()
@@ -0,0 +1,60 @@
+import unittest
+
+from BaseClasses import CollectionState, MultiWorld
+from worlds.AutoWorld import AutoWorldRegister
+from . import setup_solo_multiworld
+
+
+def build_all_state(multiworld: MultiWorld) -> CollectionState:
+    """Builds the all state from nothing, the way get_all_state did before it got cached."""
+    state = CollectionState(multiworld)
+    for item in multiworld.itempool:
+        multiworld.worlds[item.player].collect(state, item)
+    for player in multiworld.player_ids:
+        for item in multiworld.worlds[player].get_pre_fill_items():
+            multiworld.worlds[player].collect(state, item)
+    state.sweep_for_events()
+    return state
+
+
+class TestAllState(unittest.TestCase):
+    def assert_same_state(self, state: CollectionState, expected: CollectionState) -> None:
+        for player, items in expected.prog_items.items():
+            self.assertEqual(+state.prog_items[player], +items)
+        self.assertEqual(state.events, expected.events)
+
+    def test_incremental_all_state(self) -> None:
+        """Test that the cached all state matches a fresh one after items were added to and removed from the pool."""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest("Game", game=game_name):
+                multiworld = setup_solo_multiworld(world_type)
+                self.assert_same_state(multiworld.get_all_state(False), build_all_state(multiworld))
+                progression = [item for item in multiworld.itempool if item.advancement]
+                if not progression:
+                    continue
+                item = progression[0]
+                multiworld.itempool.remove(item)
+                self.assert_same_state(multiworld.get_all_state(False), build_all_state(multiworld))
+                multiworld.itempool.append(item)
+                self.assert_same_state(multiworld.get_all_state(False), build_all_state(multiworld))
+
+    def test_rule_state_changed(self) -> None:
+        """Test that events are swept again, also if only the world state a rule looks up changed."""
+        from BaseClasses import Item, ItemClassification, Location, Region
+        from worlds.generic import GenericWorld
+
+        multiworld = setup_solo_multiworld(GenericWorld, ())
+        region = Region("Menu", 1, multiworld)
+        multiworld.regions.append(region)
+        event_location = Location(1, "Event Location", None, region)
+        region.locations.append(event_location)
+        event_location.place_locked_item(Item("Event", ItemClassification.progression, None, 1))
+        reachable = True
+        event_location.access_rule = lambda state: reachable
+
+        self.assertTrue(multiworld.get_all_state(False).has("Event", 1))
+        reachable = False
+        multiworld.itempool.append(Item("Item", ItemClassification.progression, 1, 1))
+        state = multiworld.get_all_state(False)
+        self.assertFalse(state.has("Event", 1))
+        self.assertTrue(state.has("Item", 1))
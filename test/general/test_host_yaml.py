@@ -80,3 +80,32 @@ class TestSettingsDumper(unittest.TestCase):
                 self.assertEqual(value_spaces[2], value_spaces[0])  # start of sub-list
                 self.assertGreater(value_spaces[3], value_spaces[0],
                                    f"{value_lines[3]} should have more indentation than {value_lines[0]} in {lines}")
+
+
+class TestWorldSettingsNames(unittest.TestCase):
+    def test_declared_settings(self) -> None:
+        """Tests that only worlds declaring their own settings get a settings section"""
+        from typing import ClassVar, Tuple
+        from worlds import _get_world_settings_name
+        from worlds.AutoWorld import World
+
+        class WorldSettings(Group):
+            pass
+
+        class NoSettingsWorld(World):
+            item_name_to_id = {}
+            location_name_to_id = {}
+
+        class OtherAnnotationsWorld(World):
+            item_name_to_id = {}
+            location_name_to_id = {}
+            required_client_version: Tuple[int, int, int] = (0, 4, 4)
+
+        class SettingsWorld(World):
+            item_name_to_id = {}
+            location_name_to_id = {}
+            settings: ClassVar[WorldSettings]
+
+        self.assertIsNone(_get_world_settings_name(NoSettingsWorld))
+        self.assertIsNone(_get_world_settings_name(OtherAnnotationsWorld))
+        self.assertEqual(_get_world_settings_name(SettingsWorld), f"{__name__}.SettingsWorld")
@@ -100,3 +100,17 @@ class TestIDs(unittest.TestCase):
                                           f"{loc_name} is not a valid item name for location_name_to_id")
                     self.assertIsInstance(loc_id, int,
                                           f"{loc_id} for {loc_name} should be an int")
+
+    def test_cached_datapackage(self):
+        """Tests that the data package served from the on-disk cache matches the one built by the world"""
+        from worlds import network_data_package
+        from worlds.AutoWorld import data_package_checksum
+        for gamename, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest(game=gamename):
+                datapackage = world_type.get_data_package_data()
+                cached = dict(network_data_package["games"][gamename])
+                # the checksum depends on the order of the ids, which is not stable across processes for every world
+                self.assertEqual(data_package_checksum({key: value for key, value in cached.items()
+                                                        if key != "checksum"}), cached.pop("checksum"))
+                datapackage.pop("checksum")
+                self.assertEqual(cached, datapackage)
@@ -0,0 +1,64 @@
+import copy
+import pickle
+import unittest
+
+from BaseClasses import Item, ItemClassification, MultiWorld
+
+
+def create_item(name: str, player: int = 1) -> Item:
+    return Item(name, ItemClassification.filler, None, player)
+
+
+class TestItemPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = MultiWorld(2)
+        self.items = [create_item("A"), create_item("B"), create_item("A"), create_item("A", 2)]
+        self.multiworld.itempool += self.items
+
+    def assert_counts(self) -> None:
+        """Test that the counts of the pool match its content."""
+        pool = self.multiworld.itempool
+        for item in self.items:
+            self.assertEqual(pool.count_name(item.name, item.player),
+                             sum(other.name == item.name and other.player == item.player for other in pool))
+            self.assertEqual(pool.has_identical(item), any(other is item for other in pool))
+
+    def test_counts(self) -> None:
+        pool = self.multiworld.itempool
+        self.assertEqual(pool.count(create_item("A")), 2)
+        self.assertIn(create_item("A", 2), pool)
+        self.assertNotIn(create_item("B", 2), pool)
+        self.assertFalse(pool.has_identical(create_item("B")))
+        self.assert_counts()
+
+    def test_list_operations(self) -> None:
+        """Test that the counts stay correct through the ways worlds modify the pool."""
+        pool = self.multiworld.itempool
+        pool.remove(create_item("A"))
+        self.assertIs(pool[0], self.items[1])
+        self.assert_counts()
+        pool.insert(0, self.items[0])
+        pool[1] = create_item("C")
+        del pool[-1]
+        self.assertIs(pool.pop(), self.items[2])
+        pool[1:] = self.items[1:3]
+        self.multiworld.random.shuffle(pool)
+        self.assert_counts()
+        self.multiworld.itempool = [item for item in pool if item.name != "A"]
+        self.assertIsInstance(self.multiworld.itempool, MultiWorld.ItemPool)
+        self.assertEqual(self.multiworld.itempool.count_name("A", 1), 0)
+        self.assertEqual(self.multiworld.itempool.count_name("B", 1), 1)
+
+    def test_remove_counts(self) -> None:
+        """Test that remove_counts removes the first matching items and reports what was missing."""
+        pool = self.multiworld.itempool
+        missing = pool.remove_counts({(1, "A"): 1, (2, "A"): 2})
+        self.assertEqual(missing, {(2, "A"): 1})
+        self.assertEqual(list(pool), [self.items[1], self.items[2]])
+        self.assert_counts()
+
+    def test_copy(self) -> None:
+        pool = self.multiworld.itempool
+        for copied in (copy.copy(pool), copy.deepcopy(pool), pickle.loads(pickle.dumps(pool))):
+            self.assertIsInstance(copied, MultiWorld.ItemPool)
+            self.assertEqual(copied.count_name("A", 1), 2)
@@ -1,5 +1,6 @@
 import unittest
 from collections import Counter
+from Fill import distribute_items_restrictive
 from worlds.AutoWorld import AutoWorldRegister, call_all
 from . import setup_solo_multiworld
 
@@ -75,3 +76,38 @@ class TestBase(unittest.TestCase):
                 with self.subTest("Name should be valid", game=game_name, location=name):
                     self.assertIn(name, valid_names,
                                   "All location descriptions must match defined location names")
+
+    def test_location_index(self):
+        """Test that the location index of the multiworld matches its locations after fill."""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest("Game", game_name=game_name):
+                multiworld = setup_solo_multiworld(world_type)
+                distribute_items_restrictive(multiworld)
+                locations = list(multiworld.get_locations())
+                self.assertEqual(multiworld.get_filled_locations(),
+                                 [location for location in locations if location.item])
+                self.assertEqual(multiworld.get_unfilled_locations(1),
+                                 [location for location in locations if not location.item])
+                item_names = {location.item.name for location in locations if location.item and
+                              location.item.player == 1}
+                for item_name in item_names:
+                    self.assertEqual(multiworld.find_item_locations(item_name, 1),
+                                     [location for location in locations if location.item and
+                                      location.item.name == item_name and location.item.player == 1])
+
+    def test_renamed_item(self):
+        """Test that a placed item is found by its new name after it was renamed."""
+        from BaseClasses import Item, ItemClassification, Location, Region
+        from worlds.generic import GenericWorld
+
+        multiworld = setup_solo_multiworld(GenericWorld, ())
+        region = Region("Menu", 1, multiworld)
+        multiworld.regions.append(region)
+        location = Location(1, "Location", None, region)
+        region.locations.append(location)
+        item = Item("Old", ItemClassification.progression, None, 1)
+        location.place_locked_item(item)
+        item.name = "New"
+        self.assertEqual(multiworld.find_item_locations("New", 1), [location])
+        self.assertEqual(multiworld.find_item_locations("Old", 1), [])
+        self.assertIs(multiworld.find_item("New", 1), location)
@@ -14,3 +14,28 @@ class TestWorldMemory(unittest.TestCase):
                 weak = weakref.ref(setup_solo_multiworld(world_type))
                 gc.collect()
                 self.assertFalse(weak(), "World leaked a reference")
+
+    def test_slots(self):
+        """Tests that the base classes have no __dict__, while subclasses can still override defaults and add
+        attributes."""
+        from BaseClasses import CollectionState, Entrance, Location, MultiWorld, Region
+
+        class TestLocation(Location):
+            def access_rule(self, state) -> bool:
+                return False
+
+        multiworld = MultiWorld(1)
+        state = CollectionState(multiworld)
+        region = Region("Menu", 1, multiworld)
+        location = Location(1, "Location", None, region)
+        entrance = Entrance(1, "Entrance", region)
+        for obj in (region, location, entrance):
+            self.assertFalse(hasattr(obj, "__dict__"), f"{type(obj).__name__} has a __dict__")
+        self.assertTrue(location.access_rule(state))
+        self.assertFalse(location.locked)
+
+        location = TestLocation(1, "Test Location", None, region)
+        self.assertFalse(location.access_rule(state))
+        location.extra = True
+        location.access_rule = lambda state: True
+        self.assertTrue(location.access_rule(state))
@@ -0,0 +1,137 @@
+import asyncio
+import base64
+import json
+import typing
+import unittest
+
+from worlds import _bizhawk
+from worlds._bizhawk import BizHawkContext, ConnectionStatus
+
+
+class FakeConnector:
+    """Speaks the protocol of connector_bizhawk_generic.lua over a local socket. Answers messages in reverse order once
+    `batch` of them arrived, and only advances the frame when unlocked."""
+
+    def __init__(self, batch: int = 1) -> None:
+        self.batch = batch
+        self.memory = bytearray(range(256))
+        self.frame = 0
+        self.locked = False
+        self.reads = 0
+        self.writers: typing.List[asyncio.StreamWriter] = []
+
+    def handle(self, request: typing.Dict[str, typing.Any], data: typing.List[bytes]) -> typing.Dict[str, typing.Any]:
+        address = request.get("address", 0)
+        if request["type"] == "LOCK":
+            self.locked = True
+            return {"type": "LOCKED"}
+        if request["type"] == "UNLOCK":
+            self.locked = False
+            return {"type": "UNLOCKED"}
+        if request["type"] == "READ":
+            self.reads += 1
+            data.append(bytes(self.memory[address:address + request["size"]]))
+            return {"type": "READ_RESPONSE", "size": request["size"]}
+        if request["type"] == "WRITE":
+            value = base64.b64decode(request["value"])
+            self.memory[address:address + len(value)] = value
+            return {"type": "WRITE_RESPONSE"}
+        return {"type": "PONG"}
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writers.append(writer)
+        messages: typing.List[typing.Tuple[str, str]] = []
+        while line := await reader.readline():
+            message_id, message = line.decode().split(" ", 1)
+            messages.append((message_id, message))
+            if len(messages) < self.batch:
+                continue
+            for message_id, message in reversed(messages):
+                data: typing.List[bytes] = []
+                encoded = json.dumps([self.handle(request, data) for request in json.loads(message)]).encode()
+                binary = b"".join(data)
+                writer.write(f"{message_id} {self.frame} {len(encoded)} {len(binary)}\n".encode() + encoded + binary)
+            messages.clear()
+            if not self.locked:
+                self.frame += 1
+            await writer.drain()
+
+
+class TestBizHawkConnector(unittest.IsolatedAsyncioTestCase):
+    async def connect(self, connector: FakeConnector) -> BizHawkContext:
+        server = await asyncio.start_server(connector.serve, "127.0.0.1", 0)
+        ctx = BizHawkContext()
+        ctx.streams = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        ctx.connection_status = ConnectionStatus.TENTATIVE
+
+        async def close() -> None:
+            _bizhawk.disconnect(ctx)
+            server.close()
+            for writer in connector.writers:
+                writer.close()
+                await writer.wait_closed()
+            await server.wait_closed()
+
+        self.addAsyncCleanup(close)
+        return ctx
+
+    async def test_pipelined_requests(self) -> None:
+        """Test that requests in flight at the same time get their own responses."""
+        ctx = await self.connect(FakeConnector(batch=2))
+        first, second = await asyncio.gather(_bizhawk.read(ctx, [(0x10, 4, "RAM")]),
+                                             _bizhawk.read(ctx, [(0x20, 2, "RAM"), (0x30, 1, "RAM")]))
+        self.assertEqual(first, [bytes([0x10, 0x11, 0x12, 0x13])])
+        self.assertEqual(second, [bytes([0x20, 0x21]), bytes([0x30])])
+        self.assertEqual(ctx.connection_status, ConnectionStatus.CONNECTED)
+
+    async def test_snapshot(self) -> None:
+        """Test that reads are answered locally while locked, until a write changes the data."""
+        connector = FakeConnector()
+        ctx = await self.connect(connector)
+        await _bizhawk.read(ctx, [(0x10, 4, "RAM")])
+        await _bizhawk.read(ctx, [(0x10, 4, "RAM")])
+        self.assertEqual(connector.reads, 2)
+
+        await _bizhawk.lock(ctx)
+        await _bizhawk.read(ctx, [(0x10, 4, "RAM"), (0x40, 4, "RAM")])
+        self.assertEqual(await _bizhawk.read(ctx, [(0x11, 2, "RAM")]), [bytes([0x11, 0x12])])
+        self.assertIsNone(await _bizhawk.guarded_read(ctx, [(0x40, 1, "RAM")], [(0x10, [0], "RAM")]))
+        self.assertEqual(connector.reads, 4)
+
+        await _bizhawk.write(ctx, [(0x12, [0xFF], "RAM")])
+        self.assertEqual(await _bizhawk.read(ctx, [(0x11, 2, "RAM")]), [bytes([0x11, 0xFF])])
+        self.assertEqual(await _bizhawk.read(ctx, [(0x40, 1, "RAM")]), [bytes([0x40])])
+        self.assertEqual(connector.reads, 5)
+
+        await _bizhawk.unlock(ctx)
+        await _bizhawk.read(ctx, [(0x40, 1, "RAM")])
+        self.assertEqual(connector.reads, 6)
+
+    async def test_send_requests_value(self) -> None:
+        """Test that send_requests still returns read data base64 encoded."""
+        ctx = await self.connect(FakeConnector())
+        response = (await _bizhawk.send_requests(ctx, [{"type": "READ", "address": 0x10, "size": 4,
+                                                        "domain": "RAM"}]))[0]
+        self.assertEqual(response["value"], base64.b64encode(bytes([0x10, 0x11, 0x12, 0x13])).decode("ascii"))
+
+
+class TestPausedHandler(unittest.IsolatedAsyncioTestCase):
+    async def test_backoff(self) -> None:
+        """Test that the watcher backs off while a handler sees the game outside of gameplay."""
+        from unittest import mock
+        from worlds._bizhawk.context import BizHawkClientContext
+        from worlds.cv64.client import Castlevania64Client
+
+        async def read(ctx: BizHawkContext, reads: typing.Sequence[typing.Tuple[int, int, str]]) -> typing.List[bytes]:
+            return [bytes(size) for _, size, _ in reads]  # game state 0, not in gameplay
+
+        ctx = BizHawkClientContext(None, None)
+        self.addAsyncCleanup(ctx.shutdown)
+        scheduler = ctx.watcher_scheduler
+        intervals = [scheduler.interval]
+        with mock.patch.object(_bizhawk, "read", read):
+            for _ in range(3):
+                with scheduler.tick():
+                    await Castlevania64Client().game_watcher(ctx)
+                intervals.append(scheduler.interval)
+        self.assertEqual(intervals, [0.5, 1, 1, 1])
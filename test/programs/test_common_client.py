@@ -0,0 +1,244 @@
+import asyncio
+import typing
+import unittest
+from unittest import mock
+
+from CommonClient import CommonContext, DataPackageNames, WatcherScheduler, process_server_cmd
+from MultiServer import Client, Context, process_client_cmd
+from NetUtils import Hint, NetworkItem, decode, encode, items_digest, locations_digest
+from Utils import DataPackageTable
+
+
+class TestWatcherScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ctx = CommonContext(None, None)
+        self.addAsyncCleanup(self.ctx.shutdown)
+        self.scheduler = WatcherScheduler(0.125, 1)
+
+    async def test_steady_while_connected(self) -> None:
+        """Test that ticks keep the active interval while the game is connected, even when nothing happens."""
+        for _ in range(5):
+            self.scheduler.interval = 0  # don't actually wait
+            await self.scheduler.wait(self.ctx)
+            with self.scheduler.tick():
+                pass
+            self.assertEqual(self.scheduler.interval, 0.125)
+        self.assertEqual(self.scheduler.ticks, 5)
+
+    async def test_backoff(self) -> None:
+        """Test that iterations without a tick and paused ticks back off up to the idle interval, until the next tick
+        of a running game."""
+        scheduler = WatcherScheduler(0.001, 0.008)
+        intervals = []
+        for _ in range(5):
+            await scheduler.wait(self.ctx)  # the loop found no game to watch
+            intervals.append(scheduler.interval)
+        self.assertEqual(intervals, [0.001, 0.002, 0.004, 0.008, 0.008])
+        with scheduler.tick():
+            pass
+        self.assertEqual(scheduler.interval, 0.001)
+
+        intervals = []
+        for _ in range(5):
+            with self.scheduler.tick():
+                self.scheduler.mark_paused()
+            intervals.append(self.scheduler.interval)
+        self.assertEqual(intervals, [0.25, 0.5, 1, 1, 1])
+        with self.scheduler.tick():
+            pass
+        self.assertEqual(self.scheduler.interval, 0.125)
+
+    async def test_wake_up(self) -> None:
+        """Test that the watcher event wakes the scheduler early."""
+        self.scheduler.interval = 10
+        asyncio.get_running_loop().call_soon(self.ctx.watcher_event.set)
+        await asyncio.wait_for(self.scheduler.wait(self.ctx), 1)
+        self.assertFalse(self.ctx.watcher_event.is_set())
+
+
+class TestHintsDelta(unittest.IsolatedAsyncioTestCase):
+    async def test_apply(self) -> None:
+        """Test that added hints are appended and changed hints replace their previous state."""
+        ctx = CommonContext(None, None)
+        self.addAsyncCleanup(ctx.shutdown)
+        old = {"receiving_player": 1, "finding_player": 2, "location": 3, "item": 4, "entrance": "", "found": False}
+        ctx.stored_data["_read_hints_0_1"] = [old]
+        found = dict(old, found=True)
+        added = dict(old, location=5)
+        ctx.apply_hints_delta("_read_hints_0_1", {"added": [added], "changed": [found]})
+        self.assertEqual(ctx.stored_data["_read_hints_0_1"], [found, added])
+
+
+class TestHintNotify(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent: typing.List[dict] = []
+        self.packages: typing.List[typing.Tuple[str, dict]] = []
+        sent, packages = self.sent, self.packages
+
+        class RecordingContext(CommonContext):
+            async def send_msgs(self, msgs: typing.List[typing.Any]) -> None:
+                sent.extend(msgs)
+
+            def on_package(self, cmd: str, args: dict) -> None:
+                packages.append((cmd, args))
+
+        class RecordingServer(Context):
+            def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]) -> None:
+                sent.extend(msgs)
+
+        for patcher in (mock.patch("Utils.persistent_store"), mock.patch("Utils.get_unique_identifier")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.ctx = RecordingContext(None, None)
+        self.addAsyncCleanup(self.ctx.shutdown)
+        self.server = RecordingServer("", 0, "", "", 0, 0, False)
+        self.server_client = Client(None, self.server)
+        self.server_client.auth = True
+
+    async def notify_hint(self) -> dict:
+        """Connect the client, forward its SetNotify to the server and return the SetReply of a new hint."""
+        await process_server_cmd(self.ctx, {"cmd": "Connected", "team": 0, "slot": 1, "slot_info": {},
+                                            "players": [], "missing_locations": [], "checked_locations": []})
+        set_notify = next(msg for msg in self.sent if msg["cmd"] == "SetNotify")
+        await process_client_cmd(self.server, self.server_client, set_notify)
+        self.sent.clear()
+        hint = Hint(1, 2, 3, 4, False)
+        self.server.hints[0, 1] = {hint}
+        self.server.on_changed_hints(0, 1, added=[hint])
+        reply, = decode(encode(self.sent))
+        await process_server_cmd(self.ctx, reply)
+        return reply
+
+    async def test_value(self) -> None:
+        """Test that on_package of game clients keeps getting the value of hint changes."""
+        reply = await self.notify_hint()
+        self.assertIn("value", reply)
+        self.assertEqual(self.packages[-1], ("SetReply", reply))
+        self.assertEqual(self.ctx.stored_data["_read_hints_0_1"], reply["value"])
+
+    async def test_deltas(self) -> None:
+        """Test that clients asking for hint deltas only get those."""
+        self.ctx.want_hint_deltas = True
+        reply = await self.notify_hint()
+        self.assertNotIn("value", reply)
+        self.assertEqual(len(reply["delta"]["added"]), 1)
+
+
+class TestResumeConnection(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent: typing.List[dict] = []
+        sent = self.sent
+
+        class RecordingContext(CommonContext):
+            async def send_msgs(self, msgs: typing.List[typing.Any]) -> None:
+                sent.extend(msgs)
+
+        for patcher in (mock.patch("Utils.persistent_store"), mock.patch("Utils.get_unique_identifier")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.ctx = ctx = RecordingContext(None, None)
+        self.addAsyncCleanup(ctx.shutdown)
+        ctx.seed_name, ctx.auth, ctx.team, ctx.slot = "seed", "Player", 0, 1
+        ctx.items_received = [NetworkItem(item, item, 1, 0) for item in range(3)]
+        ctx.checked_locations, ctx.missing_locations = {1, 2}, {3, 4}
+        ctx.server_locations = {1, 2, 3, 4}
+        ctx.reset_server_state()
+        ctx.auth = "Player"
+
+    async def connected(self, **args: typing.Any) -> dict:
+        args = {"cmd": "Connected", "team": 0, "slot": 1, "slot_info": {}, "players": [], **args}
+        await process_server_cmd(self.ctx, args)
+        return args
+
+    async def test_resume(self) -> None:
+        """Test that a reconnect presents what the client knew and keeps it when the server resumes from there."""
+        await self.ctx.send_connect()
+        connect = self.sent[0]
+        self.assertEqual((connect["items_index"], connect["items_digest"], connect["locations_digest"]),
+                         (3, items_digest(self.ctx.resume_state.items_received), locations_digest([2, 1])))
+
+        args = await self.connected(items_index=3, checked_locations=[1, 2, 3])
+        self.assertEqual(len(self.ctx.items_received), 3)
+        self.assertEqual((self.ctx.checked_locations, self.ctx.missing_locations), ({1, 2, 3}, {4}))
+        self.assertEqual(sorted(args["missing_locations"]), [4])
+        self.assertIsNone(self.ctx.resume_state)
+
+    async def test_not_resumed(self) -> None:
+        """Test that the items are received again if the server did not resume, like after a restart from an older
+        save."""
+        await self.ctx.send_connect()
+        await self.connected(checked_locations=[1, 2])
+        self.assertEqual(self.ctx.items_received, [])
+        other_items = [NetworkItem(item, item, 2, 0) for item in range(3)]
+        await process_server_cmd(self.ctx, {"cmd": "ReceivedItems", "index": 0, "items": other_items})
+        self.assertEqual(self.ctx.items_received, other_items)
+
+    async def test_other_slot(self) -> None:
+        self.ctx.auth = "Other"
+        await self.ctx.send_connect()
+        self.assertNotIn("items_index", self.sent[0])
+        await self.connected(missing_locations=[1], checked_locations=[])
+        self.assertEqual(self.ctx.items_received, [])
+        self.assertEqual(self.ctx.missing_locations, {1})
+
+
+class TestDataPackageNames(unittest.TestCase):
+    def test_lookup(self) -> None:
+        """Test that the latest package of a game is used and unknown ids get a placeholder."""
+        names = DataPackageNames(lambda code: f"Unknown {code}")
+        names.set_game("A", {1: "Old", 2: "Removed"})
+        names.set_game("B", {10: "Other"})
+        new_a = {"item_name_to_id": {"New": 1}, "location_name_to_id": {}, "checksum": "a"}
+        names.set_game("A", DataPackageTable(DataPackageTable.encode("A", new_a)).item_names)
+        self.assertEqual(names[1], "New")
+        self.assertEqual(names[10], "Other")
+        self.assertEqual(names[2], "Unknown 2")
+        self.assertNotIn(2, names)
+        self.assertIsNone(names.get(2))
+        self.assertEqual(set(names), {1, 10})
+
+    def test_index(self) -> None:
+        """Test that the game of a found id is remembered, until a package moves the id to another game."""
+        names = DataPackageNames(lambda code: f"Unknown {code}")
+        names.set_game("A", {1: "A1"})
+        b_names = mock.MagicMock(wraps={2: "B2"})
+        names.set_game("B", b_names)
+        for _ in range(3):
+            self.assertEqual(names[1], "A1")
+        b_names.get.assert_called_once_with(1)
+        names.set_game("B", {1: "B1"})
+        self.assertEqual(names[1], "B1")
+        names.set_game("B", {})
+        self.assertEqual(names[1], "A1")
+
+
+class TestDataPackageTables(unittest.IsolatedAsyncioTestCase):
+    async def test_close_replaced(self) -> None:
+        """Test that a game's memory mapped table gets closed when a new package for the game replaces it."""
+        import os
+        import tempfile
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        tables = []
+        for checksum, item in (("old", "Old"), ("new", "New")):
+            path = os.path.join(temp_dir.name, f"{checksum}.apdp")
+            with open(path, "wb") as f:
+                f.write(DataPackageTable.encode("A", {"item_name_to_id": {item: 1}, "location_name_to_id": {},
+                                                      "checksum": checksum}))
+            tables.append(DataPackageTable.open(path))
+        old, new = tables
+
+        with mock.patch.multiple(CommonContext, item_names=DataPackageNames(str), location_names=DataPackageNames(str),
+                                 data_package_tables={}):
+            ctx = CommonContext(None, None)
+            self.addAsyncCleanup(ctx.shutdown)
+            ctx.update_game(old, "A")
+            self.assertEqual(ctx.item_names[1], "Old")
+            ctx.update_game(new, "A")
+            self.assertEqual(ctx.item_names[1], "New")
+            self.assertTrue(old._data.closed)
+            self.assertFalse(new._data.closed)
+            ctx.update_game({"item_name_to_id": {"Dict": 1}, "location_name_to_id": {}}, "A")
+            self.assertEqual(ctx.item_names[1], "Dict")
+            self.assertTrue(new._data.closed)
@@ -91,3 +91,46 @@ class TestGenerateMain(unittest.TestCase):
             user_path.cached_path = user_path_backup
 
         self.assertOutput(self.output_tempdir.name)
+
+    def test_generate_batch(self):
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--batch', str(self.abs_input_dir.parent),
+                    '--batch_count', '2',
+                    '--batch_workers', '2',
+                    '--outputpath', self.output_tempdir.name]
+        print(f'Testing Generate.py {sys.argv} in {os.getcwd()}')
+        args, _ = Generate.mystery_argparse()
+        results = Generate.batch_main(args)
+
+        self.assertEqual([result["name"] for result in results], ["one_player#1", "one_player#2"])
+        self.assertFalse([result["error"] for result in results if "error" in result])
+        output_path = Path(self.output_tempdir.name)
+        self.assertEqual(len(list(output_path.glob('*.zip'))), 2)
+        self.assertEqual(len(list(output_path.glob('Batch_*.json'))), 1)
+
+    @unittest.skipUnless("fork" in __import__("multiprocessing").get_all_start_methods(), "requires forking")
+    def test_generate_output_processes(self):
+        import zipfile
+        from unittest import mock
+        from worlds.minecraft import MinecraftWorld
+
+        with TemporaryDirectory(prefix='AP_players_') as players_dir:
+            for player in (1, 2):
+                with open(os.path.join(players_dir, f"Player{player}.yaml"), "w") as f:
+                    f.write(f"name: Player{player}\ngame: Minecraft\nMinecraft: {{}}\n")
+            sys.argv = [sys.argv[0], '--seed', '0',
+                        '--player_files_path', players_dir,
+                        '--outputpath', self.output_tempdir.name,
+                        '--output_processes', '2',
+                        '--zip_level', '1']
+            print(f'Testing Generate.py {sys.argv} in {os.getcwd()}')
+            with mock.patch.object(MinecraftWorld, "process_output", True), \
+                    mock.patch.object(MinecraftWorld, "set_output_state", autospec=True) as set_output_state:
+                Generate.main()
+
+        self.assertEqual(set_output_state.call_count, 2)
+        self.assertOutput(self.output_tempdir.name)
+        with zipfile.ZipFile(next(Path(self.output_tempdir.name).glob('*.zip'))) as zf:
+            names = zf.namelist()
+        self.assertEqual(len([name for name in names if name.endswith(".apmc")]), 2, names)
+        self.assertEqual(len([name for name in names if name.endswith(".archipelago")]), 1, names)
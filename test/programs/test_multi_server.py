@@ -1,5 +1,9 @@
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+
+from MultiServer import Client, Context, ServerCommandProcessor, process_client_cmd
+from NetUtils import Hint, LocationStore, NetworkItem, items_digest, locations_digest
+from Utils import version_tuple
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +42,114 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestHintDeltas(unittest.TestCase):
+    def test_on_changed_hints(self) -> None:
+        """Test that clients that asked for deltas only get the changed hints, unless those are not known."""
+        sent: typing.List[typing.Tuple[typing.Set[Client], typing.List[dict]]] = []
+
+        class RecordingContext(Context):
+            def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]) -> None:
+                sent.append((set(endpoints), msgs))
+
+        ctx = RecordingContext("", 0, "", "", 0, 0, False)
+        full_client, delta_client = Client(None, ctx), Client(None, ctx)
+        key = "_read_hints_0_1"
+        ctx.stored_data_notification_clients[key].update((full_client, delta_client))
+        ctx.stored_data_delta_clients[key].add(delta_client)
+        hint = Hint(1, 2, 3, 4, False)
+        ctx.hints[0, 1] = {hint}
+
+        ctx.on_changed_hints(0, 1, added=[hint])
+        self.assertEqual(sent, [({delta_client}, [{"cmd": "SetReply", "key": key,
+                                                   "delta": {"added": [hint], "changed": []}}]),
+                                ({full_client}, [{"cmd": "SetReply", "key": key, "value": {hint}}])])
+        sent.clear()
+        ctx.on_changed_hints(0, 1)
+        self.assertEqual(sent, [({full_client, delta_client}, [{"cmd": "SetReply", "key": key, "value": {hint}}])])
+
+
+class TestSetNotify(unittest.IsolatedAsyncioTestCase):
+    async def test_deltas_off(self) -> None:
+        """Test that a SetNotify without deltas stops the deltas a client asked for before."""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        client = Client(None, ctx)
+        client.auth = True
+        key = "_read_hints_0_1"
+        await process_client_cmd(ctx, client, {"cmd": "SetNotify", "keys": [key], "deltas": True})
+        self.assertEqual(set(ctx.stored_data_delta_clients[key]), {client})
+        await process_client_cmd(ctx, client, {"cmd": "SetNotify", "keys": [key, "other"]})
+        self.assertEqual(set(ctx.stored_data_notification_clients[key]), {client})
+        self.assertEqual(set(ctx.stored_data_delta_clients[key]), set())
+        self.assertNotIn("other", ctx.stored_data_delta_clients)
+
+
+class TestResumedConnect(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent: typing.List[dict] = []
+        sent = self.sent
+
+        class RecordingContext(Context):
+            async def send_msgs(self, endpoint: Client, msgs: typing.Iterable[dict]) -> bool:
+                sent.extend(msgs)
+                return True
+
+        self.ctx = ctx = RecordingContext("", 0, "", "", 0, 0, False)
+        ctx.connect_names = {"Player": (0, 1)}
+        ctx.player_names = {(0, 1): "Player"}
+        ctx.clients = {0: {1: []}}
+        ctx.games = {1: "Game"}
+        ctx.minimum_client_versions = {1: version_tuple}
+        ctx.slot_info = {}
+        ctx.slot_data = {1: {}}
+        ctx.locations = LocationStore({1: {location: (location, 1, 0) for location in range(1, 6)}})
+        ctx.location_checks[0, 1] = {1, 2}
+        ctx.received_items[0, 1, True] = [NetworkItem(item, item, 1, 0) for item in range(1, 5)]
+
+    async def connect(self, **resume: typing.Any) -> typing.List[dict]:
+        client = Client(None, self.ctx)
+        client.auth = True  # skips the join message
+        self.sent.clear()
+        await process_client_cmd(self.ctx, client, {
+            "cmd": "Connect", "password": None, "name": "Player", "game": "Game", "version": version_tuple,
+            "tags": [], "items_handling": 0b011, "uuid": "", **resume})
+        self.assertEqual(client.send_index, 4)
+        return self.sent
+
+    async def test_full(self) -> None:
+        connected, received = await self.connect()
+        self.assertEqual((connected["checked_locations"], sorted(connected["missing_locations"])), ([1, 2], [3, 4, 5]))
+        self.assertNotIn("items_index", connected)
+        self.assertEqual((received["index"], len(received["items"])), (0, 4))
+
+    async def test_resumed(self) -> None:
+        """Test that only new items and changed checked locations are sent to a resuming client."""
+        items = self.ctx.received_items[0, 1, True]
+        connected, received = await self.connect(items_index=3, items_digest=items_digest(items[:3]),
+                                                 locations_digest=locations_digest([1, 2]))
+        self.assertEqual(connected["items_index"], 3)
+        self.assertNotIn("checked_locations", connected)
+        self.assertNotIn("missing_locations", connected)
+        self.assertEqual(received["index"], 3)
+        self.assertEqual(received["items"], items[3:])
+
+        connected, = await self.connect(items_index=4, items_digest=items_digest(items),
+                                        locations_digest=locations_digest([1]))
+        self.assertEqual(sorted(connected["checked_locations"]), [1, 2])
+        self.assertNotIn("missing_locations", connected)
+
+    async def test_other_items(self) -> None:
+        """Test that a client that got other items than the slot has, like before the server was restarted from an
+        older save, or from another room of the seed, gets all items again."""
+        items = [NetworkItem(item, item, 2, 0) for item in range(1, 4)]
+        for resume in ({"items_index": 3, "items_digest": items_digest(items)}, {"items_index": 3}):
+            connected, received = await self.connect(**resume)
+            self.assertNotIn("items_index", connected)
+            self.assertEqual((received["index"], len(received["items"])), (0, 4))
+
+    async def test_invalid_index(self) -> None:
+        """Test that an index beyond the server's items falls back to sending all of them."""
+        connected, received = await self.connect(items_index=5)
+        self.assertNotIn("items_index", connected)
+        self.assertEqual((received["index"], len(received["items"])), (0, 4))
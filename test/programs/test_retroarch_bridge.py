@@ -0,0 +1,128 @@
+import asyncio
+import typing
+import unittest
+
+from worlds import _retroarch
+from worlds._retroarch import BadResponseError, RetroArchBridge
+
+
+class FakeRetroArch(asyncio.DatagramProtocol):
+    """Answers network commands like RetroArch does, once `batch` of them arrived and in reverse order. Reads are
+    answered with at most `max_read` bytes."""
+
+    def __init__(self, batch: int = 1, max_read: int = 0x1000) -> None:
+        self.batch = batch
+        self.max_read = max_read
+        self.memory = bytearray(range(256)) * 16
+        self.commands: typing.List[str] = []
+        self.queued: typing.List[typing.Tuple[str, typing.Any]] = []
+        self.transport: typing.Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = typing.cast(asyncio.DatagramTransport, transport)
+
+    def answer(self, command: str) -> str:
+        name, *arguments = command.split(" ")
+        if name == "VERSION":
+            return "1.15.0"
+        address = int(arguments[0], 16)
+        if name == "READ_CORE_MEMORY":
+            data = self.memory[address:address + min(int(arguments[1]), self.max_read)]
+            return f"{name} {address:x} " + " ".join(f"{value:02x}" for value in data)
+        self.memory[address:address + len(arguments) - 1] = bytes(int(value, 16) for value in arguments[1:])
+        return f"{name} {address:x} {len(arguments) - 1}"
+
+    def datagram_received(self, data: bytes, addr: typing.Any) -> None:
+        command = data.decode().rstrip("\n")
+        self.commands.append(command)
+        self.queued.append((command, addr))
+        if len(self.queued) >= self.batch:
+            for command, addr in reversed(self.queued):
+                assert self.transport
+                self.transport.sendto(f"{self.answer(command)}\n".encode(), addr)
+            self.queued.clear()
+
+
+class TestRetroArchBridge(unittest.IsolatedAsyncioTestCase):
+    async def connect(self, fake: FakeRetroArch) -> RetroArchBridge:
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(lambda: fake,
+                                                                                 local_addr=("127.0.0.1", 0))
+        self.addCleanup(transport.close)
+        bridge = RetroArchBridge(*transport.get_extra_info("sockname")[:2], timeout=5)
+        await bridge.connect()
+        self.addCleanup(bridge.close)
+        return bridge
+
+    async def test_pipelined_reads(self) -> None:
+        """Test that reads are merged, sent at once and matched to their responses even when answered out of order."""
+        fake = FakeRetroArch(batch=2)
+        bridge = await self.connect(fake)
+        data = await bridge.read([(0x10, 2), (0x14, 1), (0x200, 3)])
+        self.assertEqual(data, [bytes(fake.memory[0x10:0x12]), bytes(fake.memory[0x14:0x15]),
+                                bytes(fake.memory[0x200:0x203])])
+        self.assertEqual(fake.commands, ["READ_CORE_MEMORY 0x10 5", "READ_CORE_MEMORY 0x200 3"])
+
+    async def test_short_reads(self) -> None:
+        """Test that long reads are split and that ranges RetroArch only partially answered are read again."""
+        fake = FakeRetroArch(max_read=0x300)
+        bridge = await self.connect(fake)
+        size = _retroarch.READ_BLOCK_SIZE + 0x10
+        self.assertEqual(await bridge.read([(0x100, size)]), [bytes(fake.memory[0x100:0x100 + size])])
+        self.assertEqual(fake.commands, ["READ_CORE_MEMORY 0x100 1024", "READ_CORE_MEMORY 0x500 16",
+                                         "READ_CORE_MEMORY 0x400 256"])
+
+    async def test_prefetch(self) -> None:
+        """Test that prefetched data is answered locally until it is written to or cleared."""
+        fake = FakeRetroArch()
+        bridge = await self.connect(fake)
+        await bridge.prefetch([(0x10, 4), (0x40, 4)])
+        self.assertEqual(await bridge.read([(0x11, 2), (0x40, 1)]), [b"\x11\x12", b"\x40"])
+        self.assertEqual(len(fake.commands), 2)
+
+        await bridge.write([(0x12, [0xFF])])
+        self.assertEqual(await bridge.read([(0x11, 2), (0x40, 1)]), [b"\x11\xff", b"\x40"])
+        self.assertEqual(len(fake.commands), 4)
+
+        bridge.clear_cache()
+        await bridge.read([(0x40, 1)])
+        self.assertEqual(len(fake.commands), 5)
+
+    async def test_command(self) -> None:
+        bridge = await self.connect(FakeRetroArch())
+        self.assertEqual(await bridge.send_command("VERSION"), b"1.15.0")
+
+    async def test_bad_response(self) -> None:
+        fake = FakeRetroArch()
+        fake.answer = lambda command: "READ_CORE_MEMORY 10 -1 no memory for address"
+        bridge = await self.connect(fake)
+        with self.assertRaises(BadResponseError):
+            await bridge.read([(0x10, 1)])
+
+    async def test_late_response(self) -> None:
+        """Test that the response to a command that timed out is not taken for the response to a later command."""
+        fake = FakeRetroArch()
+        late: typing.List[typing.Tuple[bytes, typing.Any]] = []
+        answer = fake.answer
+
+        def datagram_received(data: bytes, addr: typing.Any) -> None:
+            command = data.decode().rstrip("\n")
+            fake.commands.append(command)
+            response = f"{answer(command)}\n".encode()
+            if len(fake.commands) == 1:
+                late.append((response, addr))  # only sent along with the response to the next command
+                return
+            assert fake.transport
+            for response, addr in late + [(response, addr)]:
+                fake.transport.sendto(response, addr)
+            late.clear()
+
+        fake.datagram_received = datagram_received
+        bridge = await self.connect(fake)
+        bridge.timeout = 0.1
+        with self.assertRaises(asyncio.TimeoutError):
+            await bridge.read([(0x10, 1)])
+        fake.memory[0x10] = 0xFF
+        bridge.timeout = 5
+        self.assertEqual(await bridge.read([(0x10, 1)]), [b"\xff"])
+        await bridge.write([(0x10, [0x01])])
+        self.assertEqual(fake.memory[0x10], 0x01)
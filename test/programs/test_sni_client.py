@@ -0,0 +1,85 @@
+import json
+import typing
+import unittest
+
+from SNIClient import SNESState, SNIContext, merge_read_ranges, snes_read, snes_read_batch, snes_write
+
+
+class FakeSNI:
+    """Answers GetAddress and PutAddress requests from memory, recording the requests."""
+    open = True
+    closed = False
+
+    def __init__(self, ctx: SNIContext) -> None:
+        self.ctx = ctx
+        self.memory = bytearray(range(256)) * 16
+        self.requests: typing.List[typing.List[str]] = []
+        self.write_address: typing.Optional[int] = None
+
+    async def send(self, message: typing.Union[str, bytes]) -> None:
+        if isinstance(message, bytes):
+            assert self.write_address is not None
+            self.memory[self.write_address:self.write_address + len(message)] = message
+            self.write_address = None
+            return
+        request = json.loads(message)
+        operands = [int(operand, 16) for operand in request["Operands"]]
+        if request["Opcode"] == "PutAddress":
+            self.write_address = operands[0]
+            return
+        self.requests.append(request["Operands"])
+        data = b"".join(bytes(self.memory[address:address + size])
+                        for address, size in zip(operands[::2], operands[1::2]))
+        self.ctx.snes_recv_queue.put_nowait(data)
+
+
+class TestSNIReads(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ctx = SNIContext("", "", "")
+        self.sni = FakeSNI(self.ctx)
+        self.ctx.snes_socket = typing.cast(typing.Any, self.sni)
+        self.ctx.snes_state = SNESState.SNES_ATTACHED
+
+    def test_merge_read_ranges(self) -> None:
+        self.assertEqual(merge_read_ranges([(0x20, 2), (0x10, 4), (0x12, 4), (0x100, 1)], 0x10),
+                         [(0x10, 0x12), (0x100, 1)])
+        self.assertEqual(merge_read_ranges([(0x20, 2), (0x10, 4), (0x12, 4)], 0), [(0x10, 6), (0x20, 2)])
+        self.assertEqual(merge_read_ranges([(0x10, 0x20), (0x14, 1)], 0), [(0x10, 0x20)])
+
+    async def test_read_batch(self) -> None:
+        """Test that a batch is read in one request and returned in the order it was asked for."""
+        reads = [(0x300, 2), (0x10, 1), (0x12, 3), (0x10, 4)]
+        data = await snes_read_batch(self.ctx, reads)
+        self.assertEqual(data, [bytes(self.sni.memory[address:address + size]) for address, size in reads])
+        self.assertEqual(self.sni.requests, [["10", "5", "300", "2"]])
+
+    async def test_read_cache(self) -> None:
+        """Test that snes_read answers from the read plan until it is written over."""
+        self.ctx.snes_read_cache = [(0x10, b"\xff\xff"), (0x20, b"\xee")]
+        self.assertEqual(await snes_read(self.ctx, 0x11, 1), b"\xff")
+        self.assertEqual(await snes_read(self.ctx, 0x20, 1), b"\xee")
+        self.assertEqual(self.sni.requests, [])
+        self.assertEqual(await snes_read(self.ctx, 0x11, 2), bytes(self.sni.memory[0x11:0x13]))
+        self.assertTrue(await snes_write(self.ctx, [(0x11, b"\x00")]))
+        self.assertEqual(self.ctx.snes_read_cache, [(0x20, b"\xee")])
+        self.assertEqual(await snes_read(self.ctx, 0x10, 2), bytes(self.sni.memory[0x10:0x12]))
+
+
+class TestPausedHandler(unittest.IsolatedAsyncioTestCase):
+    async def test_backoff(self) -> None:
+        """Test that the watcher backs off while a handler sees the game outside of gameplay."""
+        from unittest import mock
+        from worlds.smw.Client import SMWSNIClient
+
+        async def read(ctx: SNIContext, address: int, size: int) -> bytes:
+            return bytes(size)  # game state 0, no save file loaded
+
+        ctx = SNIContext("", "", "")
+        scheduler = ctx.watcher_scheduler
+        intervals = []
+        with mock.patch("SNIClient.snes_read", read):
+            for _ in range(4):
+                with scheduler.tick():
+                    await SMWSNIClient().game_watcher(ctx)
+                intervals.append(scheduler.interval)
+        self.assertEqual(intervals, [0.25, 0.5, 1, 1])
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import Utils
+from Utils import DataPackageTable, load_data_package_for_checksum, store_data_package_for_checksum
+
+
+class TestDataPackageStore(unittest.TestCase):
+    game_data = {
+        "item_name_to_id": {"Sword": 3, "Bow": -2, "Bombe à eau": 1000},
+        "location_name_to_id": {"Chest": 7},
+        "version": 0,
+        "checksum": "0123abcd",
+    }
+
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        patcher = mock.patch.object(Utils.cache_path, "cached_path", temp_dir.name, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_table(self) -> None:
+        table = DataPackageTable(DataPackageTable.encode("Game", self.game_data))
+        self.assertEqual((table.game, table.checksum), ("Game", "0123abcd"))
+        self.assertEqual(dict(table.item_names), {-2: "Bow", 3: "Sword", 1000: "Bombe à eau"})
+        self.assertEqual(dict(table.location_names), {7: "Chest"})
+        self.assertNotIn(4, table.item_names)
+        self.assertNotIn("Sword", table.item_names)
+
+    def test_store(self) -> None:
+        self.assertIsNone(load_data_package_for_checksum("Game", "0123abcd"))
+        store_data_package_for_checksum("Game", self.game_data)
+        table = load_data_package_for_checksum("Game", "0123abcd")
+        assert table is not None
+        self.assertEqual(table.item_names[3], "Sword")
+        self.assertIsNone(load_data_package_for_checksum("Game", "other"))
+        with self.assertRaises(ValueError):
+            load_data_package_for_checksum("Game", "../0123abcd")
+
+    def test_json_conversion(self) -> None:
+        """Test that data packages stored as json by older versions are converted."""
+        os.makedirs(Utils.cache_path("datapackage", "Game"))
+        with open(Utils.cache_path("datapackage", "Game", "0123abcd.json"), "w", encoding="utf-8-sig") as f:
+            json.dump(self.game_data, f)
+        table = load_data_package_for_checksum("Game", "0123abcd")
+        assert table is not None
+        self.assertEqual(table.location_names[7], "Chest")
+        self.assertTrue(os.path.exists(Utils.cache_path("datapackage", "Game", "0123abcd.bin")))
@@ -0,0 +1,47 @@
+# Tests for LazyDict in Utils.py
+
+import pickle
+import unittest
+from typing import List
+
+from Utils import LazyDict
+
+
+class TestLazyDict(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loaded: List[str] = []
+        self.data = LazyDict(self.load_key, self.load_all)
+
+    def load_key(self, key: str) -> bool:
+        if key not in ("a", "b"):
+            return False
+        self.loaded.append(key)
+        self.data[key] = key.upper()
+        return True
+
+    def load_all(self) -> None:
+        for key in ("a", "b"):
+            if not dict.__contains__(self.data, key):
+                self.load_key(key)
+
+    def test_load_key(self) -> None:
+        """Test that looking up single keys only loads those."""
+        self.assertEqual(self.data["a"], "A")
+        self.assertIn("a", self.data)
+        self.assertEqual(self.data.get("a"), "A")
+        self.assertNotIn("c", self.data)
+        self.assertIsNone(self.data.get("c"))
+        with self.assertRaises(KeyError):
+            _ = self.data["c"]
+        self.assertEqual(self.loaded, ["a"])
+
+    def test_load_all(self) -> None:
+        """Test that anything looking at all keys sees all of them, without loading any twice."""
+        self.assertEqual(self.data["b"], "B")
+        self.assertEqual(len(self.data), 2)
+        self.assertEqual(sorted(self.data), ["a", "b"])
+        self.assertEqual(self.loaded, ["b", "a"])
+        self.assertTrue(self.data.complete)
+
+    def test_pickle(self) -> None:
+        self.assertEqual(pickle.loads(pickle.dumps(self.data)), {"a": "A", "b": "B"})
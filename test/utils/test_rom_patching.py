@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import Utils
+from settings import SNESRomPath
+from worlds.Files import APPatchExtension, APProcedurePatch, APTokenMixin, APTokenTypes
+
+
+class TestFileDigest(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "base.rom")
+        with open(self.path, "wb") as f:
+            f.write(b"\x00" * 512 + bytes(range(256)) * 4)
+        for patcher in (mock.patch.object(Utils.persistent_load, "storage", {"other": {}}, create=True),
+                        mock.patch("Utils.persistent_store", self.store)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def store(category: str, key: str, value: dict) -> None:
+        Utils.persistent_load.storage.setdefault(category, {})[key] = value
+
+    def test_cached(self) -> None:
+        """Test that the digest is only computed again when the file changed."""
+        digest = Utils.get_file_md5(self.path, 512)
+        with mock.patch("builtins.open", side_effect=AssertionError("file was read again")):
+            self.assertEqual(Utils.get_file_md5(self.path, 512), digest)
+
+        class BaseRom(SNESRomPath):
+            md5s = [digest]
+
+        BaseRom.validate(self.path)
+        with open(self.path, "r+b") as f:
+            f.seek(512)
+            f.write(b"changed")
+        os.utime(self.path, ns=(0, 0))
+        self.assertNotEqual(Utils.get_file_md5(self.path, 512), digest)
+        with self.assertRaises(ValueError):
+            BaseRom.validate(self.path)
+
+
+class TestProcedurePatch(unittest.TestCase):
+    base_data = bytes(range(256)) * 256
+
+    class TokenPatch(APProcedurePatch, APTokenMixin):
+        hash = None
+
+        @classmethod
+        def get_source_data(cls) -> bytes:
+            return TestProcedurePatch.base_data
+
+    def test_tokens(self) -> None:
+        """Test that tokens applied onto the output file give the same rom as applying them in memory, also when other
+        steps come in between."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            patch = self.TokenPatch(os.path.join(temp_dir, "test.aptest"))
+            patch.write_token(APTokenTypes.WRITE, 0x10, b"written")
+            patch.write_token(APTokenTypes.COPY, 0x100, (0x20, 0x10))
+            patch.write_token(APTokenTypes.RLE, 0x200, (0x30, 0xFF))
+            patch.write_token(APTokenTypes.XOR_8, 0x300, 0xFF)
+            patch.write_file("tokens.bin", patch.get_token_binary())
+            patch.procedure = [("apply_tokens", ["tokens.bin"]), ("apply_tokens", ["tokens.bin"]),
+                               ("calc_snes_crc", []), ("apply_tokens", ["tokens.bin"])]
+            patch.write()
+
+            expected = self.base_data
+            for step, args in patch.procedure:
+                expected = getattr(APPatchExtension, step)(patch, expected, *args)
+            target = os.path.join(temp_dir, "test.sfc")
+            self.TokenPatch(patch.path).patch(target)
+            with open(target, "rb") as f:
+                self.assertEqual(f.read(), expected)
+
+    def test_growing_tokens(self) -> None:
+        """Test that tokens writing past the end of the rom give the same result as applying them in memory."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            patch = self.TokenPatch(os.path.join(temp_dir, "test.aptest"))
+            patch.write_token(APTokenTypes.WRITE, 0x10, b"written")
+            patch.write_file("tokens.bin", patch.get_token_binary())
+            patch.write_token(APTokenTypes.WRITE, len(self.base_data), b"appended")
+            patch.write_file("growing.bin", patch.get_token_binary())
+            patch.procedure = [("apply_tokens", ["tokens.bin"]), ("apply_tokens", ["growing.bin"]),
+                               ("apply_tokens", ["tokens.bin"])]
+            patch.write()
+
+            target = os.path.join(temp_dir, "test.sfc")
+            self.TokenPatch(patch.path).patch(target)
+            with open(target, "rb") as f:
+                data = f.read()
+            self.assertEqual(data[len(self.base_data):], b"appended")
+            self.assertEqual(data[0x10:0x17], b"written")
+
+    def test_failed_step(self) -> None:
+        """Test that a failing step leaves an existing output file as it was, without leftover temporary files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            patch = self.TokenPatch(os.path.join(temp_dir, "test.aptest"))
+            patch.write_token(APTokenTypes.WRITE, 0x10, b"written")
+            patch.write_file("tokens.bin", patch.get_token_binary())
+            patch.procedure = [("apply_tokens", ["tokens.bin"]), ("unknown_step", [])]
+            patch.write()
+
+            target = os.path.join(temp_dir, "test.sfc")
+            with open(target, "wb") as f:
+                f.write(b"previous rom")
+            with self.assertRaises(NotImplementedError):
+                self.TokenPatch(patch.path).patch(target)
+            with open(target, "rb") as f:
+                self.assertEqual(f.read(), b"previous rom")
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["test.aptest", "test.sfc"])
+
+    @unittest.skipIf(os.name == "nt", "file modes are posix")
+    def test_permissions(self) -> None:
+        """Test that a new output file gets its permissions from the umask and an existing one keeps its own."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            patch = self.TokenPatch(os.path.join(temp_dir, "test.aptest"))
+            patch.write_token(APTokenTypes.WRITE, 0x10, b"written")
+            patch.write_file("tokens.bin", patch.get_token_binary())
+            patch.procedure = [("apply_tokens", ["tokens.bin"])]
+            patch.write()
+
+            target = os.path.join(temp_dir, "test.sfc")
+            umask = os.umask(0o027)
+            try:
+                self.TokenPatch(patch.path).patch(target)
+            finally:
+                os.umask(umask)
+            self.assertEqual(os.stat(target).st_mode & 0o777, 0o640)
+            os.chmod(target, 0o604)
+            self.TokenPatch(patch.path).patch(target)
+            self.assertEqual(os.stat(target).st_mode & 0o777, 0o604)
@@ -0,0 +1,33 @@
+import typing
+import unittest
+
+if typing.TYPE_CHECKING:
+    from flask import Flask
+    from flask.testing import FlaskClient
+
+
+class TestBase(unittest.TestCase):
+    app: "Flask"
+    client: "FlaskClient"
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        from WebHostLib import app as raw_app
+        from WebHost import get_app
+        from WebHostLib.models import db
+
+        raw_app.config["PONY"] = {
+            "provider": "sqlite",
+            "filename": ":memory:",
+            "create_db": True,
+        }
+        raw_app.config.update({
+            "TESTING": True,
+        })
+        if db.provider is None:
+            cls.app = get_app()
+        else:
+            # the database can only be bound once per process, so later test classes reuse the first binding
+            cls.app = raw_app
+
+        cls.client = cls.app.test_client()
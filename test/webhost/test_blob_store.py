@@ -0,0 +1,138 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+import zipfile
+from unittest import mock
+
+from . import TestBase
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self) -> None:
+        from WebHostLib.blobstore import BlobStore
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_content_addressed(self) -> None:
+        """Test that equal content results in the same reference and different content in different ones."""
+        ref = self.store.put(b"multidata")
+        self.assertEqual(ref, self.store.put(b"multidata"))
+        self.assertEqual(ref, self.store.put_stream(io.BytesIO(b"multidata")))
+        self.assertNotEqual(ref, self.store.put(b"multisave"))
+        self.assertEqual(self.store.get(ref), b"multidata")
+
+    def test_sweep(self) -> None:
+        """Test that only old, unreferenced blobs get deleted."""
+        kept = self.store.put(b"kept")
+        old = self.store.put(b"old")
+        new = self.store.put(b"new")
+        past = time.time() - 2 * 24 * 60 * 60
+        for ref in (kept, old):
+            os.utime(self.store.path(ref), (past, past))
+        self.assertEqual(self.store.sweep({kept}), 1)
+        self.assertTrue(self.store.exists(kept))
+        self.assertFalse(self.store.exists(old))
+        self.assertTrue(self.store.exists(new))
+
+    def test_invalid_reference(self) -> None:
+        with self.assertRaises(ValueError):
+            self.store.path("../ap.db3")
+
+
+class TestMultisave(TestBase):
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        patcher = mock.patch("WebHostLib.blobstore.blob_store.folder", temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_replaced_multisave_swept(self) -> None:
+        """Test that saving keeps the replaced multisave until the sweep, which only deletes it once it is old."""
+        from uuid import UUID
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import sweep_blobs
+        from WebHostLib.blobstore import blob_store
+        from WebHostLib.models import Room, Seed
+
+        with db_session:
+            room = Room(seed=Seed(owner=UUID(int=1), multidata_ref=blob_store.put(b"multidata")), owner=UUID(int=1))
+            room.set_multisave(b"first")
+            old_ref = room.multisave_ref
+            room.set_multisave(b"second")
+            room_id = room.id
+        self.assertTrue(blob_store.exists(old_ref))
+        sweep_blobs()
+        self.assertTrue(blob_store.exists(old_ref))
+
+        past = time.time() - 2 * 24 * 60 * 60
+        for shard in os.scandir(blob_store.folder):
+            for entry in os.scandir(shard.path):
+                os.utime(entry.path, (past, past))
+        sweep_blobs()
+        self.assertFalse(blob_store.exists(old_ref))
+        with db_session:
+            self.assertEqual(Room[room_id].get_multisave(), b"second")
+            self.assertEqual(Room[room_id].seed.get_multidata(), b"multidata")
+
+    def test_replaced_multisave_deleted(self) -> None:
+        """Test that a replaced multisave gets deleted after the commit, unless it is in use or stored again since."""
+        from uuid import UUID
+        from pony.orm import db_session
+        from WebHostLib.blobstore import blob_store
+        from WebHostLib.models import Room, Seed, delete_replaced_multisave
+
+        with db_session:
+            seed = Seed(owner=UUID(int=1), multidata_ref=blob_store.put(b"multidata"))
+            room, other_room = Room(seed=seed, owner=UUID(int=1)), Room(seed=seed, owner=UUID(int=1))
+            self.assertIsNone(room.set_multisave(b"first"))
+            other_room.set_multisave(b"first")
+            self.assertIsNone(room.set_multisave(b"first"))
+        with db_session:
+            saved_at = time.time()
+            old_ref = Room[room.id].set_multisave(b"second")
+        delete_replaced_multisave(old_ref, saved_at)
+        self.assertTrue(blob_store.exists(old_ref))  # used by other_room
+
+        with db_session:
+            Room[other_room.id].set_multisave(b"second")
+        blob_store.put(b"first")  # stored again, for a transaction that may not be committed yet
+        delete_replaced_multisave(old_ref, saved_at)
+        self.assertTrue(blob_store.exists(old_ref))
+
+        delete_replaced_multisave(old_ref, time.time() + 1)
+        self.assertFalse(blob_store.exists(old_ref))
+        with db_session:
+            self.assertEqual(Room[room.id].get_multisave(), b"second")
+
+
+class TestStreamedPatch(unittest.TestCase):
+    def test_replace_member(self) -> None:
+        """Test that rewriting the manifest keeps all other members intact."""
+        from WebHostLib.downloads import _stream_zip_with_replacements
+        source = io.BytesIO()
+        with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("archipelago.json", '{"server": null}')
+            zf.writestr("delta.bsdiff4", os.urandom(4096))
+            zf.writestr("stored.txt", "stored" * 100, zipfile.ZIP_STORED)
+            zf.writestr("ünïcode.txt", "name")
+        source.seek(0)
+        with zipfile.ZipFile(source) as zf:
+            original = {info.filename: zf.read(info) for info in zf.infolist()}
+
+        size, content = _stream_zip_with_replacements(source, {"archipelago.json": b'{"server": "localhost"}'})
+        result = b"".join(content)
+        self.assertEqual(size, len(result))
+        with zipfile.ZipFile(io.BytesIO(result)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), list(original))
+            for name, data in original.items():
+                if name == "archipelago.json":
+                    self.assertEqual(zf.read(name), b'{"server": "localhost"}')
+                else:
+                    self.assertEqual(zf.read(name), data)
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from . import TestBase
+
+
+class TestCheck(TestBase):
+    options = {
+        "valid.yaml": b"name: Valid\ngame: Archipelago\nArchipelago: {}\n",
+        "invalid.yaml": b"name: Invalid\ngame: Nonexistent Game\n",
+    }
+
+    def setUp(self) -> None:
+        from WebHostLib import cache
+
+        context = self.app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        cache.clear()
+
+    def test_cached(self) -> None:
+        """Test that only files that were not checked before with the same content get rolled."""
+        from WebHostLib import check
+
+        with mock.patch.object(check, "roll_options", wraps=check.roll_options) as roll_options:
+            results = check.check_options(self.options)
+            self.assertIs(results["valid.yaml"], True)
+            self.assertIsInstance(results["invalid.yaml"], str)
+            self.assertEqual(roll_options.call_count, 1)
+
+            self.assertEqual(check.check_options(self.options), results)
+            self.assertEqual(roll_options.call_count, 1)
+
+            changed = dict(self.options, **{"valid.yaml": b"name: Changed\ngame: Archipelago\nArchipelago: {}\n"})
+            self.assertEqual(check.check_options(changed), results)
+            self.assertEqual(roll_options.call_count, 2)
+            self.assertEqual(list(roll_options.call_args.args[0]), ["valid.yaml"])
+
+    def test_roll_pool(self) -> None:
+        """Test that rolling in spawned worker processes gives the same results as rolling in the request thread."""
+        from WebHostLib import check
+
+        with mock.patch.dict(self.app.config, {"ROLL_WORKERS": 1}):
+            self.assertIsNone(check.get_roll_pool())
+            expected_results, expected_rolls = check.roll_options(self.options)
+
+        with mock.patch.dict(self.app.config, {"ROLL_WORKERS": 2}), mock.patch.object(check, "_roll_pool", None):
+            pool = check.get_roll_pool()
+            self.addCleanup(pool.shutdown)
+            self.assertEqual(pool._mp_context.get_start_method(), "spawn")
+            with mock.patch.object(pool, "submit", wraps=pool.submit) as submit:
+                results, rolls = check.roll_options(self.options)
+            self.assertEqual(submit.call_count, len(self.options))
+            self.assertIs(check._roll_pool, pool, "the pool broke and the files were rolled in the request thread")
+        self.assertEqual(results, expected_results)
+        self.assertEqual(rolls.keys(), expected_rolls.keys())
+        self.assertEqual(rolls["valid.yaml"].name, "Valid")
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from . import TestBase
+
+
+class TestGamesPlayed(TestBase):
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import GamesPlayed, Room, Seed, Slot
+
+        with db_session:
+            for entity in (GamesPlayed, Room, Slot, Seed):
+                entity.select().delete()
+
+    @staticmethod
+    def create_room(games, creation_time: datetime):
+        from WebHostLib.models import Room, Seed, Slot
+
+        seed = Seed(owner=UUID(int=1), multidata_ref="0" * 64)
+        for player, game in enumerate(games, 1):
+            Slot(player_id=player, player_name=f"Player{player}", game=game, seed=seed)
+        return Room(seed=seed, owner=UUID(int=1), creation_time=creation_time)
+
+    @staticmethod
+    def get_played():
+        from pony.orm import db_session, select
+        from WebHostLib.models import GamesPlayed
+
+        with db_session:
+            return {(day, game): played for day, game, played in
+                    select((entry.day, entry.game, entry.played) for entry in GamesPlayed)}
+
+    def test_add_room(self) -> None:
+        """Test that new rooms add to the existing counts of their day and game."""
+        from pony.orm import db_session
+        from WebHostLib.models import GamesPlayed
+
+        today = datetime.utcnow()
+        with db_session:
+            GamesPlayed.add_room(self.create_room(["Clique", "Clique", "ChecksFinder"], today))
+        with db_session:
+            GamesPlayed.add_room(self.create_room(["Clique"], today))
+            GamesPlayed.add_room(self.create_room(["Clique"], today - timedelta(days=1)))
+        self.assertEqual(self.get_played(), {
+            (today.date(), "Clique"): 3,
+            (today.date(), "ChecksFinder"): 1,
+            (today.date() - timedelta(days=1), "Clique"): 1,
+        })
+
+    def test_backfill(self) -> None:
+        """Test that a newly created GamesPlayed table gets filled from the rooms of the last 30 days."""
+        from pony.orm import db_session
+        from WebHostLib.migrations import upgrade_data
+
+        now = datetime.utcnow()
+        with db_session:
+            self.create_room(["Clique", "ChecksFinder"], now)
+            self.create_room(["Clique"], now)
+            self.create_room(["Clique"], now - timedelta(days=2))
+            self.create_room(["Clique"], now - timedelta(days=40))
+
+        upgrade_data(set())
+        self.assertEqual(self.get_played(), {})
+        upgrade_data({"GamesPlayed"})
+        self.assertEqual(self.get_played(), {
+            (now.date(), "Clique"): 2,
+            (now.date(), "ChecksFinder"): 1,
+            (now.date() - timedelta(days=2), "Clique"): 1,
+        })
@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from uuid import UUID, uuid4
+
+
+class TestSchemaUpgrade(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "ap.db3")
+
+    def create_old_database(self) -> None:
+        """Creates a database with the tables as they were before the blob store."""
+        from pony.orm import Database, Optional, PrimaryKey, Required, Set, buffer, db_session
+
+        db = Database()
+
+        class Slot(db.Entity):
+            id = PrimaryKey(int, auto=True)
+            player_id = Required(int)
+            data = Optional(bytes, lazy=True)
+            seed = Optional("Seed")
+
+        class Room(db.Entity):
+            id = PrimaryKey(UUID, default=uuid4)
+            seed = Required("Seed", index=True)
+            multisave = Optional(buffer, lazy=True)
+
+        class Seed(db.Entity):
+            id = PrimaryKey(UUID, default=uuid4)
+            rooms = Set(Room)
+            multidata = Required(bytes, lazy=True)
+            creation_time = Required(datetime, default=lambda: datetime.utcnow(), index=True)
+            slots = Set(Slot)
+
+        db.bind(provider="sqlite", filename=self.path, create_db=True)
+        db.generate_mapping(create_tables=True)
+        with db_session:
+            seed = Seed(multidata=b"multidata")
+            Room(seed=seed, multisave=b"multisave")
+            Slot(player_id=1, seed=seed, data=b"patch")
+        db.disconnect()
+
+    def test_sqlite(self) -> None:
+        """Test that the blob store columns are added and the inline multidata becomes optional, keeping all rows."""
+        from pony.orm import Database
+        from WebHostLib.migrations import upgrade_schema
+
+        self.create_old_database()
+        db = Database()
+        db.bind(provider="sqlite", filename=self.path)
+        upgrade_schema(db)
+        upgrade_schema(db)  # nothing left to do
+        db.disconnect()
+
+        with sqlite3.connect(self.path) as con:
+            columns = {table: {row[1]: not row[3] for row in con.execute(f'PRAGMA table_info("{table}")')}
+                       for table in ("Slot", "Room", "Seed")}
+            self.assertTrue(columns["Slot"]["data_ref"])
+            self.assertTrue(columns["Room"]["multisave_ref"])
+            self.assertTrue(columns["Seed"]["multidata_ref"])
+            self.assertTrue(columns["Seed"]["multidata"])
+            self.assertEqual(con.execute('SELECT multidata FROM "Seed"').fetchall(), [(b"multidata",)])
+            self.assertIn("idx_seed__creation_time",
+                          {name for name, in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")})
+            self.assertEqual(con.execute("PRAGMA foreign_key_check").fetchall(), [])
+            con.execute('INSERT INTO "Seed" (id, multidata_ref, creation_time) VALUES (?, ?, ?)',
+                        (str(uuid4()), "0" * 64, datetime.utcnow().isoformat()))
@@ -0,0 +1,118 @@
+import base64
+import pickle
+import tempfile
+import zlib
+from unittest import mock
+from uuid import UUID, uuid4
+
+from . import TestBase
+
+
+class TestTrackerAPI(TestBase):
+    multidata = {
+        "seed_name": "12345",
+        "slot_info": {},
+        "locations": {1: {101: (1, 1, 0), 102: (2, 1, 0), 103: (3, 2, 0)}, 2: {201: (4, 1, 0)}},
+        "datapackage": {"Clique": {"checksum": "tracker_api_test"}},
+    }
+    multisave = {
+        "location_checks": {(0, 1): {101, 103}},
+        "received_items": {(0, 1, True): []},
+        "client_game_state": {(0, 1): 30},
+        "client_activity_timers": (((0, 1), 1700000000.0),),
+    }
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from NetUtils import NetworkItem, NetworkSlot, SlotType
+        from WebHostLib.models import GameDataPackage
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        patcher = mock.patch("WebHostLib.blobstore.blob_store.folder", temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.multidata = dict(self.multidata, slot_info={
+            1: NetworkSlot("Player1", "Clique", SlotType.player),
+            2: NetworkSlot("Player2", "Clique", SlotType.player),
+        })
+        self.multisave = dict(self.multisave, received_items={(0, 1, True): [NetworkItem(4, 201, 2, 0)]})
+        with db_session:
+            if not GameDataPackage.get(checksum="tracker_api_test"):
+                GameDataPackage(checksum="tracker_api_test",
+                                data=pickle.dumps({"item_name_to_id": {}, "location_name_to_id": {}}))
+
+    def create_room(self, in_blob_store: bool) -> UUID:
+        from pony.orm import db_session
+        from WebHostLib.blobstore import blob_store
+        from WebHostLib.models import Room, Seed
+
+        multidata = b"\x03" + zlib.compress(pickle.dumps(self.multidata))
+        multisave = pickle.dumps(self.multisave)
+        tracker = uuid4()
+        with db_session:
+            if in_blob_store:
+                seed = Seed(owner=UUID(int=1), multidata_ref=blob_store.put(multidata))
+                room = Room(seed=seed, owner=UUID(int=1), tracker=tracker)
+                room.set_multisave(multisave)
+            else:
+                seed = Seed(owner=UUID(int=1), multidata=multidata)
+                Room(seed=seed, owner=UUID(int=1), tracker=tracker, multisave=multisave)
+        return tracker
+
+    def get(self, endpoint: str, tracker: UUID, **headers):
+        from flask import url_for
+
+        with self.app.test_request_context():
+            url = url_for(endpoint, tracker=tracker)
+        return self.client.get(url, headers=headers)
+
+    def test_state(self) -> None:
+        """Test the JSON of the tracker state, for rooms stored inline and in the blob store."""
+        for in_blob_store in (False, True):
+            with self.subTest(in_blob_store=in_blob_store):
+                response = self.get("api.tracker_state", self.create_room(in_blob_store))
+                self.assertEqual(response.status_code, 200)
+                data = response.get_json()
+                self.assertEqual(data["version"], 1)
+                self.assertEqual(data["slots"], [
+                    {"team": 0, "player": 1, "status": 30, "last_activity": 1700000000.0,
+                     "checked": base64.b64encode(bytes([0b101])).decode(), "received": [4]},
+                    {"team": 0, "player": 2, "status": 0, "last_activity": None,
+                     "checked": base64.b64encode(bytes([0])).decode(), "received": []},
+                ])
+
+    def test_locations(self) -> None:
+        """Test that the location ids the bitsets refer to are sorted per slot."""
+        for in_blob_store in (False, True):
+            with self.subTest(in_blob_store=in_blob_store):
+                response = self.get("api.tracker_locations", self.create_room(in_blob_store))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get_json(), {"version": 1, "slots": [
+                    {"team": 0, "player": 1, "game": "Clique", "locations": [101, 102, 103]},
+                    {"team": 0, "player": 2, "game": "Clique", "locations": [201]},
+                ]})
+
+    def test_etag(self) -> None:
+        """Test that unchanged state is answered with 304 and a new save changes the ETag."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        tracker = self.create_room(True)
+        etag = self.get("api.tracker_state", tracker).headers["ETag"]
+        response = self.get("api.tracker_state", tracker, **{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+        self.multisave["location_checks"] = {(0, 1): {101, 102, 103}}
+        with db_session:
+            Room.get(tracker=tracker).set_multisave(pickle.dumps(self.multisave))
+        response = self.get("api.tracker_state", tracker, **{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_json()["slots"][0]["checked"], base64.b64encode(bytes([0b111])).decode())
+
+    def test_unknown_tracker(self) -> None:
+        self.assertEqual(self.get("api.tracker_state", uuid4()).status_code, 404)
+        self.assertEqual(self.get("api.tracker_locations", uuid4()).status_code, 404)
@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from unittest import mock
+from uuid import UUID
+
+from . import TestBase
+
+
+class TestUpload(TestBase):
+    def setUp(self) -> None:
+        from NetUtils import NetworkSlot, SlotType
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.upload_folder = os.path.join(temp_dir.name, "uploads")
+        for patcher in (mock.patch("WebHostLib.blobstore.blob_store.folder", temp_dir.name),
+                        mock.patch.dict(self.app.config, {"UPLOAD_FOLDER": self.upload_folder})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        multidata = {
+            "seed_name": "12345",
+            "slot_info": {1: NetworkSlot("Player1", "Clique", SlotType.player)},
+        }
+        self.multidata = b"\x03" + zlib.compress(pickle.dumps(multidata))
+
+    def upload(self, data: bytes):
+        return self.client.post("/uploads", data={"file": (io.BytesIO(data), "test.archipelago")})
+
+    def get_seed_id(self, response, endpoint: str) -> UUID:
+        from urllib.parse import urlparse
+
+        self.assertEqual(response.status_code, 302)
+        location_endpoint, args = self.app.url_map.bind("").match(urlparse(response.headers["Location"]).path)
+        self.assertEqual(location_endpoint, endpoint)
+        return args["seed"]
+
+    def test_in_request(self) -> None:
+        """Test that uploads get turned into seeds right away if this process does not schedule generations."""
+        from pony.orm import db_session
+        from WebHostLib.models import Generation, Seed
+
+        with mock.patch.dict(self.app.config, {"SELFGEN": False}):
+            response = self.upload(self.multidata)
+        sid = self.get_seed_id(response, "view_seed")
+        with db_session:
+            seed = Seed.get(id=sid)
+            self.assertIsNotNone(seed)
+            self.assertEqual([slot.player_name for slot in seed.slots], ["Player1"])
+            self.assertIsNone(Generation.get(id=sid))
+        self.assertEqual(os.listdir(self.upload_folder), [])
+
+    def test_in_request_error(self) -> None:
+        """Test that a broken upload is reported to the user if this process does not schedule generations."""
+        with mock.patch.dict(self.app.config, {"SELFGEN": False}):
+            response = self.upload(b"\x03broken")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Could not load multidata.", response.data)
+        self.assertEqual(os.listdir(self.upload_folder), [])
+
+    def test_queued(self) -> None:
+        """Test that uploads get queued for the generator and that the worker turns them into seeds."""
+        from pony.orm import db_session
+        from WebHostLib.models import Generation, Seed, STATE_QUEUED
+        from WebHostLib.upload import ingest_upload
+
+        with mock.patch.dict(self.app.config, {"SELFGEN": True}):
+            response = self.upload(self.multidata)
+        sid = self.get_seed_id(response, "wait_seed")
+        with db_session:
+            generation = Generation.get(id=sid)
+            self.assertEqual(generation.state, STATE_QUEUED)
+            path = json.loads(generation.meta)["upload"]
+            owner = generation.owner
+        self.assertTrue(os.path.exists(path))
+
+        self.assertEqual(ingest_upload(path, owner, sid), sid)
+        with db_session:
+            self.assertIsNotNone(Seed.get(id=sid))
+            self.assertIsNone(Generation.get(id=sid))
+        self.assertFalse(os.path.exists(path))
@@ -1,7 +1,7 @@
 
 from __future__ import annotations
 import abc
-from typing import TYPE_CHECKING, ClassVar, Dict, Iterable, Tuple, Any, Optional, Union
+from typing import TYPE_CHECKING, ClassVar, Dict, Iterable, Sequence, Tuple, Any, Optional, Union
 
 from typing_extensions import TypeGuard
 
@@ -59,6 +59,8 @@ class AutoSNIClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: SNIContext) -> Optional[SNIClient]:
+        from . import load_all_worlds
+        load_all_worlds()
         for _game, handler in AutoSNIClientRegister.game_handlers.items():
             if await handler.validate_rom(ctx):
                 return handler
@@ -80,6 +82,14 @@ class SNIClient(abc.ABC, metaclass=AutoSNIClientRegister):
         """ TODO: interface documentation here """
         ...
 
+    def get_read_plan(self, ctx: SNIContext) -> Sequence[Tuple[int, int]]:
+        """
+        (address, size) ranges that game_watcher reads every tick.
+        They are read in one burst before game_watcher is called, and snes_read answers from that data until the tick
+        ends or snes_write writes over it. Reads that need to see changes during the tick must not be in the plan.
+        """
+        return ()
+
     async def deathlink_kill_player(self, ctx: SNIContext) -> None:
         """ override this with implementation to kill player """
         pass
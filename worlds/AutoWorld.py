@@ -13,6 +13,7 @@ from typing import (Any, Callable, ClassVar, Dict, FrozenSet, List, Mapping,
 
 from Options import PerGameCommonOptions
 from BaseClasses import CollectionState
+from Utils import LazyDict
 
 if TYPE_CHECKING:
     import random
@@ -24,7 +25,8 @@ perf_logger = logging.getLogger("performance")
 
 
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    # filled on demand by the worlds package, importing only the worlds whose games are looked up
+    world_types: Dict[str, Type[World]] = LazyDict()
     __file__: str
     zip_path: Optional[str]
     settings_key: str
@@ -88,7 +90,7 @@ class AutoWorldRegister(type):
         # construct class
         new_class = super().__new__(mcs, name, bases, dct)
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
+            if dict.__contains__(AutoWorldRegister.world_types, dct["game"]):
                 raise RuntimeError(f"""Game {dct["game"]} already registered.""")
             AutoWorldRegister.world_types[dct["game"]] = new_class
         new_class.__file__ = sys.modules[new_class.__module__].__file__
@@ -149,21 +151,27 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     world_types: Set[AutoWorldRegister] = set()
+    # one player after another: worlds share the multiworld and their rules are closures, so the stages can't be
+    # handed to processes, and threads would only take turns holding the GIL
     for player in multiworld.player_ids:
         prev_item_count = len(multiworld.itempool)
         world_types.add(multiworld.worlds[player].__class__)
         call_single(multiworld, method_name, player, *args)
         if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+            _check_duplicate_items(multiworld, multiworld.itempool[prev_item_count:])
 
     call_stage(multiworld, method_name, *args)
 
 
+def _check_duplicate_items(multiworld: "MultiWorld", new_items: List["Item"]) -> None:
+    seen: Set[int] = set()
+    for item in new_items:
+        assert id(item) not in seen, (
+            f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[item.player].game}\" "
+            f"of player \"{multiworld.player_name[item.player]}\". Please make a copy instead.")
+        seen.add(id(item))
+
+
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     world_types = {multiworld.worlds[player].__class__ for player in multiworld.player_ids}
     for world_type in sorted(world_types, key=lambda world: world.__name__):
@@ -265,6 +273,11 @@ class World(metaclass=AutoWorldRegister):
     hidden: ClassVar[bool] = False
     """Hide World Type from various views. Does not remove functionality."""
 
+    process_output: ClassVar[bool] = False
+    """Set to True if generate_output can run in a process forked after stage_generate_output, used when the
+    generator's output_processes setting allows it. Changes it makes to the world are lost, except for what
+    get_output_state returns, which is handed to set_output_state in the generating process."""
+
     web: ClassVar[WebWorld] = WebWorld()
     """see WebWorld for options"""
 
@@ -375,6 +388,20 @@ class World(metaclass=AutoWorldRegister):
         """
         pass
 
+    def get_output_state(self) -> Any:
+        """
+        Called after generate_output ran in a separate process, see process_output.
+        Returns the picklable results of generate_output that other methods of this world need, like a rom name.
+        """
+        return None
+
+    def set_output_state(self, state: Any) -> None:
+        """
+        Called in the generating process with the return value of get_output_state once generate_output finished in
+        a separate process, or with None if it failed. Anything waiting for generate_output has to be released here.
+        """
+        pass
+
     def fill_slot_data(self) -> Mapping[str, Any]:  # json of WebHostLib.models.Slot
         """
         What is returned from this function will be in the `slot_data` field
@@ -2,19 +2,19 @@ from __future__ import annotations
 
 import abc
 import json
+import mmap
 import zipfile
 from enum import IntEnum
 import os
 import threading
 
-from typing import ClassVar, Dict, List, Literal, Tuple, Any, Optional, Union, BinaryIO, overload, Sequence
+from typing import ClassVar, Dict, List, Literal, Tuple, Any, Optional, Union, BinaryIO, overload, Sequence, IO
 
 import bsdiff4
 
 semaphore = threading.Semaphore(os.cpu_count() or 4)
 
 del threading
-del os
 
 
 class AutoPatchRegister(abc.ABCMeta):
@@ -33,6 +33,8 @@ class AutoPatchRegister(abc.ABCMeta):
 
     @staticmethod
     def get_handler(file: str) -> Optional[AutoPatchRegister]:
+        from . import load_all_worlds
+        load_all_worlds()
         for file_ending, handler in AutoPatchRegister.file_endings.items():
             if file.endswith(file_ending):
                 return handler
@@ -54,6 +56,8 @@ class AutoPatchExtensionRegister(abc.ABCMeta):
     def get_handler(game: Optional[str]) -> Union[AutoPatchExtensionRegister, List[AutoPatchExtensionRegister]]:
         if not game:
             return APPatchExtension
+        from . import load_all_worlds
+        load_all_worlds()
         handler = AutoPatchExtensionRegister.extension_types.get(game, APPatchExtension)
         if handler.required_extensions:
             handlers = [handler]
@@ -251,21 +255,75 @@ class APProcedurePatch(APAutoPatchInterface):
 
     def patch(self, target: str) -> None:
         self.read()
-        base_data = self.get_source_data_with_cache()
+        base_data: Union[bytes, bytearray] = self.get_source_data_with_cache()
         patch_extender = AutoPatchExtensionRegister.get_handler(self.game)
         assert not isinstance(self.procedure, str), f"{type(self)} must define procedures"
-        for step, args in self.procedure:
-            if isinstance(patch_extender, list):
-                extension = next((item for item in [getattr(extender, step, None) for extender in patch_extender]
-                                  if item is not None), None)
-            else:
-                extension = getattr(patch_extender, step, None)
-            if extension is not None:
-                base_data = extension(self, base_data, *args)
-            else:
-                raise NotImplementedError(f"Unknown procedure {step} for {self.game}.")
-        with open(target, 'wb') as f:
-            f.write(base_data)
+        mapped: Optional[mmap.mmap] = None
+        # the output is built in a temporary file next to the target, so a failing step doesn't leave a broken file
+        fd, temp_path = _create_temp_file(target)
+        try:
+            with open(fd, "w+b") as f:
+                try:
+                    for step, args in self.procedure:
+                        if isinstance(patch_extender, list):
+                            extension = next((item for item in [getattr(extender, step, None)
+                                                                for extender in patch_extender]
+                                              if item is not None), None)
+                        else:
+                            extension = getattr(patch_extender, step, None)
+                        if extension is None:
+                            raise NotImplementedError(f"Unknown procedure {step} for {self.game}.")
+                        if extension is APPatchExtension.apply_tokens and base_data:
+                            token_data = self.get_file(*args)
+                            # tokens are applied straight onto the output file, instead of onto copies of the rom,
+                            # unless they grow it, which the memory map can't
+                            if _get_token_data_end(token_data) <= (len(base_data) if mapped is None else len(mapped)):
+                                if mapped is None:
+                                    mapped = _map_output(f, base_data)
+                                apply_token_data(token_data, mapped)
+                                continue
+                        if mapped is not None:
+                            # other extensions expect bytes
+                            base_data = mapped[:]
+                            mapped.close()
+                            mapped = None
+                        base_data = extension(self, base_data, *args)
+                    if mapped is None:
+                        f.seek(0)
+                        f.truncate()
+                        f.write(base_data)
+                finally:
+                    if mapped is not None:
+                        mapped.close()
+            os.replace(temp_path, target)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def _create_temp_file(target: str) -> Tuple[int, str]:
+    """Creates a new file to be renamed to target, with the permissions target has, or gets from the umask."""
+    while True:
+        temp_path = f"{target}.{os.urandom(4).hex()}.tmp"
+        try:
+            fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        except FileExistsError:
+            continue
+        break
+    try:
+        os.chmod(fd if os.chmod in os.supports_fd else temp_path, os.stat(target).st_mode & 0o7777)
+    except FileNotFoundError:
+        pass
+    return fd, temp_path
+
+
+def _map_output(f: IO[bytes], data: Union[bytes, bytearray]) -> mmap.mmap:
+    """Writes data to the output file and maps it into memory, to be patched in place."""
+    f.seek(0)
+    f.truncate()
+    f.write(data)
+    f.flush()
+    return mmap.mmap(f.fileno(), 0)
 
 
 class APDeltaPatch(APProcedurePatch):
@@ -364,6 +422,58 @@ class APTokenMixin:
         self._tokens.append((token_type, offset, data))
 
 
+def apply_token_data(token_data: bytes, rom_data: Union[bytearray, mmap.mmap]) -> None:
+    """Applies a token binary, as created by APTokenMixin.get_token_binary, onto rom_data in place."""
+    token_count = int.from_bytes(token_data[0:4], "little")
+    bpr = 4
+    for _ in range(token_count):
+        token_type = token_data[bpr:bpr + 1][0]
+        offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
+        size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
+        data = token_data[bpr + 9:bpr + 9 + size]
+        if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
+            arg = data[0]
+            if token_type == APTokenTypes.AND_8:
+                rom_data[offset] = rom_data[offset] & arg
+            elif token_type == APTokenTypes.OR_8:
+                rom_data[offset] = rom_data[offset] | arg
+            else:
+                rom_data[offset] = rom_data[offset] ^ arg
+        elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
+            length = int.from_bytes(data[:4], "little")
+            value = int.from_bytes(data[4:], "little")
+            if token_type == APTokenTypes.COPY:
+                rom_data[offset: offset + length] = rom_data[value: value + length]
+            else:
+                rom_data[offset: offset + length] = bytes([value] * length)
+        else:
+            rom_data[offset:offset + len(data)] = data
+        bpr += 9 + size
+
+
+def _get_token_data_end(token_data: bytes) -> int:
+    """Returns the end of the data that a token binary, as created by APTokenMixin.get_token_binary, accesses."""
+    end = 0
+    token_count = int.from_bytes(token_data[0:4], "little")
+    bpr = 4
+    for _ in range(token_count):
+        token_type = token_data[bpr:bpr + 1][0]
+        offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
+        size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
+        data = token_data[bpr + 9:bpr + 9 + size]
+        if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
+            end = max(end, offset + 1)
+        elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
+            length = int.from_bytes(data[:4], "little")
+            end = max(end, offset + length)
+            if token_type == APTokenTypes.COPY:
+                end = max(end, int.from_bytes(data[4:], "little") + length)
+        else:
+            end = max(end, offset + size)
+        bpr += 9 + size
+    return end
+
+
 class APPatchExtension(metaclass=AutoPatchExtensionRegister):
     """Class that defines patch extension functions for a given game.
     Patch extension functions must have the following two arguments in the following order:
@@ -387,33 +497,8 @@ class APPatchExtension(metaclass=AutoPatchExtensionRegister):
     @staticmethod
     def apply_tokens(caller: APProcedurePatch, rom: bytes, token_file: str) -> bytes:
         """Applies the given token file from the patch onto the current file."""
-        token_data = caller.get_file(token_file)
         rom_data = bytearray(rom)
-        token_count = int.from_bytes(token_data[0:4], "little")
-        bpr = 4
-        for _ in range(token_count):
-            token_type = token_data[bpr:bpr + 1][0]
-            offset = int.from_bytes(token_data[bpr + 1:bpr + 5], "little")
-            size = int.from_bytes(token_data[bpr + 5:bpr + 9], "little")
-            data = token_data[bpr + 9:bpr + 9 + size]
-            if token_type in [APTokenTypes.AND_8, APTokenTypes.OR_8, APTokenTypes.XOR_8]:
-                arg = data[0]
-                if token_type == APTokenTypes.AND_8:
-                    rom_data[offset] = rom_data[offset] & arg
-                elif token_type == APTokenTypes.OR_8:
-                    rom_data[offset] = rom_data[offset] | arg
-                else:
-                    rom_data[offset] = rom_data[offset] ^ arg
-            elif token_type in [APTokenTypes.COPY, APTokenTypes.RLE]:
-                length = int.from_bytes(data[:4], "little")
-                value = int.from_bytes(data[4:], "little")
-                if token_type == APTokenTypes.COPY:
-                    rom_data[offset: offset + length] = rom_data[value: value + length]
-                else:
-                    rom_data[offset: offset + length] = bytes([value] * length)
-            else:
-                rom_data[offset:offset + len(data)] = data
-            bpr += 9 + size
+        apply_token_data(caller.get_file(token_file), rom_data)
         return bytes(rom_data)
 
     @staticmethod
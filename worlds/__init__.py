@@ -1,13 +1,15 @@
+import hashlib
 import importlib
+import json
 import os
 import sys
 import warnings
 import zipimport
 import time
 import dataclasses
-from typing import Dict, List, TypedDict, Optional
+from typing import Dict, List, Optional, Tuple, TypedDict
 
-from Utils import local_path, user_path
+from Utils import LazyDict, cache_path, local_path, user_path, __version__
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else None
@@ -21,6 +23,7 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "load_all_worlds",
 }
 
 
@@ -46,6 +49,7 @@ class WorldSource:
     is_zip: bool = False
     relative: bool = True  # relative to regular world import folder
     time_taken: Optional[float] = None
+    loaded: Optional[bool] = dataclasses.field(default=None, compare=False)  # None until a load was attempted
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -56,7 +60,29 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def module_name(self) -> str:
+        return os.path.basename(self.path).rsplit(".", 1)[0] if self.is_zip else os.path.basename(self.path)
+
+    @property
+    def signature(self) -> List[int]:
+        """Changes whenever any file of this world source changes."""
+        if self.is_zip:
+            stat = os.stat(self.resolved_path)
+            return [stat.st_mtime_ns, stat.st_size]
+        latest = 0
+        files = 0
+        for dirpath, dirnames, filenames in os.walk(self.resolved_path):
+            dirnames[:] = [dirname for dirname in dirnames if dirname != "__pycache__"]
+            for filename in filenames:
+                latest = max(latest, os.stat(os.path.join(dirpath, filename)).st_mtime_ns)
+                files += 1
+        return [latest, files]
+
     def load(self) -> bool:
+        if self.loaded is not None:
+            return self.loaded
+        self.loaded = False
         try:
             start = time.perf_counter()
             if self.is_zip:
@@ -79,6 +105,7 @@ class WorldSource:
             else:
                 importlib.import_module(f".{self.path}", "worlds")
             self.time_taken = time.perf_counter()-start
+            self.loaded = True
             return True
 
         except Exception:
@@ -107,15 +134,208 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
                 world_sources.append(WorldSource(file_name, relative=relative))
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
-
-# import all submodules to trigger AutoWorldRegister
 world_sources.sort()
-for world_source in world_sources:
-    world_source.load()
 
-# Build the data package for each game.
+# The manifest records which world source provides which game, so only the worlds that are actually used get imported.
+# It is rebuilt by importing all worlds whenever any world source changed.
+MANIFEST_VERSION = 2
+
+
+class ManifestSource(TypedDict):
+    path: str
+    is_zip: bool
+    relative: bool
+    signature: List[int]
+    games: List[str]
+    settings: Dict[str, str]  # settings_key -> world class, for worlds that have settings
+    failed: bool  # the import raised, so it is retried on every start
+
+
+def get_manifest_path() -> str:
+    folders_hash = hashlib.sha1(f"{local_folder}|{user_folder}".encode("utf-8")).hexdigest()[:16]
+    return cache_path("worlds", f"manifest_{folders_hash}.json")
+
+
+def _get_world_settings_name(world: type) -> Optional[str]:
+    """module.Class of a world that declares its own settings, looked up through the same annotations as settings.py.
+    Worlds without annotations of their own inherit World's, which only declares the attribute."""
+    from .AutoWorld import World
+    annotations = world.__annotations__
+    if annotations is World.__annotations__ or "settings" not in annotations:
+        return None
+    return f"{world.__module__}.{world.__name__}"
+
+
+def _read_manifest() -> Optional[List[ManifestSource]]:
+    try:
+        with open(get_manifest_path(), "rb") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("ap_version") != __version__:
+        return None
+    sources: List[ManifestSource] = manifest["sources"]
+    if [(source["path"], source["is_zip"], source["relative"]) for source in sources] != \
+            [(world_source.path, world_source.is_zip, world_source.relative) for world_source in world_sources]:
+        return None
+    try:
+        for source, world_source in zip(sources, world_sources):
+            if source["signature"] != world_source.signature:
+                return None
+    except OSError:
+        return None
+    return sources
+
+
+def _get_manifest_source(world_source: WorldSource) -> ManifestSource:
+    from .AutoWorld import AutoWorldRegister
+    module_name = f"worlds.{world_source.module_name}"
+    worlds = [world for world in dict.values(AutoWorldRegister.world_types)
+              if world.__module__ == module_name or world.__module__.startswith(module_name + ".")]
+    return {
+        "path": world_source.path,
+        "is_zip": world_source.is_zip,
+        "relative": world_source.relative,
+        "signature": world_source.signature,
+        "games": sorted(world.game for world in worlds),
+        "settings": {world.settings_key: _get_world_settings_name(world) for world in worlds
+                     if _get_world_settings_name(world)},
+        "failed": not world_source.loaded,
+    }
+
+
+def _write_manifest(sources: List[ManifestSource]) -> None:
+    manifest_path = get_manifest_path()
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "ap_version": __version__, "sources": sources}, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+    except OSError:
+        import logging
+        logging.warning(f"Could not write world manifest to {manifest_path}, all worlds will be loaded every time.")
+
+
+def _retry_failed_sources(sources: List[ManifestSource]) -> None:
+    """A world that failed to import provides no games in the manifest, but may work now, e.g. after its requirements
+    got installed. Those are imported on every start, and remembered once they succeed."""
+    retried = False
+    for index, (source, world_source) in enumerate(zip(sources, world_sources)):
+        if source["failed"] and world_source.load():
+            sources[index] = _get_manifest_source(world_source)
+            retried = True
+    if retried:
+        _write_manifest(sources)
+
+
+def load_all_worlds() -> None:
+    """Import all worlds, for things that need to know every world, like the Launcher's components."""
+    from .AutoWorld import AutoWorldRegister
+    AutoWorldRegister.world_types.ensure_complete()
+
+
+def get_world_settings_names() -> Dict[str, str]:
+    """settings_key -> module.Class of all worlds that have settings, without importing them."""
+    return {settings_key: world_name for source in _manifest for settings_key, world_name in source["settings"].items()}
+
+
+def load_world_module(module_name: str) -> None:
+    """Import the world source that provides module_name, e.g. worlds.alttp, if it was not imported yet."""
+    top_name = module_name.split(".", 2)[1]
+    for world_source in world_sources:
+        if world_source.module_name == top_name:
+            world_source.load()
+            return
+
+
+def _load_game(game: str) -> bool:
+    if game not in _game_sources:
+        return False
+    world_source, _ = _game_sources[game]
+    return world_source.loaded is None and world_source.load()
+
+
+def _load_all_sources() -> None:
+    for world_source in world_sources:
+        world_source.load()
+
+
+_manifest = _read_manifest()
 from .AutoWorld import AutoWorldRegister
 
+if _manifest is None:
+    # import all submodules to trigger AutoWorldRegister
+    _load_all_sources()
+    AutoWorldRegister.world_types.complete = True
+    _manifest = [_get_manifest_source(world_source) for world_source in world_sources]
+    _write_manifest(_manifest)
+else:
+    _retry_failed_sources(_manifest)
+    AutoWorldRegister.world_types.load_key = _load_game
+    AutoWorldRegister.world_types.load_all = _load_all_sources
+
+# game -> world source providing it and that source's signature
+_game_sources: Dict[str, Tuple[WorldSource, List[int]]] = {
+    game: (world_source, source["signature"]) for source, world_source in zip(_manifest, world_sources)
+    for game in source["games"]
+}
+
+
+def get_data_package_cache_path(game: str) -> str:
+    game_hash = hashlib.sha1(f"{local_folder}|{user_folder}|{game}".encode("utf-8")).hexdigest()
+    return cache_path("datapackage", f"{game_hash}.json")
+
+
+def _read_cached_data_package(game: str, signature: List[int]) -> Optional[GamesPackage]:
+    try:
+        with open(get_data_package_cache_path(game), "rb") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("game") != game or cached.get("signature") != signature or cached.get("ap_version") != __version__:
+        return None
+    return cached["package"]
+
+
+def _write_cached_data_package(game: str, signature: List[int], package: GamesPackage) -> None:
+    path = get_data_package_cache_path(game)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"game": game, "signature": signature, "ap_version": __version__, "package": package}, f,
+                      separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass  # only costs recalculating it next time
+
+
+def _load_game_data_package(game: str) -> bool:
+    """Use the data package cached for the current version of the game's world source, without importing it.
+    Otherwise build it from the world and cache it."""
+    games = network_data_package["games"]
+    if game in _game_sources:
+        _, signature = _game_sources[game]
+        package = _read_cached_data_package(game, signature)
+        if package is not None:
+            games[game] = package
+            return True
+    if game not in AutoWorldRegister.world_types:
+        return False
+    games[game] = AutoWorldRegister.world_types[game].get_data_package_data()
+    if game in _game_sources:
+        _write_cached_data_package(game, _game_sources[game][1], games[game])
+    return True
+
+
+def _load_all_game_data_packages() -> None:
+    games = network_data_package["games"]
+    # worlds outside the manifest can only exist if they were already imported
+    for game in [*_game_sources, *dict.keys(AutoWorldRegister.world_types)]:
+        if not dict.__contains__(games, game):
+            _load_game_data_package(game)
+
+
+# Build the data package for each game on first use, or take it from the data package cache.
 network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
+    "games": LazyDict(_load_game_data_package, _load_all_game_data_packages),
 }
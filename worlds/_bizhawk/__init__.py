@@ -10,11 +10,14 @@ import base64
 import enum
 import json
 import sys
+import time
 import typing
 
 
 BIZHAWK_SOCKET_PORT_RANGE_START = 43055
 BIZHAWK_SOCKET_PORT_RANGE_SIZE = 5
+SNAPSHOT_TIMEOUT = 1.0
+"""Seconds without a response after which the connector script may have unlocked itself, invalidating the snapshot"""
 
 
 class ConnectionStatus(enum.IntEnum):
@@ -46,16 +49,50 @@ class SyncError(Exception):
 class BizHawkContext:
     streams: typing.Optional[typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]]
     connection_status: ConnectionStatus
+    frame: int
+    """The frame the connector script was on when it sent the latest response"""
+    locked: bool
     _lock: asyncio.Lock
     _port: typing.Optional[int]
+    _message_id: int
+    _pending: typing.Dict[int, "asyncio.Future[typing.Tuple[typing.List[typing.Dict[str, typing.Any]], bytes]]"]
+    _reader_task: "typing.Optional[asyncio.Task[None]]"
+    _snapshot: typing.Dict[str, typing.List[typing.Tuple[int, bytes]]]
+    """Data read while locked by domain, which stays valid until the emulator advances a frame"""
+    _last_response_time: float
 
     def __init__(self) -> None:
         self.streams = None
         self.connection_status = ConnectionStatus.NOT_CONNECTED
+        self.frame = 0
+        self.locked = False
         self._lock = asyncio.Lock()
         self._port = None
+        self._message_id = 0
+        self._pending = {}
+        self._reader_task = None
+        self._snapshot = {}
+        self._last_response_time = 0
+
+    def _close(self, reason: str) -> None:
+        """Closes the streams and fails every request still waiting for a response"""
+        if self.streams is not None:
+            self.streams[1].close()
+            self.streams = None
+        self.connection_status = ConnectionStatus.NOT_CONNECTED
+        self.locked = False
+        self._snapshot.clear()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self._reader_task = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RequestFailedError(reason))
+        self._pending.clear()
 
     async def _send_message(self, message: str):
+        """Sends a message and reads the line it is answered with. Only for `VERSION`, which is answered unframed, and
+        only before any other message was sent."""
         async with self._lock:
             if self.streams is None:
                 raise NotConnectedError("You tried to send a request before a connection to BizHawk was made")
@@ -68,9 +105,7 @@ class BizHawkContext:
                 res = await asyncio.wait_for(reader.readline(), timeout=5)
 
                 if res == b"":
-                    writer.close()
-                    self.streams = None
-                    self.connection_status = ConnectionStatus.NOT_CONNECTED
+                    self._close("Connection closed")
                     raise RequestFailedError("Connection closed")
 
                 if self.connection_status == ConnectionStatus.TENTATIVE:
@@ -78,16 +113,92 @@ class BizHawkContext:
 
                 return res.decode("utf-8")
             except asyncio.TimeoutError as exc:
-                writer.close()
-                self.streams = None
-                self.connection_status = ConnectionStatus.NOT_CONNECTED
+                self._close("Connection timed out")
                 raise RequestFailedError("Connection timed out") from exc
             except ConnectionResetError as exc:
-                writer.close()
-                self.streams = None
-                self.connection_status = ConnectionStatus.NOT_CONNECTED
+                self._close("Connection reset")
                 raise RequestFailedError("Connection reset") from exc
 
+    async def _send_request(self, message: str) -> typing.Tuple[typing.List[typing.Dict[str, typing.Any]], bytes]:
+        """Sends a message with a new id and waits for its responses and read data. Other messages can be sent while
+        this one waits, responses are matched to their message by id."""
+        if self.streams is None:
+            raise NotConnectedError("You tried to send a request before a connection to BizHawk was made")
+
+        if self._reader_task is None:
+            self._reader_task = asyncio.create_task(self._read_responses(self.streams[0]), name="BizHawkReader")
+
+        self._message_id += 1
+        message_id = self._message_id
+        future = self._pending[message_id] = asyncio.get_running_loop().create_future()
+        try:
+            async with self._lock:
+                writer = self.streams[1]
+                writer.write(f"{message_id} {message}\n".encode("utf-8"))
+                await asyncio.wait_for(writer.drain(), timeout=5)
+
+            return await asyncio.wait_for(future, timeout=5)
+        except asyncio.TimeoutError as exc:
+            self._close("Connection timed out")
+            raise RequestFailedError("Connection timed out") from exc
+        except ConnectionResetError as exc:
+            self._close("Connection reset")
+            raise RequestFailedError("Connection reset") from exc
+        finally:
+            self._pending.pop(message_id, None)
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        """Reads answers of the connector script and hands them to the request that is waiting for them"""
+        try:
+            while True:
+                header = await reader.readline()
+                if header == b"":
+                    break
+                message_id, frame, json_size, data_size = (int(value) for value in header.split())
+                body = await reader.readexactly(json_size + data_size)
+
+                if frame != self.frame:
+                    # emulation advanced, so the connector script isn't locked anymore
+                    self.locked = False
+                    self._snapshot.clear()
+                self.frame = frame
+                self._last_response_time = time.monotonic()
+                if self.connection_status == ConnectionStatus.TENTATIVE:
+                    self.connection_status = ConnectionStatus.CONNECTED
+
+                future = self._pending.get(message_id)
+                if future is not None and not future.done():
+                    future.set_result((json.loads(body[:json_size]), body[json_size:]))
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        self._close("Connection closed")
+
+    def _snapshot_valid(self) -> bool:
+        return self.locked and time.monotonic() - self._last_response_time < SNAPSHOT_TIMEOUT
+
+    def _read_snapshot(self, address: int, size: int, domain: str) -> typing.Optional[bytes]:
+        for start, data in self._snapshot.get(domain, ()):
+            if start <= address and address + size <= start + len(data):
+                return data[address - start:address - start + size]
+        return None
+
+    def _update_snapshot(self, requests: typing.List[typing.Dict[str, typing.Any]],
+                         responses: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        for request, response in zip(requests, responses):
+            if response["type"] == "LOCKED":
+                self.locked = True
+            elif response["type"] == "UNLOCKED":
+                self.locked = False
+                self._snapshot.clear()
+            elif response["type"] == "READ_RESPONSE" and self.locked:
+                self._snapshot.setdefault(request["domain"], []).append((request["address"], response["value"]))
+            elif response["type"] == "WRITE_RESPONSE":
+                # drop what the write changed instead of keeping track of it
+                address, size = request["address"], len(base64.b64decode(request["value"]))
+                domain_snapshot = self._snapshot.get(request["domain"], [])
+                domain_snapshot[:] = [(start, data) for start, data in domain_snapshot
+                                      if address + size <= start or start + len(data) <= address]
+
 
 async def connect(ctx: BizHawkContext) -> bool:
     """Attempts to establish a connection with a connector script. Returns True if successful."""
@@ -95,6 +206,7 @@ async def connect(ctx: BizHawkContext) -> bool:
     ports = [*range(BIZHAWK_SOCKET_PORT_RANGE_START, BIZHAWK_SOCKET_PORT_RANGE_START + BIZHAWK_SOCKET_PORT_RANGE_SIZE)]
     ports = ports[rotation_steps:] + ports[:rotation_steps]
 
+    ctx._close("Reconnecting")
     for port in ports:
         try:
             ctx.streams = await asyncio.open_connection("127.0.0.1", port)
@@ -112,10 +224,7 @@ async def connect(ctx: BizHawkContext) -> bool:
 
 def disconnect(ctx: BizHawkContext) -> None:
     """Closes the connection to the connector script."""
-    if ctx.streams is not None:
-        ctx.streams[1].close()
-        ctx.streams = None
-    ctx.connection_status = ConnectionStatus.NOT_CONNECTED
+    ctx._close("Disconnected")
 
 
 async def get_script_version(ctx: BizHawkContext) -> int:
@@ -125,13 +234,31 @@ async def get_script_version(ctx: BizHawkContext) -> int:
 async def send_requests(ctx: BizHawkContext, req_list: typing.List[typing.Dict[str, typing.Any]]) -> typing.List[typing.Dict[str, typing.Any]]:
     """Sends a list of requests to the BizHawk connector and returns their responses.
 
-    It's likely you want to use the wrapper functions instead of this."""
-    responses = json.loads(await ctx._send_message(json.dumps(req_list)))
+    The `value` of a `READ_RESPONSE` is the base64 encoded data that was read, as with older connector scripts.
+
+    Several calls can wait for their responses at the same time. It's likely you want to use the wrapper functions
+    instead of this."""
+    responses = await _send_requests(ctx, req_list)
+    for response in responses:
+        if response["type"] == "READ_RESPONSE":
+            response["value"] = base64.b64encode(response["value"]).decode("ascii")
+    return responses
+
+
+async def _send_requests(ctx: BizHawkContext, req_list: typing.List[typing.Dict[str, typing.Any]]) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Like send_requests, but the `value` of a `READ_RESPONSE` is the bytes the connector sent, without encoding them
+    again."""
+    responses, data = await ctx._send_request(json.dumps(req_list))
     errors: typing.List[ConnectorError] = []
 
+    offset = 0
     for response in responses:
         if response["type"] == "ERROR":
             errors.append(ConnectorError(response["err"]))
+        elif response["type"] == "READ_RESPONSE":
+            response["value"] = data[offset:offset + response["size"]]
+            offset += response["size"]
+    ctx._update_snapshot(req_list, responses)
 
     if errors:
         if sys.version_info >= (3, 11, 0):
@@ -239,8 +366,19 @@ async def guarded_read(ctx: BizHawkContext, read_list: typing.List[typing.Tuple[
     - `domain` is the name of the region of memory the address corresponds to
 
     Returns None if any item in guard_list failed to validate. Otherwise returns a list of bytes in the order they
-    were requested."""
-    res = await send_requests(ctx, [{
+    were requested.
+
+    While BizHawk is locked, data that was already read on the current frame is not requested again."""
+    if ctx._snapshot_valid():
+        guards = [(ctx._read_snapshot(address, len(bytes(expected_data)), domain), bytes(expected_data))
+                  for address, expected_data, domain in guard_list]
+        reads = [ctx._read_snapshot(address, size, domain) for address, size, domain in read_list]
+        if all(data is not None for data, _ in guards) and all(data is not None for data in reads):
+            if any(data != expected_data for data, expected_data in guards):
+                return None
+            return typing.cast(typing.List[bytes], reads)
+
+    res = await _send_requests(ctx, [{
         "type": "GUARD",
         "address": address,
         "expected_data": base64.b64encode(bytes(expected_data)).decode("ascii"),
@@ -261,7 +399,7 @@ async def guarded_read(ctx: BizHawkContext, read_list: typing.List[typing.Tuple[
             if item["type"] != "READ_RESPONSE":
                 raise SyncError(f"Expected response of type READ_RESPONSE or GUARD_RESPONSE but got {item['type']}")
 
-            ret.append(base64.b64decode(item["value"]))
+            ret.append(item["value"])
 
     return ret
 
@@ -57,6 +57,8 @@ class AutoBizHawkClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: BizHawkClientContext, system: str) -> Optional[BizHawkClient]:
+        from .. import load_all_worlds
+        load_all_worlds()
         for systems, handlers in AutoBizHawkClientRegister.game_handlers.items():
             if system in systems:
                 for handler in handlers.values():
@@ -94,8 +96,9 @@ class BizHawkClient(abc.ABC, metaclass=AutoBizHawkClientRegister):
 
     @abc.abstractmethod
     async def game_watcher(self, ctx: BizHawkClientContext) -> None:
-        """Runs on a loop with the approximate interval `ctx.watcher_timeout`. The currently loaded ROM is guaranteed
-        to have passed your validator when this function is called, and the emulator is very likely to be connected."""
+        """Runs on a loop with the approximate interval `ctx.watcher_timeout`, backing off after calls to
+        `ctx.watcher_scheduler.mark_paused()`. The currently loaded ROM is guaranteed to have passed your validator when
+        this function is called, and the emulator is very likely to be connected."""
         ...
 
     def on_package(self, ctx: BizHawkClientContext, cmd: str, args: dict) -> None:
@@ -9,7 +9,8 @@ import enum
 import subprocess
 from typing import Any, Dict, Optional
 
-from CommonClient import CommonContext, ClientCommandProcessor, get_base_parser, server_loop, logger, gui_enabled
+from CommonClient import CommonContext, ClientCommandProcessor, get_base_parser, server_loop, logger, gui_enabled, \
+    WatcherScheduler
 import Patch
 import Utils
 
@@ -18,7 +19,7 @@ from . import BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailed
 from .client import BizHawkClient, AutoBizHawkClientRegister
 
 
-EXPECTED_SCRIPT_VERSION = 1
+EXPECTED_SCRIPT_VERSION = 2
 
 
 class AuthStatus(enum.IntEnum):
@@ -39,6 +40,11 @@ class BizHawkClientCommandProcessor(ClientCommandProcessor):
             elif self.ctx.bizhawk_ctx.connection_status == ConnectionStatus.CONNECTED:
                 logger.info("BizHawk Connection Status: Connected")
 
+    def _cmd_watcher(self):
+        """Shows how often the game is checked and how long checking it takes"""
+        if isinstance(self.ctx, BizHawkClientContext):
+            logger.info(self.ctx.watcher_scheduler.report())
+
 
 class BizHawkClientContext(CommonContext):
     command_processor = BizHawkClientCommandProcessor
@@ -48,9 +54,7 @@ class BizHawkClientContext(CommonContext):
     slot_data: Optional[Dict[str, Any]] = None
     rom_hash: Optional[str] = None
     bizhawk_ctx: BizHawkContext
-
-    watcher_timeout: float
-    """The maximum amount of time the game watcher loop will wait for an update from the server before executing"""
+    watcher_scheduler: WatcherScheduler
 
     def __init__(self, server_address: Optional[str], password: Optional[str]):
         super().__init__(server_address, password)
@@ -58,7 +62,17 @@ class BizHawkClientContext(CommonContext):
         self.password_requested = False
         self.client_handler = None
         self.bizhawk_ctx = BizHawkContext()
-        self.watcher_timeout = 0.5
+        self.watcher_scheduler = WatcherScheduler(0.5, 1)
+
+    @property
+    def watcher_timeout(self) -> float:
+        """The maximum amount of time the game watcher loop will wait for an update from the server before executing
+        while a game is connected. It waits up to `watcher_scheduler.idle_interval` while none is, or it is paused."""
+        return self.watcher_scheduler.active_interval
+
+    @watcher_timeout.setter
+    def watcher_timeout(self, value: float) -> None:
+        self.watcher_scheduler.active_interval = value
 
     def run_gui(self):
         from kvui import GameManager
@@ -114,12 +128,7 @@ async def _game_watcher(ctx: BizHawkClientContext):
     showed_no_handler_message = False
 
     while not ctx.exit_event.is_set():
-        try:
-            await asyncio.wait_for(ctx.watcher_event.wait(), ctx.watcher_timeout)
-        except asyncio.TimeoutError:
-            pass
-
-        ctx.watcher_event.clear()
+        await ctx.watcher_scheduler.wait(ctx)
 
         try:
             if ctx.bizhawk_ctx.connection_status == ConnectionStatus.NOT_CONNECTED:
@@ -198,7 +207,8 @@ async def _game_watcher(ctx: BizHawkClientContext):
             ctx.auth_status = AuthStatus.NOT_AUTHENTICATED
 
         # Call the handler's game watcher
-        await ctx.client_handler.game_watcher(ctx)
+        with ctx.watcher_scheduler.tick():
+            await ctx.client_handler.game_watcher(ctx)
 
 
 async def _run_game(rom: str):
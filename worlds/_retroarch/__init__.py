@@ -0,0 +1,238 @@
+"""
+A module for interacting with RetroArch through its network command interface, which has to be enabled in RetroArch's
+settings.
+
+Reads of several ranges are merged into few `READ_CORE_MEMORY` commands, which are all sent before waiting for any of
+the responses. Responses are matched to their command by command name and address, as RetroArch answers over UDP.
+When commands time out, the socket is replaced, so their late responses can't be taken for those of later commands.
+Data prefetched for a tick is answered locally until it is written to or the tick ends.
+"""
+
+import asyncio
+import collections
+import typing
+
+from Utils import find_read, merge_read_ranges
+
+
+RETROARCH_DEFAULT_PORT = 55355
+READ_BLOCK_SIZE = 1024
+"""Bytes per READ_CORE_MEMORY command. Data is answered as hex, so a response is about three times as long."""
+READ_MERGE_GAP = 0x20
+"""Ranges of a read at most this many bytes apart are read as one, a round trip costs more than the bytes."""
+
+
+class RetroArchError(Exception):
+    """Base class of the errors raised when talking to RetroArch"""
+    pass
+
+
+class NotConnectedError(RetroArchError):
+    """Raised when something tries to send a command before the bridge is connected, or the connection was lost"""
+    pass
+
+
+class BadResponseError(RetroArchError):
+    """Raised when RetroArch rejected a command or answered with something unexpected"""
+    pass
+
+
+_ResponseKey = typing.Tuple[bytes, typing.Optional[int]]
+
+
+class _BridgeProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bridge: "RetroArchBridge") -> None:
+        self.bridge = bridge
+
+    def datagram_received(self, data: bytes, addr: typing.Any) -> None:
+        if self.bridge._protocol is self:
+            self.bridge._on_response(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if self.bridge._protocol is self:
+            self.bridge._fail_pending(exc)
+
+    def connection_lost(self, exc: typing.Optional[Exception]) -> None:
+        if self.bridge._protocol is self:
+            self.bridge._fail_pending(exc or NotConnectedError("Connection closed"))
+
+
+class RetroArchBridge:
+    address: str
+    port: int
+    timeout: float
+    """Seconds to wait for the responses of a batch of commands"""
+    _transport: typing.Optional[asyncio.DatagramTransport]
+    _protocol: typing.Optional[_BridgeProtocol]
+    _pending: typing.Dict[_ResponseKey, typing.Deque["asyncio.Future[bytes]"]]
+    _cache: typing.List[typing.Tuple[int, bytes]]
+
+    def __init__(self, address: str = "127.0.0.1", port: int = RETROARCH_DEFAULT_PORT, timeout: float = 1.0) -> None:
+        self.address = address
+        self.port = port
+        self.timeout = timeout
+        self._transport = None
+        self._protocol = None
+        self._pending = {}
+        self._cache = []
+
+    @property
+    def connected(self) -> bool:
+        return self._transport is not None
+
+    async def connect(self) -> None:
+        if self._transport is None:
+            self._transport, self._protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _BridgeProtocol(self), remote_addr=(self.address, self.port))
+
+    def close(self) -> None:
+        self._close_socket(NotConnectedError("Connection closed"))
+        self._cache = []
+
+    def _close_socket(self, exc: Exception) -> None:
+        """Closes the socket, responses sent to it afterwards get dropped by the OS."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+            self._protocol = None
+        self._fail_pending(exc)
+
+    def _on_response(self, data: bytes) -> None:
+        response = data.rstrip(b"\n")
+        command, _, arguments = response.partition(b" ")
+        key: _ResponseKey = (command, None)
+        if command in (b"READ_CORE_MEMORY", b"WRITE_CORE_MEMORY"):
+            try:
+                key = (command, int(arguments.split(b" ", 1)[0], 16))
+            except ValueError:
+                return
+        elif key not in self._pending:
+            key = (b"VERSION", None)  # VERSION is answered with just the version number
+        waiting = self._pending.get(key)
+        if waiting:
+            future = waiting.popleft()
+            if not future.done():
+                future.set_result(response)
+            if not waiting:
+                del self._pending[key]
+
+    def _fail_pending(self, exc: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for waiting in pending.values():
+            for future in waiting:
+                if not future.done():
+                    future.set_exception(exc)
+
+    def _request(self, command: str, address: typing.Optional[int], message: str) -> "asyncio.Future[bytes]":
+        if self._transport is None:
+            raise NotConnectedError("Not connected to RetroArch")
+        future: "asyncio.Future[bytes]" = asyncio.get_running_loop().create_future()
+        self._pending.setdefault((command.encode(), address), collections.deque()).append(future)
+        self._transport.sendto(message.encode())
+        return future
+
+    async def _wait(self, futures: typing.Sequence["asyncio.Future[bytes]"]) -> typing.List[bytes]:
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), self.timeout)
+        except asyncio.TimeoutError:
+            # Responses to the abandoned commands may still arrive, and nothing tells them apart from responses to
+            # later commands of the same address. A new socket gets a new port, which they don't reach.
+            self._close_socket(RetroArchError("Abandoned after another command timed out"))
+            self._cache = []
+            await self.connect()
+            raise
+        except asyncio.CancelledError:
+            self._close_socket(NotConnectedError("Abandoned after a command was cancelled"))
+            self._cache = []
+            raise
+
+    def send_message(self, message: str) -> None:
+        """Sends a command without waiting for or expecting a response, like SHOW_MSG"""
+        if self._transport is None:
+            raise NotConnectedError("Not connected to RetroArch")
+        self._transport.sendto(f"{message}\n".encode())
+
+    async def send_command(self, command: str) -> bytes:
+        """Sends a command without address and returns its response, like VERSION or GET_STATUS"""
+        name = command.split(" ", 1)[0]
+        response = (await self._wait([self._request(name, None, f"{command}\n")]))[0]
+        if name != "VERSION" and not response.startswith(name.encode()):
+            raise BadResponseError(f"Bad response to {name}: {response!r}")
+        return response
+
+    async def read(self, reads: typing.Sequence[typing.Tuple[int, int]],
+                   cached: bool = True) -> typing.List[bytes]:
+        """Reads (address, size) ranges of the core's memory, all in one batch of commands.
+
+        If cached, ranges within the data prefetched for this tick are answered from it."""
+        results: typing.List[typing.Optional[bytes]] = [
+            find_read(self._cache, address, size) if cached else None for address, size in reads
+        ]
+        missing = [read for read, data in zip(reads, results) if data is None]
+        if missing:
+            blocks = await self._read_blocks(merge_read_ranges(missing, READ_MERGE_GAP))
+            results = [data if data is not None else find_read(blocks, address, size)
+                       for (address, size), data in zip(reads, results)]
+        return typing.cast(typing.List[bytes], results)
+
+    async def _read_blocks(self,
+                           ranges: typing.Sequence[typing.Tuple[int, int]]) -> typing.List[typing.Tuple[int, bytes]]:
+        chunks = [(address, min(READ_BLOCK_SIZE, start + size - address))
+                  for start, size in ranges for address in range(start, start + size, READ_BLOCK_SIZE)]
+        parts: typing.Dict[int, bytes] = {}
+        while chunks:
+            responses = await self._wait([self._request("READ_CORE_MEMORY", address,
+                                                        f"READ_CORE_MEMORY {hex(address)} {size}\n")
+                                          for address, size in chunks])
+            short_chunks: typing.List[typing.Tuple[int, int]] = []
+            for (address, size), response in zip(chunks, responses):
+                data = self._parse_read(response)
+                if not data or len(data) > size:
+                    raise BadResponseError(f"Bad response reading {size} bytes at {hex(address)}: {response!r}")
+                parts[address] = data
+                if len(data) < size:
+                    # RetroArch may answer fewer bytes than asked for, ask again for the rest
+                    short_chunks.append((address + len(data), size - len(data)))
+            chunks = short_chunks
+
+        blocks: typing.List[typing.Tuple[int, bytes]] = []
+        for start, size in ranges:
+            block = bytearray()
+            while len(block) < size:
+                block += parts[start + len(block)]
+            blocks.append((start, bytes(block)))
+        return blocks
+
+    @staticmethod
+    def _parse_read(response: bytes) -> bytes:
+        arguments = response.split(b" ", 2)
+        if len(arguments) < 3 or arguments[2].startswith(b"-1"):
+            raise BadResponseError(f"Bad response to READ_CORE_MEMORY: {response!r}")
+        try:
+            return bytes.fromhex(arguments[2].decode("ascii"))
+        except ValueError:
+            raise BadResponseError(f"Bad response to READ_CORE_MEMORY: {response!r}")
+
+    async def write(self, writes: typing.Sequence[typing.Tuple[int, typing.Iterable[int]]]) -> None:
+        """Writes (address, data) pairs to the core's memory, all in one batch of commands"""
+        encoded = [(address, bytes(data)) for address, data in writes]
+        self._cache = [(start, data) for start, data in self._cache
+                       if all(address + len(value) <= start or start + len(data) <= address
+                              for address, value in encoded)]
+        responses = await self._wait([self._request("WRITE_CORE_MEMORY", address,
+                                                    f"WRITE_CORE_MEMORY {hex(address)} "
+                                                    f"{' '.join(hex(b) for b in data)}\n")
+                                      for address, data in encoded])
+        for (address, data), response in zip(encoded, responses):
+            arguments = response.split(b" ", 3)
+            if len(arguments) < 3 or arguments[2] == b"-1":
+                raise BadResponseError(f"Bad response writing {len(data)} bytes at {hex(address)}: {response!r}")
+
+    async def prefetch(self, reads: typing.Iterable[typing.Tuple[int, int]]) -> None:
+        """Reads the ranges a tick is going to read in one batch, so reads within them are answered locally until
+        clear_cache is called at the end of the tick."""
+        self._cache = []
+        self._cache = await self._read_blocks(merge_read_ranges(reads, READ_MERGE_GAP))
+
+    def clear_cache(self) -> None:
+        self._cache = []
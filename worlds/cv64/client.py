@@ -96,6 +96,7 @@ class Castlevania64Client(BizHawkClient):
             # again send a DeathLink once we are back in the Gameplay state.
             if game_state not in [0x00000002, 0x0000000B]:
                 self.self_induced_death = False
+                ctx.watcher_scheduler.mark_paused()
                 return
 
             # Enable DeathLink if the bit for it is set in our ROM flags.
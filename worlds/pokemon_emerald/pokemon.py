@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, Dict, List, Set, Optional, Tuple
 from Options import Toggle
 
 from .data import NUM_REAL_SPECIES, POSTGAME_MAPS, EncounterTableData, LearnsetMove, MiscPokemonData, SpeciesData, data
+from .items import PokemonEmeraldItem
 from .options import (Goal, HmCompatibility, LevelUpMoves, RandomizeAbilities, RandomizeLegendaryEncounters,
                       RandomizeMiscPokemon, RandomizeStarters, RandomizeTypes, RandomizeWildPokemon,
                       TmTutorCompatibility)
@@ -359,9 +360,12 @@ def randomize_wild_encounters(world: "PokemonEmeraldWorld") -> None:
                     encounter_location_index = subcategory_species.index(new_species_id) + 1
                     encounter_location_name = f"{map_data.name}_{slot_category[0]}_ENCOUNTERS{subcategory_str}_{encounter_location_index}"
                     try:
-                        # Get the corresponding location and change the event name to reflect the new species
+                        # Get the corresponding location and replace its event with one for the new species.
+                        # The event is replaced rather than renamed, as the multiworld indexes placed items by name.
                         slot_location = world.multiworld.get_location(encounter_location_name, world.player)
-                        slot_location.item.name = f"CATCH_{data.species[new_species_id].name}"
+                        slot_location.item = PokemonEmeraldItem(f"CATCH_{data.species[new_species_id].name}",
+                                                                slot_location.item.classification, None, world.player)
+                        slot_location.item.location = slot_location
                     except KeyError:
                         pass  # Map probably isn't included; should be careful here about bad encounter location names
 
@@ -0,0 +1,16 @@
+from . import PokemonEmeraldTestBase
+
+
+class TestRandomizedEncounters(PokemonEmeraldTestBase):
+    options = {
+        "wild_pokemon": "completely_random",
+    }
+
+    def test_catch_events_findable(self) -> None:
+        """Test that the catch events of randomized encounters are found by the names of their new species"""
+        locations = [location for location in self.multiworld.get_locations(self.player)
+                     if location.item and location.item.name.startswith("CATCH_")]
+        self.assertTrue(locations)
+        for item_name in {location.item.name for location in locations}:
+            self.assertEqual(self.multiworld.find_item_locations(item_name, self.player),
+                             [location for location in locations if location.item.name == item_name])
@@ -72,6 +72,19 @@ SMW_BOSS_STATES                = [0x80, 0xC0, 0xC1]
 SMW_UNCOLLECTABLE_LEVELS       = [0x25, 0x07, 0x0B, 0x40, 0x0E, 0x1F, 0x20, 0x1B, 0x1A, 0x35, 0x34, 0x31, 0x32]
 SMW_UNCOLLECTABLE_DRAGON_COINS = [0x24]
 
+# read in one burst every game_watcher tick, the game state is left out as it is read again to verify it
+SMW_READ_PLAN = [
+    (SMW_BOSS_STATE_ADDR, 0x1), (SMW_MARIO_STATE_ADDR, 0x1), (SMW_CURRENT_LEVEL_ADDR, 0x1),
+    (SMW_MESSAGE_BOX_ADDR, 0x1), (SMW_PAUSE_ADDR, 0x1), (SMW_ACTIVE_BOSS_ADDR, 0x1), (SMW_EGG_COUNT_ADDR, 0x1),
+    (SMW_BOSS_COUNT_ADDR, 0x1), (SMW_BONUS_STAR_ADDR, 0x1), (SMW_CURRENT_SUBLEVEL_ADDR, 2),
+    (SMW_RECV_PROGRESS_ADDR, 2), (SMW_GOAL_DATA, 0x1), (SMW_REQUIRED_EGGS_DATA, 0x1), (SMW_EVENT_ROM_DATA, 0x60),
+    (SMW_PROGRESS_DATA, 0x0F), (SMW_DRAGON_COINS_DATA, 0x0C), (SMW_DRAGON_COINS_ACTIVE_ADDR, 0x1),
+    (SMW_MOON_DATA, 0x0C), (SMW_MOON_ACTIVE_ADDR, 0x1), (SMW_HIDDEN_1UP_DATA, 0x0C), (SMW_HIDDEN_1UP_ACTIVE_ADDR, 0x1),
+    (SMW_BONUS_BLOCK_DATA, 0x0C), (SMW_BONUS_BLOCK_ACTIVE_ADDR, 0x1),
+    (SMW_BLOCKSANITY_DATA, SMW_BLOCKSANITY_BLOCK_COUNT), (SMW_BLOCKSANITY_FLAGS, 0xC),
+    (SMW_BLOCKSANITY_ACTIVE_ADDR, 0x1), (SMW_LEVEL_CLEAR_FLAGS, 0x60),
+]
+
 
 class SMWSNIClient(SNIClient):
     game = "Super Mario World"
@@ -273,6 +286,9 @@ class SMWSNIClient(SNIClient):
                 self.add_message_to_queue(message)
 
 
+    def get_read_plan(self, ctx):
+        return SMW_READ_PLAN
+
     async def game_watcher(self, ctx):
         from SNIClient import snes_buffered_write, snes_flush_writes, snes_read
         
@@ -289,11 +305,15 @@ class SMWSNIClient(SNIClient):
                 if current_level[0] in SMW_GOAL_LEVELS:
                     await ctx.send_msgs([{"cmd": "StatusUpdate", "status": ClientStatus.CLIENT_GOAL}])
                     ctx.finished_game = True
+            else:
+                # Nothing left to watch during the credits
+                ctx.watcher_scheduler.mark_paused()
             return
         elif game_state[0] < 0x0B:
             # We haven't loaded a save file
             ctx.message_queue = []
             ctx.current_sublevel_value = 0
+            ctx.watcher_scheduler.mark_paused()
             return
         elif mario_state[0] in SMW_INVALID_MARIO_STATES:
             # Mario can't come to the phone right now
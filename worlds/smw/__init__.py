@@ -59,6 +59,7 @@ class SMWWorld(World):
 
     topology_present = False
     required_client_version = (0, 4, 5)
+    process_output = True
 
     item_name_to_id = {name: data.code for name, data in item_table.items()}
     location_name_to_id = all_locations
@@ -230,6 +231,14 @@ class SMWWorld(World):
             if os.path.exists(rompath):
                 os.unlink(rompath)
 
+    def get_output_state(self) -> typing.Optional[bytearray]:
+        return getattr(self, "rom_name", None)
+
+    def set_output_state(self, rom_name: typing.Optional[bytearray]) -> None:
+        if rom_name:
+            self.rom_name = rom_name
+        self.rom_name_available_event.set()
+
     def modify_multidata(self, multidata: dict):
         import base64
         # wait for self.rom_name to be available.